@@ -1,6 +1,19 @@
 """Agent 包入口。"""
 
+from .answer_cache import SemanticAnswerCache
+from .context_packer import ContextPacker, PackedContext
+from .fast_router import FastRouter
 from .orchestrator import Orchestrator, build_orchestrator
-from .state import AgentState
+from .state import AgentState, AgentStream, AsyncAgentStream
 
-__all__ = ["Orchestrator", "build_orchestrator", "AgentState"]
+__all__ = [
+    "Orchestrator",
+    "build_orchestrator",
+    "AgentState",
+    "AgentStream",
+    "AsyncAgentStream",
+    "ContextPacker",
+    "PackedContext",
+    "SemanticAnswerCache",
+    "FastRouter",
+]
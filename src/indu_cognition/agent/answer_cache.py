@@ -0,0 +1,152 @@
+"""语义答案缓存。
+
+先按规范化后的查询文本精确匹配（无需 embedding），未命中时按查询向量余弦相似度
+在全部有效条目中检索，相似度不低于 `similarity_threshold` 即视为命中。条目带 TTL，
+超过 `max_entries` 时淘汰最久未命中的条目。反馈写入新 Q&A 时，只失效查询向量与
+新增子块相似（不低于 `invalidate_threshold`）的条目，反馈对应问题本身的条目保留。
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config.models import AnswerCacheConfig
+from .state import AgentState
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _SPACE_RE.sub(" ", query).strip().lower()
+
+
+class SemanticAnswerCache:
+    """线程安全的查询 -> AgentState 缓存，向量存放在预分配的 NumPy 矩阵中。"""
+
+    def __init__(self, cfg: AnswerCacheConfig) -> None:
+        self.cfg = cfg
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._slots: Dict[str, int] = {}  # 规范化查询 -> 槽位
+        self._keys: List[Optional[str]] = [None] * cfg.max_entries
+        self._states: List[Optional[AgentState]] = [None] * cfg.max_entries
+        self._expires = np.zeros(cfg.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(cfg.max_entries, dtype=np.float64)
+        self._valid = np.zeros(cfg.max_entries, dtype=bool)
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _result(self, slot: int, query: str) -> AgentState:
+        self._last_used[slot] = time.monotonic()
+        state = copy.deepcopy(self._states[slot])
+        state.user_query = query  # type: ignore[union-attr]
+        state.cached = True  # type: ignore[union-attr]
+        return state  # type: ignore[return-value]
+
+    def _drop(self, slot: int) -> None:
+        self._valid[slot] = False
+        self._slots.pop(self._keys[slot], None)  # type: ignore[arg-type]
+        self._keys[slot] = None
+        self._states[slot] = None
+
+    def get_exact(self, query: str) -> Optional[AgentState]:
+        """只按规范化文本查找，不需要 embedding。"""
+        key = normalize_query(query)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+            if self._expires[slot] <= time.monotonic():
+                self._drop(slot)
+                return None
+            self.hits += 1
+            self.exact_hits += 1
+            return self._result(slot, query)
+
+    def get(self, query: str, embedding: List[float]) -> Optional[AgentState]:
+        """按向量相似度查找；未命中时计入 misses。"""
+        q = np.asarray(embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        with self._lock:
+            now = time.monotonic()
+            for slot in np.flatnonzero(self._valid & (self._expires <= now)).tolist():
+                self._drop(slot)
+            live = np.flatnonzero(self._valid)
+            if self._matrix is None or not len(live) or self._matrix.shape[1] != len(q):
+                self.misses += 1
+                return None
+            sims = self._matrix[live] @ q
+            best = int(np.argmax(sims))
+            if sims[best] < self.cfg.similarity_threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._result(int(live[best]), query)
+
+    def put(self, query: str, embedding: List[float], state: AgentState) -> None:
+        q = np.asarray(embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        key = normalize_query(query)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(q):
+                self._matrix = np.zeros((self.cfg.max_entries, len(q)), dtype=np.float32)
+                self._valid[:] = False
+                self._slots.clear()
+            slot = self._slots.get(key)
+            if slot is None:
+                free = np.flatnonzero(~self._valid)
+                slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+                if self._valid[slot]:
+                    self._drop(slot)
+            now = time.monotonic()
+            self._matrix[slot] = q
+            self._keys[slot] = key
+            self._states[slot] = copy.deepcopy(state)
+            self._expires[slot] = now + self.cfg.ttl_sec if self.cfg.ttl_sec else np.inf
+            self._last_used[slot] = now
+            self._valid[slot] = True
+            self._slots[key] = slot
+
+    def invalidate(self) -> None:
+        """清空全部条目。"""
+        with self._lock:
+            for slot in np.flatnonzero(self._valid).tolist():
+                self._drop(slot)
+            self.invalidations += 1
+
+    def invalidate_similar(self, qa_id: str, question: str, embeddings: List[List[float]]) -> int:
+        """FeedbackUpdater 监听器：失效与新增 Q&A 子块相似的条目，返回失效条数。"""
+        if not embeddings:
+            return 0
+        docs = np.asarray(embeddings, dtype=np.float32)
+        docs /= np.linalg.norm(docs, axis=1, keepdims=True).clip(min=1e-12)
+        keep = normalize_query(question)
+        with self._lock:
+            live = np.flatnonzero(self._valid)
+            if self._matrix is None or not len(live) or self._matrix.shape[1] != docs.shape[1]:
+                return 0
+            sims = (self._matrix[live] @ docs.T).max(axis=1)
+            stale = [int(slot) for slot in live[sims >= self.cfg.invalidate_threshold] if self._keys[slot] != keep]
+            for slot in stale:
+                self._drop(slot)
+            if stale:
+                self.invalidations += 1
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": int(self._valid.sum()),
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,233 @@
+"""按 token 预算打包合成阶段的上下文。
+
+- 计数：安装了 `tokenizers` 且配置了 `tokenizer_path`（tokenizer.json）时按真实 token 计数，
+  否则用启发式估计（中日韩字符按 1 token，其余按约 4 字符 1 token 向上取整）；
+- 去重：文本完全相同或被其他块包含的子块只保留一个；
+- 提升：同一父块下检索到的子块不少于 `promote_min_siblings` 个时，按子块间的重叠
+  首尾拼接为一个父块级文本，重叠部分只出现一次；
+- SQL 结果：行数超过 `sql_max_rows` 时只保留前若干行，并附行数与数值列统计摘要；
+- 填充：SQL 摘要优先，其余按分数从高到低放入，直到用完 `token_budget`。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config.models import ContextConfig
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符（平假名/片假名、统一表意文字及扩展 A、兼容区、韩文音节）
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_RE = re.compile(f"[{_CJK}]")
+_WORD_RE = re.compile(rf"[^\s{_CJK}]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """无分词器时的保守估计。"""
+    return len(_CJK_RE.findall(text)) + sum(math.ceil(len(w) / 4) for w in _WORD_RE.findall(text))
+
+
+@lru_cache(maxsize=4)
+def _load_tokenizer(path: str) -> Any:
+    from tokenizers import Tokenizer
+
+    return Tokenizer.from_file(path)
+
+
+def build_token_counter(tokenizer_path: Optional[str] = None) -> Callable[[str], int]:
+    """返回 text -> token 数的函数；`tokenizers` 不可用或加载失败时退化为启发式估计。"""
+    if tokenizer_path:
+        try:
+            tokenizer = _load_tokenizer(tokenizer_path)
+        except ImportError:
+            logger.warning("未安装 tokenizers，上下文 token 数改用启发式估计")
+        except Exception as e:
+            logger.warning("加载分词器 %s 失败（%s），上下文 token 数改用启发式估计", tokenizer_path, e)
+        else:
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return estimate_tokens
+
+
+@dataclass
+class ContextBlock:
+    text: str
+    score: float
+    source_ids: List[str] = field(default_factory=list)
+    parent_id: Optional[str] = None
+
+
+@dataclass
+class PackedContext:
+    lines: List[str]
+    tokens: int
+    budget: int
+    dropped: int = 0
+    truncated: bool = False
+    promoted: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def _overlap(a: str, b: str, min_overlap: int) -> int:
+    """a 的后缀与 b 的前缀的最长重叠（字符数），小于 min_overlap 视为不重叠。"""
+    for k in range(min(len(a), len(b)), max(min_overlap, 1) - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+def merge_siblings(texts: List[str], min_overlap: int) -> str:
+    """把同一父块下的子块按首尾重叠串接，无法衔接的片段按原顺序以省略号相连。"""
+    n = len(texts)
+    nxt: Dict[int, tuple[int, int]] = {}
+    has_prev = set()
+    # 每个片段选重叠最长的后继，且每个后继只被使用一次
+    pairs = sorted(
+        ((_overlap(texts[i], texts[j], min_overlap), i, j) for i in range(n) for j in range(n) if i != j),
+        reverse=True,
+    )
+    for k, i, j in pairs:
+        if k and i not in nxt and j not in has_prev:
+            # 避免成环
+            node = j
+            while node in nxt:
+                node = nxt[node][0]
+            if node == i:
+                continue
+            nxt[i] = (j, k)
+            has_prev.add(j)
+    pieces: List[str] = []
+    for start in range(n):
+        if start in has_prev:
+            continue
+        text, node = texts[start], start
+        while node in nxt:
+            node, k = nxt[node]
+            text += texts[node][k:]
+        pieces.append(text)
+    return " … ".join(pieces)
+
+
+def summarize_sql_result(columns: List[str], rows: List[List[Any]], max_rows: int) -> str:
+    """SQL 结果转为提示词文本；超过 max_rows 时截断并附行数与数值列 min/max/mean。"""
+    header = " | ".join(str(c) for c in columns)
+    shown = [" | ".join("" if v is None else str(v) for v in row) for row in rows[:max_rows]]
+    if len(rows) <= max_rows:
+        return "\n".join([header, *shown])
+    stats: List[str] = []
+    for idx, col in enumerate(columns):
+        values = [row[idx] for row in rows if idx < len(row)]
+        nums = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if nums and len(nums) == len([v for v in values if v is not None]):
+            stats.append(f"{col}: min={min(nums)}, max={max(nums)}, mean={sum(nums) / len(nums):.4g}")
+    lines = [f"共 {len(rows)} 行，仅展示前 {max_rows} 行", header, *shown]
+    if stats:
+        lines.append("数值列统计：" + "；".join(stats))
+    return "\n".join(lines)
+
+
+class ContextPacker:
+    """把检索结果与 SQL 结果压缩进固定 token 预算。"""
+
+    def __init__(self, cfg: Optional[ContextConfig] = None, count_tokens: Optional[Callable[[str], int]] = None) -> None:
+        self.cfg = cfg or ContextConfig()
+        self.count_tokens = count_tokens or build_token_counter(self.cfg.tokenizer_path)
+
+    def _blocks(self, contexts: List[Dict[str, Any]]) -> tuple[List[ContextBlock], int]:
+        """去重并按父块提升，返回 (块列表, 被提升合并的父块数)。"""
+        # 完全相同的文本只保留最高分；被其他块完整包含的子块丢弃
+        by_text: Dict[str, ContextBlock] = {}
+        for ctx in contexts:
+            text = (ctx.get("text") or "").strip()
+            if not text:
+                continue
+            score = float(ctx.get("score") or 0.0)
+            block = by_text.get(text)
+            if block is None:
+                by_text[text] = ContextBlock(text, score, [ctx.get("source_id") or ""], ctx.get("parent_id"))
+            else:
+                block.score = max(block.score, score)
+                block.source_ids.append(ctx.get("source_id") or "")
+        blocks = [
+            b for b in by_text.values() if not any(b.text != o.text and b.text in o.text for o in by_text.values())
+        ]
+
+        promoted = 0
+        if self.cfg.promote_min_siblings > 0:
+            groups: Dict[str, List[ContextBlock]] = {}
+            for b in blocks:
+                if b.parent_id:
+                    groups.setdefault(b.parent_id, []).append(b)
+            for parent_id, members in groups.items():
+                if len(members) < self.cfg.promote_min_siblings:
+                    continue
+                merged = ContextBlock(
+                    text=merge_siblings([m.text for m in members], self.cfg.min_overlap),
+                    score=max(m.score for m in members),
+                    source_ids=[sid for m in members for sid in m.source_ids],
+                    parent_id=parent_id,
+                )
+                blocks = [b for b in blocks if b.parent_id != parent_id] + [merged]
+                promoted += 1
+        blocks.sort(key=lambda b: b.score, reverse=True)
+        return blocks, promoted
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """按 token 预算截断文本（二分字符长度）。"""
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count_tokens(text[:mid] + "…") <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo] + "…" if lo else ""
+
+    def pack(self, contexts: List[Dict[str, Any]], sql_result: Optional[Dict[str, Any]] = None) -> PackedContext:
+        budget = self.cfg.token_budget
+        packed = PackedContext(lines=[], tokens=0, budget=budget)
+
+        if sql_result and sql_result.get("succeeded"):
+            result = (sql_result.get("attempts") or [{}])[-1].get("result") or {}
+            # 列式模式的执行器已附带摘要（行列数、列统计、前几行）
+            summary = result.get("summary") or summarize_sql_result(
+                result.get("columns", []), result.get("rows", []), self.cfg.sql_max_rows
+            )
+            line = f"[SQL_RESULT]\n{summary}"
+            tokens = self.count_tokens(line)
+            if tokens > budget:
+                line = self._truncate(line, budget)
+                tokens = self.count_tokens(line)
+                packed.truncated = True
+            packed.lines.append(line)
+            packed.tokens += tokens
+
+        blocks, packed.promoted = self._blocks(contexts)
+        has_doc = False
+        for block in blocks:
+            line = f"[DOC]{block.text}"
+            tokens = self.count_tokens(line)
+            remaining = budget - packed.tokens
+            if tokens <= remaining:
+                packed.lines.append(line)
+                packed.tokens += tokens
+                has_doc = True
+                continue
+            if not has_doc and remaining >= self.cfg.min_truncated_tokens:
+                # 最高分的块也放不下时截断它，保证至少有一条文档依据
+                line = self._truncate(line, remaining)
+                packed.lines.append(line)
+                packed.tokens += self.count_tokens(line)
+                packed.truncated = True
+                has_doc = True
+                continue
+            packed.dropped += 1
+        return packed
@@ -0,0 +1,131 @@
+"""本地快速路由器：字符 n-gram 哈希特征 + 多分类逻辑回归（纯 NumPy）。
+
+推理只做分词、哈希与一次稀疏加权求和，耗时为微秒级，无需调用 LLM 或 embedding 服务。
+`route_task` 在其最大类别概率不低于 `routing_threshold` 时直接采用，否则回退到 LLM 路由。
+模型以 `.npz` 保存（权重、偏置、类别与特征配置），由 `cli/train_router.py` 训练。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..retrieval.tokenizers import CharNgramTokenizer
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class FastRouter:
+    def __init__(
+        self,
+        labels: List[str],
+        weights: np.ndarray,
+        bias: np.ndarray,
+        n_features: int = 1 << 16,
+        ngram_max: int = 3,
+    ) -> None:
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+        self.n_features = n_features
+        self.ngram_max = ngram_max
+        self.tokenizer = CharNgramTokenizer(ngram_min=1, ngram_max=ngram_max, lowercase=True)
+
+    # ---- 特征 ----
+
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(哈希特征下标, L2 归一化后的词频)；crc32 保证跨进程稳定。"""
+        counts: Dict[int, int] = {}
+        for token in self.tokenizer.tokenize(text):
+            idx = zlib.crc32(token.encode("utf-8")) % self.n_features
+            counts[idx] = counts.get(idx, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cols = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        vals = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return cols, vals / np.linalg.norm(vals)
+
+    # ---- 推理 ----
+
+    def predict(self, text: str) -> Tuple[str, Dict[str, float]]:
+        """返回 (最可能的类别, 各类别概率)。"""
+        cols, vals = self._features(text)
+        logits = vals @ self.weights[cols] + self.bias
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        scores = {label: float(p) for label, p in zip(self.labels, probs)}
+        return self.labels[int(np.argmax(probs))], scores
+
+    # ---- 训练 ----
+
+    @classmethod
+    def train(
+        cls,
+        texts: List[str],
+        labels: List[str],
+        n_features: int = 1 << 16,
+        ngram_max: int = 3,
+        epochs: int = 300,
+        lr: float = 1.0,
+        l2: float = 1e-4,
+    ) -> "FastRouter":
+        """全量梯度下降训练 softmax 回归（特征稀疏，按非零项累加梯度）。"""
+        classes = sorted(set(labels))
+        router = cls(classes, np.zeros((n_features, len(classes)), np.float32), np.zeros(len(classes), np.float32), n_features, ngram_max)
+        feats = [router._features(t) for t in texts]
+        rows = np.concatenate([np.full(len(c), i, dtype=np.int64) for i, (c, _) in enumerate(feats)])
+        cols = np.concatenate([c for c, _ in feats])
+        vals = np.concatenate([v for _, v in feats])[:, None]
+        y = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        y[np.arange(len(texts)), [classes.index(label) for label in labels]] = 1.0
+
+        used = np.unique(cols)
+        for _ in range(epochs):
+            logits = np.zeros_like(y)
+            np.add.at(logits, rows, vals * router.weights[cols])
+            logits += router.bias
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            diff = (probs - y) / len(texts)
+            grad = np.zeros_like(router.weights)
+            np.add.at(grad, cols, vals * diff[rows])
+            grad[used] += l2 * router.weights[used]
+            router.weights[used] -= lr * grad[used]
+            router.bias -= lr * diff.sum(axis=0)
+        return router
+
+    # ---- 持久化 ----
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"version": FORMAT_VERSION, "labels": self.labels, "n_features": self.n_features, "ngram_max": self.ngram_max}
+        with path.open("wb") as f:
+            np.savez_compressed(f, weights=self.weights, bias=self.bias, meta=np.array(json.dumps(meta)))
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FastRouter":
+        with np.load(Path(path)) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != FORMAT_VERSION:
+                raise ValueError(f"不支持的路由模型版本: {meta.get('version')}")
+            return cls(meta["labels"], data["weights"], data["bias"], meta["n_features"], meta["ngram_max"])
+
+    @classmethod
+    def load_optional(cls, path: Optional[str]) -> Optional["FastRouter"]:
+        """模型文件不存在或损坏时返回 None（仅使用 LLM 路由）。"""
+        if not path or not Path(path).exists():
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            logger.warning("加载本地路由模型 %s 失败，仅使用 LLM 路由: %s", path, e)
+            return None
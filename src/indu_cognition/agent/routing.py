@@ -2,25 +2,26 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple
+import json
+from typing import List, Optional, Tuple
 
 from ..config.models import AgentConfig
 from ..llm import ChatMessage
-from ..llm.providers.deepseek import DeepSeekChatClient
+from ..llm.providers.deepseek import AsyncDeepSeekChatClient, DeepSeekChatClient
+from .fast_router import FastRouter
 
 
-def route_task(user_query: str, chat_client: DeepSeekChatClient, cfg: AgentConfig) -> Tuple[str, dict]:
-    """LLM + 阈值路由，返回类别与原始打分。"""
+def _route_messages(user_query: str) -> List[ChatMessage]:
     prompt = (
         "对用户问题进行类型路由，返回 JSON："
         '{"retrieval":prob_retrieval,"sql":prob_sql,"tool":prob_tool}.'
         "检索=文档/知识库，sql=数据库/查询，tool=其他计算/分析。"
     )
-    messages = [ChatMessage(role="system", content="你是路由器"), ChatMessage(role="user", content=f"{prompt}\n问题: {user_query}")]
-    resp = chat_client.generate(messages).content
-    try:
-        import json
+    return [ChatMessage(role="system", content="你是路由器"), ChatMessage(role="user", content=f"{prompt}\n问题: {user_query}")]
+
 
+def _parse_route(resp: str, cfg: AgentConfig) -> Tuple[str, dict]:
+    try:
         data = json.loads(resp)
         candidates = {
             "retrieval": float(data.get("retrieval", 0)),
@@ -35,24 +36,45 @@ def route_task(user_query: str, chat_client: DeepSeekChatClient, cfg: AgentConfi
     return decision, candidates
 
 
-def select_tools(user_query: str, tool_stats: List[Tuple[str, float]], cfg: AgentConfig, chat_client: DeepSeekChatClient) -> List[str]:
-    """根据 LLM 预测 + 历史成功率选择工具。"""
-    # 使用 LLM 评分工具适配度
-    tool_names = [name for name, _ in tool_stats]
+def _fast_route(user_query: str, fast_router: Optional[FastRouter], cfg: AgentConfig) -> Optional[Tuple[str, dict]]:
+    """本地路由器置信度达到阈值时直接返回其结果，否则返回 None 交给 LLM。"""
+    if fast_router is None:
+        return None
+    label, scores = fast_router.predict(user_query)
+    return (label, scores) if scores[label] >= cfg.routing_threshold else None
+
+
+def route_task(
+    user_query: str, chat_client: DeepSeekChatClient, cfg: AgentConfig, fast_router: Optional[FastRouter] = None
+) -> Tuple[str, dict]:
+    """本地路由器优先，置信度不足时走 LLM + 阈值路由，返回类别与原始打分。"""
+    fast = _fast_route(user_query, fast_router, cfg)
+    if fast is not None:
+        return fast
+    resp = chat_client.generate(_route_messages(user_query)).content
+    return _parse_route(resp, cfg)
+
+
+async def aroute_task(
+    user_query: str, chat_client: AsyncDeepSeekChatClient, cfg: AgentConfig, fast_router: Optional[FastRouter] = None
+) -> Tuple[str, dict]:
+    """`route_task` 的异步版本。"""
+    fast = _fast_route(user_query, fast_router, cfg)
+    if fast is not None:
+        return fast
+    resp = (await chat_client.generate(_route_messages(user_query))).content
+    return _parse_route(resp, cfg)
+
+
+def _tool_messages(user_query: str, tool_names: List[str]) -> List[ChatMessage]:
     prompt = (
         "针对问题选择合适的工具，并为每个工具给出0-1的置信度，返回JSON对象，key为工具名，value为概率。"
         f"工具列表: {tool_names}"
     )
-    messages = [ChatMessage(role="system", content="你是工具选择器"), ChatMessage(role="user", content=f"{prompt}\n问题: {user_query}")]
-    llm_scores: dict
-    try:
-        import json
+    return [ChatMessage(role="system", content="你是工具选择器"), ChatMessage(role="user", content=f"{prompt}\n问题: {user_query}")]
 
-        resp = chat_client.generate(messages).content
-        llm_scores = json.loads(resp)
-    except Exception:
-        llm_scores = {name: 0.5 for name in tool_names}
 
+def _rank_tools(llm_scores: dict, tool_stats: List[Tuple[str, float]], cfg: AgentConfig) -> List[str]:
     selected = []
     for name, hist_succ in tool_stats:
         p_llm = float(llm_scores.get(name, 0.0))
@@ -60,3 +82,30 @@ def select_tools(user_query: str, tool_stats: List[Tuple[str, float]], cfg: Agen
         if score >= cfg.tool_utility_threshold:
             selected.append(name)
     return selected[: cfg.max_tool_chain]
+
+
+def select_tools(user_query: str, tool_stats: List[Tuple[str, float]], cfg: AgentConfig, chat_client: DeepSeekChatClient) -> List[str]:
+    """根据 LLM 预测 + 历史成功率选择工具。"""
+    # 使用 LLM 评分工具适配度
+    tool_names = [name for name, _ in tool_stats]
+    llm_scores: dict
+    try:
+        resp = chat_client.generate(_tool_messages(user_query, tool_names)).content
+        llm_scores = json.loads(resp)
+    except Exception:
+        llm_scores = {name: 0.5 for name in tool_names}
+    return _rank_tools(llm_scores, tool_stats, cfg)
+
+
+async def aselect_tools(
+    user_query: str, tool_stats: List[Tuple[str, float]], cfg: AgentConfig, chat_client: AsyncDeepSeekChatClient
+) -> List[str]:
+    """`select_tools` 的异步版本。"""
+    tool_names = [name for name, _ in tool_stats]
+    llm_scores: dict
+    try:
+        resp = (await chat_client.generate(_tool_messages(user_query, tool_names))).content
+        llm_scores = json.loads(resp)
+    except Exception:
+        llm_scores = {name: 0.5 for name in tool_names}
+    return _rank_tools(llm_scores, tool_stats, cfg)
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Generator, Iterator, List, Optional, Union
 
 
 @dataclass
@@ -16,3 +16,34 @@ class AgentState:
     tool_outputs: List[Dict[str, Any]] = field(default_factory=list)
     history: List[str] = field(default_factory=list)
     response: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None  # 合成回答的 token 用量
+    cached: bool = False  # 是否来自语义答案缓存
+
+
+class AgentStream:
+    """流式运行结果：迭代产出回答的增量文本，迭代结束后 `state` 为完整的 AgentState。"""
+
+    def __init__(self, steps: Generator[str, None, AgentState]) -> None:
+        self._steps = steps
+        self.state: Optional[AgentState] = None
+
+    def __iter__(self) -> Iterator[str]:
+        self.state = yield from self._steps
+
+
+class AsyncAgentStream:
+    """`AgentStream` 的异步版本；异步生成器不能带返回值，最终状态作为最后一项产出。"""
+
+    def __init__(self, steps: AsyncIterator[Union[str, AgentState]]) -> None:
+        self._steps = steps
+        self.state: Optional[AgentState] = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        async for item in self._steps:
+            if isinstance(item, AgentState):
+                self.state = item
+            else:
+                yield item
@@ -0,0 +1,274 @@
+"""批量导入命令：读取 -> 切分 -> 合成查询 / embedding -> 向量库 + BM25 双索引写入。
+
+各阶段为独立线程，之间以有界队列连接，在途文档数有上限；embedding 阶段多线程并发，
+写入阶段单线程。增量与续跑依赖 `DocumentIndexer` 的内容哈希清单：已完整写入的文档在切分
+阶段即被跳过，每 `checkpoint_every` 篇保存一次 BM25 与清单，中断后重新运行同一命令即可继续。
+检查点只追加 BM25 增量段与清单日志（定期合并），保存后 BM25 的内存部分即被释放；
+清单与 id 映射仍常驻内存，随总块数线性增长。
+
+输入可为文件或目录：`.jsonl` 每行一篇（`id_field` / `text_field` 指定字段，其余标量字段
+作为元数据），其他文本文件整篇为一篇，切分时按块流式读取文件。文件的 doc_id 为带输入根目录的
+路径（按命令行给出的写法，续跑时应保持一致），不同输入下的同名文件互不覆盖；同一次运行中
+重复的 doc_id（如 jsonl 中重复的 id）只处理第一篇。
+
+用法：python -m src.indu_cognition.cli.ingest --input data/manuals data/faq.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Union
+
+from ..cli.logging.setup import setup_logging
+from ..config import IngestConfig, load_app_config
+from ..llm import build_llm_clients
+from ..retrieval import BM25Store, DocumentIndexer, build_vector_store
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class SourceDoc:
+    doc_id: str
+    source: Union[str, Path]  # 文本本身，或切分时再流式读取的文件
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class StageStats:
+    name: str
+    docs: int = 0
+    chunks: int = 0
+    failed: int = 0
+    busy_sec: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, chunks: int, elapsed: float) -> None:
+        with self._lock:
+            self.docs += 1
+            self.chunks += chunks
+            self.busy_sec += elapsed
+
+    def fail(self) -> None:
+        with self._lock:
+            self.failed += 1
+
+    def summary(self) -> str:
+        busy = self.busy_sec or 1e-9
+        return (
+            f"{self.name:<6} docs={self.docs:<8} chunks={self.chunks:<9} failed={self.failed:<5} "
+            f"busy={self.busy_sec:8.1f}s  {self.docs / busy:8.1f} docs/s  {self.chunks / busy:9.1f} chunks/s"
+        )
+
+
+def iter_sources(paths: List[Path], cfg: IngestConfig) -> Iterator[SourceDoc]:
+    """展开输入路径，逐篇产出文档（jsonl 逐行读取，不整体载入）。"""
+    for root in paths:
+        files = (
+            sorted({f for pattern in cfg.patterns for f in root.rglob(pattern) if f.is_file()})
+            if root.is_dir()
+            else [root]
+        )
+        for path in files:
+            # 带输入根目录的路径：a/manual.txt 与 b/manual.txt 是两篇文档
+            name = path.as_posix()
+            if path.suffix != ".jsonl":
+                yield SourceDoc(doc_id=name, source=path, metadata={"source": name})
+                continue
+            with path.open("r", encoding="utf-8") as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("%s:%d 不是合法 JSON，跳过", name, lineno)
+                        continue
+                    text = record.pop(cfg.text_field, None)
+                    if not isinstance(text, str):
+                        logger.warning("%s:%d 缺少文本字段 %s，跳过", name, lineno, cfg.text_field)
+                        continue
+                    doc_id = str(record.pop(cfg.id_field, f"{name}:{lineno}"))
+                    meta = {k: v for k, v in record.items() if isinstance(v, (str, int, float, bool))}
+                    yield SourceDoc(doc_id=doc_id, source=text, metadata={"source": name, **meta})
+
+
+class IngestPipeline:
+    """read -> chunk -> embed(xN) -> index 四阶段流水线。"""
+
+    def __init__(self, indexer: DocumentIndexer, cfg: IngestConfig) -> None:
+        self.indexer = indexer
+        self.cfg = cfg
+        self.stats = {name: StageStats(name) for name in ("read", "chunk", "embed", "index")}
+        self.skipped = 0
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item: object) -> bool:
+        """阻塞入队；写入阶段已退出时放弃并返回 False。"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _reader(self, sources: Iterable[SourceDoc], out: queue.Queue) -> None:
+        it = iter(sources)
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                doc = next(it)
+            except StopIteration:
+                break
+            except Exception as e:
+                # 源文件读取失败时放弃剩余输入，已入队的文档照常写入
+                logger.error("读取输入失败: %s", e)
+                self.stats["read"].fail()
+                break
+            self.stats["read"].record(0, time.perf_counter() - start)
+            if not self._put(out, doc):
+                return
+        self._put(out, _DONE)
+
+    def _chunker(self, inp: queue.Queue, out: queue.Queue) -> None:
+        # 同一 doc_id 的两份计划基于同一旧清单，后写入的会让先写入的块成为孤儿，只保留第一篇
+        seen: Set[str] = set()
+        while (doc := inp.get()) is not _DONE and not self._stop.is_set():
+            if doc.doc_id in seen:
+                logger.warning("doc_id %s 重复，跳过（来源 %s）", doc.doc_id, doc.metadata.get("source"))
+                self.stats["chunk"].fail()
+                continue
+            seen.add(doc.doc_id)
+            start = time.perf_counter()
+            try:
+                if isinstance(doc.source, Path):
+                    with doc.source.open("r", encoding="utf-8") as f:
+                        plan = self.indexer.plan(doc.doc_id, f, doc.metadata)
+                else:
+                    plan = self.indexer.plan(doc.doc_id, doc.source, doc.metadata)
+            except Exception as e:
+                logger.error("切分文档 %s 失败: %s", doc.doc_id, e)
+                self.stats["chunk"].fail()
+                continue
+            self.stats["chunk"].record(len(plan.new), time.perf_counter() - start)
+            if not (plan.added or plan.removed):
+                self.skipped += 1
+            elif not self._put(out, plan):
+                return
+        for _ in range(self.cfg.embed_workers):
+            self._put(out, _DONE)
+
+    def _embedder(self, inp: queue.Queue, out: queue.Queue) -> None:
+        while (plan := inp.get()) is not _DONE and not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                self.indexer.prepare(plan)
+            except Exception as e:
+                # 失败文档不写入清单，下次运行会重新处理
+                logger.error("文档 %s 合成查询 / embedding 失败: %s", plan.doc_id, e)
+                self.stats["embed"].fail()
+                continue
+            self.stats["embed"].record(len(plan.added), time.perf_counter() - start)
+            if not self._put(out, plan):
+                return
+        self._put(out, _DONE)
+
+    def run(self, sources: Iterable[SourceDoc]) -> Dict[str, StageStats]:
+        size = max(self.cfg.queue_size, 1)
+        read_q: queue.Queue = queue.Queue(size)
+        plan_q: queue.Queue = queue.Queue(size)
+        ready_q: queue.Queue = queue.Queue(size)
+        # 守护线程 + 停止信号：写入阶段异常退出时上游线程不再取新任务，也不会阻塞在满队列上
+        threads = [
+            threading.Thread(target=self._reader, args=(sources, read_q), name="ingest-read", daemon=True),
+            threading.Thread(target=self._chunker, args=(read_q, plan_q), name="ingest-chunk", daemon=True),
+        ]
+        threads += [
+            threading.Thread(target=self._embedder, args=(plan_q, ready_q), name=f"ingest-embed-{i}", daemon=True)
+            for i in range(self.cfg.embed_workers)
+        ]
+        for t in threads:
+            t.start()
+
+        started = time.perf_counter()
+        pending_workers = self.cfg.embed_workers
+        since_checkpoint = 0
+        index = self.stats["index"]
+        try:
+            while pending_workers:
+                plan = ready_q.get()
+                if plan is _DONE:
+                    pending_workers -= 1
+                    continue
+                start = time.perf_counter()
+                self.indexer.apply(plan)
+                index.record(len(plan.added) + len(plan.removed), time.perf_counter() - start)
+                since_checkpoint += 1
+                if since_checkpoint >= self.cfg.checkpoint_every:
+                    self._checkpoint(started)
+                    since_checkpoint = 0
+        finally:
+            self._stop.set()
+            # 正常结束、异常或 Ctrl-C 都保存已写入部分，便于续跑
+            self.indexer.save()
+        logger.info("导入完成，用时 %.1fs，跳过未变化文档 %d 篇", time.perf_counter() - started, self.skipped)
+        return self.stats
+
+    def _checkpoint(self, started: float) -> None:
+        start = time.perf_counter()
+        self.indexer.save(reopen=True)
+        index = self.stats["index"]
+        index.busy_sec += time.perf_counter() - start
+        logger.info(
+            "已写入 %d 篇（%d 块变更），跳过 %d 篇，用时 %.1fs",
+            index.docs, index.chunks, self.skipped, time.perf_counter() - started,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest documents into the vector store and BM25 index.")
+    parser.add_argument("--config", type=Path, default=Path("configs/default.yaml"))
+    parser.add_argument("--providers", type=Path, default=Path("configs/providers.yaml"))
+    parser.add_argument("--env", type=Path, default=Path(".env"))
+    parser.add_argument("--input", type=Path, nargs="+", required=True, help="Files or directories to ingest.")
+    parser.add_argument("--embed-workers", type=int, default=None)
+    parser.add_argument("--checkpoint-every", type=int, default=None)
+    parser.add_argument("--no-q2q", action="store_true", help="BM25 直接索引原文，不生成合成查询")
+    args = parser.parse_args()
+
+    setup_logging()
+    app_config = load_app_config(args.config, providers_path=args.providers, env_path=args.env)
+    overrides: Dict[str, object] = {}
+    if args.embed_workers is not None:
+        overrides["embed_workers"] = args.embed_workers
+    if args.checkpoint_every is not None:
+        overrides["checkpoint_every"] = args.checkpoint_every
+    if args.no_q2q:
+        overrides["use_q2q"] = False
+    cfg = app_config.ingest.model_copy(update=overrides)
+
+    llm_clients = build_llm_clients(app_config)
+    indexer = DocumentIndexer(
+        app_config.retrieval,
+        build_vector_store(app_config.vector_store, llm_clients.embedding),
+        BM25Store.load_or_create(app_config.bm25),
+        chat_client=llm_clients.chat if cfg.use_q2q else None,
+    )
+    stats = IngestPipeline(indexer, cfg).run(iter_sources(args.input, cfg))
+    print("== Ingest ==")
+    for stage in stats.values():
+        print(stage.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -17,15 +17,25 @@ def main() -> None:
     parser.add_argument("--providers", type=Path, default=Path("configs/providers.yaml"))
     parser.add_argument("--env", type=Path, default=Path(".env"))
     parser.add_argument("--query", type=str, required=True, help="User query to process.")
+    parser.add_argument("--stream", action="store_true", help="边生成边输出回答")
     args = parser.parse_args()
 
     setup_logging()
     app_config = load_app_config(args.config, providers_path=args.providers, env_path=args.env)
     llm_clients = build_llm_clients(app_config)
     orchestrator = build_orchestrator(app_config, llm_clients)
-    state = orchestrator.run(args.query)
+    if not args.stream:
+        state = orchestrator.run(args.query)
+        print("== Response ==")
+        print(state.response)
+        return
+    stream = orchestrator.run_stream(args.query)
     print("== Response ==")
-    print(state.response)
+    for text in stream:
+        print(text, end="", flush=True)
+    print()
+    if stream.state is not None and stream.state.usage:
+        print(f"== Usage == {stream.state.usage}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""BM25 追加/查询延迟基准：增量倒排索引 vs. 每次重建 BM25Okapi 的旧实现。
+
+用法：python -m src.indu_cognition.cli.scripts.bench_bm25 --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from itertools import accumulate
+from typing import List, Tuple
+
+from rank_bm25 import BM25Okapi
+
+from ...config.models import BM25Config
+from ...retrieval.bm25_store import BM25Store
+
+
+class LegacyBM25Store:
+    """旧实现：每次 add 都对全量语料重新实例化 BM25Okapi。"""
+
+    def __init__(self, cfg: BM25Config) -> None:
+        self.cfg = cfg
+        self.corpus: List[List[str]] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.ids: List[str] = []
+        self.model: BM25Okapi | None = None
+
+    def add(self, queries: List[str], ids: List[str], metadatas: List[dict] | None = None) -> None:
+        metadatas = metadatas or [{} for _ in queries]
+        self.corpus.extend(q.split() for q in queries)
+        self.texts.extend(queries)
+        self.metadatas.extend(metadatas)
+        self.ids.extend(ids)
+        self.model = BM25Okapi(self.corpus, k1=self.cfg.k1, b=self.cfg.b)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float, dict]]:
+        if not self.model:
+            return []
+        scores = self.model.get_scores(query.split())
+        ranked = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.texts[i], float(s), {"id": self.ids[i], **self.metadatas[i]}) for i, s in ranked]
+
+
+def synthetic_corpus(n_docs: int, vocab_size: int = 50000, doc_len: int = 40, seed: int = 0) -> List[str]:
+    """按 Zipf 近似分布生成合成语料，词频分布接近真实文本。"""
+    rng = random.Random(seed)
+    vocab = [f"t{i}" for i in range(vocab_size)]
+    cum_weights = list(accumulate(1.0 / (i + 1) for i in range(vocab_size)))
+    docs: List[str] = []
+    for _ in range(n_docs):
+        docs.append(" ".join(rng.choices(vocab, cum_weights=cum_weights, k=doc_len)))
+    return docs
+
+
+def _time_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) * 1000 / max(repeat, 1)
+
+
+def bench(store, docs: List[str], extra: List[str], queries: List[str], appends: int, k: int) -> Tuple[float, float, float]:
+    start = time.perf_counter()
+    store.add(docs, ids=[f"d{i}" for i in range(len(docs))])
+    build_s = time.perf_counter() - start
+    append_ms = _time_ms(lambda i: store.add([extra[i]], ids=[f"x{i}"]), appends)
+    query_ms = _time_ms(lambda i: store.search(queries[i], k=k), len(queries))
+    return build_s, append_ms, query_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark incremental BM25 vs. legacy BM25Okapi rebuild.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--appends", type=int, default=20, help="单条追加次数（取平均）")
+    parser.add_argument("--queries", type=int, default=50, help="查询次数（取平均）")
+    parser.add_argument("--legacy-appends", type=int, default=3, help="旧实现的追加次数（每次都是全量重建）")
+    parser.add_argument("--legacy-queries", type=int, default=5, help="旧实现的查询次数（每次对全量文档打分）")
+    parser.add_argument("--legacy-max", type=int, default=1000000, help="超过该规模跳过旧实现")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    cfg = BM25Config()
+    print(f"{'impl':<12}{'docs':>10}{'build_s':>10}{'append_ms':>12}{'query_ms':>11}")
+    for n in args.sizes:
+        docs = synthetic_corpus(n)
+        extra = synthetic_corpus(max(args.appends, args.legacy_appends), seed=1)
+        queries = [" ".join(q.split()[:4]) for q in synthetic_corpus(args.queries, doc_len=4, seed=2)]
+        build_s, append_ms, query_ms = bench(BM25Store(cfg), docs, extra, queries, args.appends, args.k)
+        print(f"{'incremental':<12}{n:>10}{build_s:>10.2f}{append_ms:>12.3f}{query_ms:>11.3f}")
+        if n <= args.legacy_max:
+            build_s, append_ms, query_ms = bench(
+                LegacyBM25Store(cfg), docs, extra, queries[: args.legacy_queries], args.legacy_appends, args.k
+            )
+            print(f"{'legacy':<12}{n:>10}{build_s:>10.2f}{append_ms:>12.3f}{query_ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
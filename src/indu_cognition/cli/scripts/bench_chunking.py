@@ -0,0 +1,133 @@
+"""文档切分基准：流式生成器 vs. 整体物化的旧实现。
+
+生成合成设备手册写入临时文件，分别比较吞吐（MB/s）与 tracemalloc 统计的峰值内存；
+旧实现先读入全文、逐分隔符生成完整列表，新实现直接从文件流式读取并逐块消费。
+
+用法：python -m src.indu_cognition.cli.scripts.bench_chunking --sizes-mb 1 8 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+from ...config.models import RetrievalConfig
+from ...retrieval.chunking import Chunk, _split_by_delimiters, iter_hierarchical_chunks
+
+
+def legacy_split_children(text: str, cfg: RetrievalConfig) -> List[str]:
+    """旧实现：先得到全部分段列表再合并子块。"""
+    raw_segments = _split_by_delimiters(text, cfg.child_delimiters)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for seg in raw_segments:
+        if current and current_len + len(seg) > cfg.child_max_tokens:
+            chunks.append(" ".join(current).strip())
+            overlap_chars = max(cfg.overlap, 0)
+            if overlap_chars > 0 and chunks[-1]:
+                tail = chunks[-1][-overlap_chars:]
+                current = [tail]
+                current_len = len(tail)
+            else:
+                current = []
+                current_len = 0
+        current.append(seg)
+        current_len += len(seg)
+    if current:
+        chunks.append(" ".join(current).strip())
+    return chunks
+
+
+def legacy_make_hierarchical_chunks(doc_id: str, text: str, cfg: RetrievalConfig) -> List[Chunk]:
+    chunks: List[Chunk] = []
+    parent_buffer: List[str] = []
+    parent_len = 0
+    parent_idx = 0
+    for child_idx, child in enumerate(legacy_split_children(text, cfg)):
+        if parent_buffer and parent_len + len(child) > cfg.parent_max_tokens:
+            parent_id = f"{doc_id}_p{parent_idx}"
+            chunks.append(Chunk(" ".join(parent_buffer).strip(), parent_id, parent_id, "parent"))
+            parent_idx += 1
+            parent_buffer = []
+            parent_len = 0
+        parent_buffer.append(child)
+        parent_len += len(child)
+        chunks.append(Chunk(child, f"{doc_id}_p{parent_idx}", f"{doc_id}_c{child_idx}", "child"))
+    if parent_buffer:
+        parent_id = f"{doc_id}_p{parent_idx}"
+        chunks.append(Chunk(" ".join(parent_buffer).strip(), parent_id, parent_id, "parent"))
+    return chunks
+
+
+def synthetic_manual(path: Path, size_mb: float, seed: int = 0) -> None:
+    """按章节/段落/句子结构生成近似设备手册的中英文混合文本。"""
+    rng = random.Random(seed)
+    words = ["泵", "阀门", "压力", "温度", "传感器", "电机", "轴承", "检修", "报警", "PLC", "rpm", "MPa", "DN50", "润滑"]
+    target = int(size_mb * (1 << 20))
+    written = 0
+    with path.open("w", encoding="utf-8") as f:
+        section = 0
+        while written < target:
+            section += 1
+            lines = [f"第{section}章 设备维护"]
+            for _ in range(rng.randint(3, 8)):
+                sentences = ["".join(rng.choices(words, k=rng.randint(4, 20))) for _ in range(rng.randint(2, 6))]
+                lines.append("，".join(sentences) + "." + ",".join(rng.choices(words, k=3)))
+            block = "\n".join(lines) + "\n\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+
+
+def measure(fn: Callable[[], int]) -> tuple[float, float, int]:
+    """返回 (耗时秒, 峰值内存 MB, 块数)；tracemalloc 会拖慢执行，计时与内存分两次运行。"""
+    start = time.perf_counter()
+    n = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1 << 20), n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs. legacy chunking.")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--skip-verify", action="store_true", help="跳过输出一致性校验")
+    args = parser.parse_args()
+    cfg = RetrievalConfig()
+
+    print(f"{'impl':<10}{'size_mb':>9}{'chunks':>10}{'MB/s':>9}{'peak_mb':>10}")
+    for size_mb in args.sizes_mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "manual.txt"
+            synthetic_manual(path, size_mb)
+            mb = path.stat().st_size / (1 << 20)
+
+            def legacy() -> int:
+                return len(legacy_make_hierarchical_chunks("doc", path.read_text(encoding="utf-8"), cfg))
+
+            def streaming() -> int:
+                with path.open("r", encoding="utf-8") as f:
+                    return sum(1 for _ in iter_hierarchical_chunks("doc", f, cfg))
+
+            for name, fn in (("legacy", legacy), ("streaming", streaming)):
+                elapsed, peak, n = measure(fn)
+                print(f"{name:<10}{mb:>9.1f}{n:>10}{mb / elapsed:>9.2f}{peak:>10.1f}")
+
+            if not args.skip_verify:
+                with path.open("r", encoding="utf-8") as f:
+                    same = list(iter_hierarchical_chunks("doc", f, cfg)) == legacy_make_hierarchical_chunks(
+                        "doc", path.read_text(encoding="utf-8"), cfg
+                    )
+                print(f"{'':<10}{'输出一致' if same else '输出不一致！'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""向量库基准：ChromaStore vs. NumpyVectorStore（flat / ivf）。
+
+使用聚类分布的合成向量（不调用真实 embedding 服务），比较打开耗时、写入吞吐、
+单条查询延迟与相对精确余弦检索的 recall@k（Chroma 默认按 L2 距离检索，recall 偏低属预期）。
+
+用法：python -m src.indu_cognition.cli.scripts.bench_vector_store --sizes 10000 100000 --dim 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import Callable, List, Set
+
+import numpy as np
+
+from ...config.models import VectorStoreConfig
+from ...llm.types.base import EmbeddingResponse
+from ...retrieval.numpy_vector_store import NumpyVectorStore
+from ...retrieval.vector_store import ChromaStore
+
+
+class LookupEmbeddingClient:
+    """文本形如 `doc-<行号>` / `query-<行号>`，按行号返回预生成向量。"""
+
+    def __init__(self, docs: np.ndarray, queries: np.ndarray) -> None:
+        self.tables = {"doc": docs, "query": queries}
+
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        rows = []
+        for text in texts:
+            kind, idx = text.split("-")
+            rows.append(self.tables[kind][int(idx)])
+        return EmbeddingResponse(embeddings=np.asarray(rows).tolist(), raw={})
+
+
+def synthetic_vectors(n: int, dim: int, n_queries: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 500), dim)).astype(np.float32)
+    docs = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    queries = docs[rng.integers(0, n, n_queries)] + 0.3 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+    return docs, queries
+
+
+def ground_truth(docs: np.ndarray, queries: np.ndarray, k: int) -> List[Set[str]]:
+    dn = docs / np.linalg.norm(docs, axis=1, keepdims=True)
+    qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = []
+    for q in qn:
+        truth.append({f"id{i}" for i in np.argpartition(-(dn @ q), k - 1)[:k]})
+    return truth
+
+
+def bench(
+    make_store: Callable[[], object], n: int, n_queries: int, truth: List[Set[str]], k: int, batch: int
+) -> tuple[float, float, float, float]:
+    store = make_store()
+    start = time.perf_counter()
+    for lo in range(0, n, batch):
+        hi = min(lo + batch, n)
+        store.add_texts([f"doc-{i}" for i in range(lo, hi)], [f"id{i}" for i in range(lo, hi)], [{"row": i} for i in range(lo, hi)])
+    add_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = make_store()
+    open_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    recall = 0.0
+    for qi in range(n_queries):
+        start = time.perf_counter()
+        hits = store.similarity_search(f"query-{qi}", k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recall += len({h["id"] for h in hits} & truth[qi]) / k
+    return add_s, open_ms, float(np.median(latencies)), recall / n_queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ChromaStore vs. NumpyVectorStore.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=1024, help="text-embedding-v3 默认维度")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000, help="每次 add_texts 的条数")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'docs':>10}{'add_s':>9}{'open_ms':>10}{'query_ms':>10}{'recall':>8}")
+    for n in args.sizes:
+        docs, queries = synthetic_vectors(n, args.dim, args.queries)
+        truth = ground_truth(docs, queries, args.k)
+        client = LookupEmbeddingClient(docs, queries)
+        backends = {
+            "numpy-flat": lambda cfg: NumpyVectorStore(cfg, client),
+            "numpy-ivf": lambda cfg: NumpyVectorStore(cfg.model_copy(update={"index": "ivf", "ivf_min_docs": 0}), client),
+        }
+        if not args.skip_chroma:
+            backends["chroma"] = lambda cfg: ChromaStore(cfg, client)
+        for name, factory in backends.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                cfg = VectorStoreConfig(persist_path=tmp, collection="bench", ivf_nprobe=args.nprobe)
+                add_s, open_ms, query_ms, recall = bench(lambda: factory(cfg), n, args.queries, truth, args.k, args.batch)
+            print(f"{name:<12}{n:>10}{add_s:>9.2f}{open_ms:>10.1f}{query_ms:>10.3f}{recall:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""训练本地快速路由器（`agent.fast_router_path`）。
+
+样本取自 alpaca 格式 jsonl 的 `instruction` 字段，标签按以下优先级确定：
+1. 记录中已有的 `route` 字段；
+2. `--scenario-routes` 指定的场景到路由的映射，如 "Scenario 1=sql"（按前缀匹配 `scenario` 字段）；
+3. 调用 LLM 路由 prompt 标注（结果缓存到 `--labels-cache`，重复训练不再调用 LLM）；
+   回复无法解析为路由打分时重试，仍失败则跳过该样本且不缓存。
+
+训练后在留出集上报告准确率、达到 `routing_threshold` 的覆盖率与单次预测耗时，再保存模型。
+
+用法：python -m src.indu_cognition.cli.train_router --scenario-routes "Scenario 1=sql" "Scenario 4=retrieval"
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..agent.fast_router import FastRouter
+from ..agent.routing import _route_messages
+from ..cli.logging.setup import setup_logging
+from ..config import AgentConfig, load_app_config
+from ..llm import build_llm_clients
+
+logger = logging.getLogger(__name__)
+
+ROUTES = ("retrieval", "sql", "tool")
+# 单个样本的 LLM 标注尝试次数
+LABEL_ATTEMPTS = 3
+
+
+def load_samples(patterns: List[str], scenario_routes: Dict[str, str]) -> List[Tuple[str, Optional[str]]]:
+    """返回 (问题文本, 标签或 None)，同一问题只保留一条。"""
+    samples: Dict[str, Optional[str]] = {}
+    for path in sorted({p for pattern in patterns for p in glob.glob(pattern)}):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = (record.get("instruction") or "").strip()
+                if not text:
+                    continue
+                label = record.get("route")
+                if label is None:
+                    scenario = record.get("scenario") or ""
+                    label = next((r for prefix, r in scenario_routes.items() if scenario.startswith(prefix)), None)
+                if samples.get(text) is None:
+                    samples[text] = label
+    return list(samples.items())
+
+
+def parse_label(content: str) -> Optional[str]:
+    """从 LLM 回复（可能带 ```json 代码块）中取打分最高的路由；无法解析或全为 0 时返回 None。"""
+    match = re.search(r"\{.*\}", content, re.S)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+        scores = {route: float(data.get(route, 0)) for route in ROUTES}
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return None
+    best = max(scores, key=scores.__getitem__)
+    return best if scores[best] > 0 else None
+
+
+def label_with_llm(texts: List[str], cache_path: Path, args: argparse.Namespace) -> Dict[str, str]:
+    """用 LLM 为未标注样本打标签，已标注的从缓存读取；标注失败的样本不在返回结果中。"""
+    cache: Dict[str, str] = {}
+    if cache_path.exists():
+        with cache_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    cache[record["text"]] = record["route"]
+    pending = [t for t in texts if t not in cache]
+    if pending:
+        app_config = load_app_config(args.config, providers_path=args.providers, env_path=args.env)
+        chat = build_llm_clients(app_config).chat
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        failed = 0
+        with cache_path.open("a", encoding="utf-8") as f:
+            for i, text in enumerate(pending, 1):
+                # 直接解析 LLM 回复：route_task 会把无法解析的回复当作 retrieval，不能用作标签
+                route = None
+                for _ in range(LABEL_ATTEMPTS):
+                    route = parse_label(chat.generate(_route_messages(text)).content)
+                    if route is not None:
+                        break
+                if route is None:
+                    failed += 1
+                    logger.warning("LLM 标注无法解析，跳过: %s", text[:50])
+                    continue
+                cache[text] = route
+                f.write(json.dumps({"text": text, "route": route}, ensure_ascii=False) + "\n")
+                f.flush()
+                if i % 20 == 0:
+                    logger.info("LLM 标注进度 %d/%d", i, len(pending))
+        if failed:
+            logger.warning("共 %d 条样本 LLM 标注失败，未参与训练，重新运行会再次尝试", failed)
+    return {t: cache[t] for t in texts if t in cache}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the local fast-path router.")
+    parser.add_argument("--config", type=Path, default=Path("configs/default.yaml"))
+    parser.add_argument("--providers", type=Path, default=Path("configs/providers.yaml"))
+    parser.add_argument("--env", type=Path, default=Path(".env"))
+    parser.add_argument("--data", nargs="+", default=["data/scenario*_alpaca.jsonl"], help="jsonl 文件或 glob")
+    parser.add_argument("--scenario-routes", nargs="*", default=[], help='如 "Scenario 1=sql"')
+    parser.add_argument("--labels-cache", type=Path, default=Path("storage/router_labels.jsonl"))
+    parser.add_argument("--output", type=Path, default=None, help="默认为配置中的 agent.fast_router_path")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_logging()
+    scenario_routes: Dict[str, str] = {}
+    for item in args.scenario_routes:
+        prefix, _, route = item.rpartition("=")
+        if not prefix or route not in ROUTES:
+            parser.error(f"无效的 --scenario-routes 项: {item}")
+        scenario_routes[prefix] = route
+
+    samples = load_samples(args.data, scenario_routes)
+    unlabeled = [t for t, label in samples if label is None]
+    if unlabeled:
+        llm_labels = label_with_llm(unlabeled, args.labels_cache, args)
+        samples = [(t, label or llm_labels[t]) for t, label in samples if label or t in llm_labels]
+    if len({label for _, label in samples}) < 2:
+        parser.error("至少需要两个路由类别的样本")
+
+    random.Random(args.seed).shuffle(samples)
+    n_test = int(len(samples) * args.holdout)
+    test, train = samples[:n_test], samples[n_test:]
+    router = FastRouter.train([t for t, _ in train], [label for _, label in train], epochs=args.epochs)
+
+    agent_cfg = AgentConfig()
+    if args.config.exists():
+        agent_cfg = load_app_config(args.config, providers_path=args.providers, env_path=args.env).agent
+    print("== Fast Router ==")
+    print(f"samples: train={len(train)} test={len(test)} labels={router.labels}")
+    if test:
+        start = time.perf_counter()
+        preds = [router.predict(t) for t, _ in test]
+        per_query_us = (time.perf_counter() - start) / len(test) * 1e6
+        correct = sum(p[0] == label for p, (_, label) in zip(preds, test))
+        confident = [(p[0], label) for p, (_, label) in zip(preds, test) if p[1][p[0]] >= agent_cfg.routing_threshold]
+        confident_acc = sum(p == label for p, label in confident) / len(confident) if confident else 0.0
+        print(f"holdout accuracy:      {correct / len(test):.3f}")
+        print(f"fast-path coverage:    {len(confident) / len(test):.3f} (threshold {agent_cfg.routing_threshold})")
+        print(f"fast-path accuracy:    {confident_acc:.3f}")
+        print(f"predict latency:       {per_query_us:.1f} us/query")
+
+    output = args.output or Path(agent_cfg.fast_router_path or "storage/fast_router.npz")
+    print(f"saved: {router.save(output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,45 @@
 from .loader import load_app_config
 from .models import (
     AgentConfig,
+    AnswerCacheConfig,
     AppConfig,
     BM25Config,
+    ContextConfig,
     EmbeddingConfig,
     EvaluationConfig,
+    HTTPConfig,
+    IngestConfig,
     LLMConfig,
     LoggingConfig,
+    Q2QConfig,
     RerankConfig,
     RetrievalConfig,
     SQLConfig,
     SQLMemoryConfig,
+    SQLResultCacheConfig,
+    SQLValidationConfig,
     VectorStoreConfig,
 )
 
 __all__ = [
     "load_app_config",
     "AgentConfig",
+    "AnswerCacheConfig",
     "AppConfig",
     "BM25Config",
+    "ContextConfig",
     "EmbeddingConfig",
     "EvaluationConfig",
+    "HTTPConfig",
+    "IngestConfig",
     "LLMConfig",
     "LoggingConfig",
+    "Q2QConfig",
     "RerankConfig",
     "RetrievalConfig",
     "SQLConfig",
     "SQLMemoryConfig",
+    "SQLResultCacheConfig",
+    "SQLValidationConfig",
     "VectorStoreConfig",
 ]
@@ -5,9 +5,9 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class LLMConfig(BaseModel):
@@ -25,6 +25,20 @@ class LLMConfig(BaseModel):
     frequency_penalty: float = 1.1
 
 
+class HTTPConfig(BaseModel):
+    """openai-compatible 客户端共享的 HTTP 传输配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    pool_maxsize: int = Field(16, description="每个 base_url 的最大保活连接数")
+    async_max_connections: int = Field(200, description="异步客户端每个 base_url 的最大并发连接数")
+    connect_timeout_sec: float = 5.0
+    read_timeout_sec: float = 60.0
+    max_retries: int = Field(3, description="429/5xx/连接错误的重试次数")
+    backoff_base_sec: float = 0.5
+    backoff_max_sec: float = Field(30.0, description="单次退避（含 Retry-After）上限")
+
+
 class EmbeddingConfig(BaseModel):
     """向量模型配置。"""
 
@@ -33,6 +47,13 @@ class EmbeddingConfig(BaseModel):
     model: str = "text-embedding-v3"
     base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
     api_key: Optional[str] = None
+    batch_size: int = Field(10, description="单次请求的最大文本数（text-embedding-v3 上限为 10）")
+    max_concurrency: int = Field(4, description="并发请求的批次数")
+    cache_enabled: bool = True
+    cache_path: Optional[str] = Field("storage/embedding_cache.sqlite", description="磁盘缓存路径，为空则仅用内存")
+    cache_max_entries: int = Field(10000, description="内存 LRU 条目上限")
+    cache_disk_max_entries: int = Field(1000000, description="磁盘缓存条目上限，按写入时间淘汰最旧的，0 表示不限")
+    cache_disk_ttl_sec: Optional[float] = Field(None, description="磁盘缓存有效期，为空表示不过期")
 
 
 class RerankConfig(BaseModel):
@@ -44,6 +65,36 @@ class RerankConfig(BaseModel):
     base_url: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
     api_key: Optional[str] = None
     top_n: int = 50
+    return_documents: bool = Field(False, description="是否要求服务端回传文档正文（分数按 index 映射，默认关闭）")
+    cache_enabled: bool = True
+    cache_ttl_sec: Optional[float] = Field(3600.0, description="缓存过期时间，为空则不过期")
+    cache_max_entries: int = Field(2048, description="内存 LRU 条目上限")
+
+
+class ContextConfig(BaseModel):
+    """合成阶段上下文打包配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    token_budget: int = Field(3000, description="拼入提示词的上下文 token 上限")
+    tokenizer_path: Optional[str] = Field(None, description="tokenizer.json 路径（需安装 tokenizers），为空时启发式估计")
+    promote_min_siblings: int = Field(2, description="同一父块命中子块数达到该值时合并为父块级文本，0 表示不合并")
+    min_overlap: int = Field(10, description="判定子块首尾重叠的最小字符数")
+    sql_max_rows: int = Field(20, description="SQL 结果原样展示的最大行数，超出部分只给摘要")
+    min_truncated_tokens: int = Field(64, description="剩余预算不少于该值时截断首个放不下的文档块")
+
+
+class AnswerCacheConfig(BaseModel):
+    """语义答案缓存配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    enabled: bool = True
+    similarity_threshold: float = Field(0.95, description="查询向量余弦相似度不低于该值视为同一问题")
+    invalidate_threshold: float = Field(0.8, description="反馈写入的 Q&A 与缓存查询的余弦相似度不低于该值时失效该条目")
+    ttl_sec: Optional[float] = Field(1800.0, description="条目有效期，为空则不过期")
+    max_entries: int = 1024
+    routes: List[str] = Field(default_factory=lambda: ["retrieval"], description="允许缓存的路由；SQL/工具结果随实时数据变化，默认不缓存")
 
 
 class AgentConfig(BaseModel):
@@ -59,6 +110,23 @@ class AgentConfig(BaseModel):
     tool_timeout_sec: int = Field(20, description="t_max")
     max_iterations: int = Field(6, description="Agent Max Iterations")
     alpha_tool: float = Field(0.6, description="工具评分中 LLM 预测权重")
+    fast_router_path: Optional[str] = Field(
+        "storage/fast_router.npz", description="本地路由模型，文件不存在时每次都调用 LLM 路由"
+    )
+    context: ContextConfig = ContextConfig()
+    answer_cache: AnswerCacheConfig = AnswerCacheConfig()
+
+
+class Q2QConfig(BaseModel):
+    """Q2Q 合成查询批处理配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    max_concurrency: int = Field(8, description="并发中的 chat 请求数")
+    requests_per_minute: float = Field(300.0, description="chat 请求速率上限，0 表示不限速")
+    chunks_per_prompt: int = Field(1, description="单次请求合并的文本块数，>1 时要求模型返回 JSON 数组")
+    max_retries: int = Field(2, description="批量输出无法解析时的重试次数（请求错误由传输层重试）")
+    checkpoint_path: Optional[str] = Field("storage/q2q_checkpoint.jsonl", description="断点续跑文件，为空则不落盘")
 
 
 class RetrievalConfig(BaseModel):
@@ -77,6 +145,13 @@ class RetrievalConfig(BaseModel):
     gamma_filter: float = 1.0
     expected_chunk_len: int = 200
     llm_context_len: int = 4096
+    vector_timeout_sec: Optional[float] = Field(5.0, description="向量召回分支超时，超时后退化为仅 BM25")
+    bm25_timeout_sec: Optional[float] = Field(5.0, description="BM25 召回分支超时，超时后退化为仅向量")
+    branch_max_workers: int = Field(16, description="每个召回分支（向量 / BM25 / 批量 rerank）各自线程池的大小")
+    q2q: Q2QConfig = Q2QConfig()
+    manifest_path: Optional[str] = Field(
+        "storage/index_manifest.json", description="文档块内容哈希清单，重建索引时据此跳过未变化的块"
+    )
 
 
 class VectorStoreConfig(BaseModel):
@@ -84,18 +159,49 @@ class VectorStoreConfig(BaseModel):
 
     model_config = {"extra": "ignore"}
 
-    persist_path: str = "storage/chroma_docs"
+    persist_path: Optional[str] = Field(None, description="为空时按后端取 storage/chroma_docs 或 storage/numpy_docs")
     collection: str = "docs"
     embedding_model: str = "text-embedding-v3"
+    backend: str = Field("chroma", description="向量库后端：chroma / numpy")
+    index: str = Field("flat", description="numpy 后端检索方式：flat（精确）/ ivf（聚类倒排近似）")
+    ivf_nlist: int = Field(0, description="IVF 聚类数，0 表示按 √N 自动选择")
+    ivf_nprobe: int = Field(8, description="IVF 查询时探查的聚类数")
+    ivf_min_docs: int = Field(20000, description="文档数低于该值时不建 IVF，直接精确检索")
+
+    @model_validator(mode="after")
+    def _default_persist_path(self) -> "VectorStoreConfig":
+        # 两种后端的目录格式不兼容，默认各用各的目录
+        if not self.persist_path:
+            self.persist_path = f"storage/{self.backend}_docs"
+        return self
 
 
 class BM25Config(BaseModel):
-    """BM25 配置占位。"""
+    """BM25 配置。"""
 
     model_config = {"extra": "ignore"}
 
     k1: float = 1.5
     b: float = 0.75
+    tokenizer: str = Field("char_ngram", description="分词器：char_ngram / whitespace")
+    ngram_min: int = 1
+    ngram_max: int = 2
+    lowercase: bool = True
+    persist_path: Optional[str] = "storage/bm25_docs"
+
+
+class IngestConfig(BaseModel):
+    """批量导入流水线配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    embed_workers: int = Field(4, description="合成查询 + embedding 阶段的并发文档数")
+    queue_size: int = Field(32, description="阶段间有界队列长度（文档数）")
+    checkpoint_every: int = Field(200, description="每写入多少篇文档保存一次 BM25 与清单")
+    use_q2q: bool = Field(True, description="是否为 BM25 生成合成查询")
+    patterns: List[str] = Field(default_factory=lambda: ["*.txt", "*.md", "*.jsonl"], description="目录输入时匹配的文件")
+    id_field: str = "id"
+    text_field: str = "text"
 
 
 class SQLMemoryConfig(BaseModel):
@@ -107,6 +213,28 @@ class SQLMemoryConfig(BaseModel):
     collection: str = "sqlmem"
 
 
+class SQLResultCacheConfig(BaseModel):
+    """SQL 结果缓存配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    enabled: bool = True
+    ttl_sec: float = Field(60.0, description="未单独配置的表的默认 TTL")
+    table_ttl_sec: Dict[str, float] = Field(default_factory=dict, description="按表覆盖 TTL，0 表示该表相关查询不缓存")
+    max_entries: int = 512
+    max_bytes: int = Field(64 * 1024 * 1024, description="缓存结果的近似内存上限")
+
+
+class SQLValidationConfig(BaseModel):
+    """执行前静态 SQL 校验配置。"""
+
+    model_config = {"extra": "ignore"}
+
+    enabled: bool = True
+    require_limit: bool = Field(True, description="最外层查询必须带 LIMIT")
+    check_columns: bool = Field(True, description="按 DDL 目录检查列名（表名总是检查）")
+
+
 class SQLConfig(BaseModel):
     """Text-to-SQL 相关配置。"""
 
@@ -116,7 +244,19 @@ class SQLConfig(BaseModel):
     execution_timeout_sec: int = 20
     max_rows: int = 1000
     dsn: Optional[str] = None
+    feedback_error_max_chars: int = Field(500, description="重试时反馈给模型的执行错误最大字符数")
+    candidates: int = Field(1, description="每轮并发生成的候选 SQL 数，1 为串行重试（最多 t_max 次）")
+    candidate_rounds: int = Field(2, description="并行模式的最大轮数")
+    candidate_temperature: float = Field(0.8, description="除首条外候选的采样温度")
+    max_parallel_exec: int = Field(4, description="并行模式下同时执行的 SQL 数上限")
     memory_store: SQLMemoryConfig = SQLMemoryConfig()
+    columnar: bool = Field(False, description="服务端游标流式读取为列式结果，只把摘要交给提示词")
+    columnar_max_rows: int = Field(1_000_000, description="列式模式的行数上限（内存另受 max_result_bytes 约束）")
+    fetch_batch_rows: int = Field(1000, description="列式模式每批拉取行数")
+    max_result_bytes: int = Field(32 * 1024 * 1024, description="列式结果的近似内存上限")
+    summary_head_rows: int = Field(5, description="列式结果摘要中保留的前几行")
+    result_cache: SQLResultCacheConfig = SQLResultCacheConfig()
+    validation: SQLValidationConfig = SQLValidationConfig()
 
 
 class EvaluationConfig(BaseModel):
@@ -157,10 +297,12 @@ class AppConfig(BaseModel):
     agent: AgentConfig = AgentConfig()
     retrieval: RetrievalConfig = RetrievalConfig()
     llm: LLMConfig = LLMConfig()
+    http: HTTPConfig = HTTPConfig()
     embedding: EmbeddingConfig = EmbeddingConfig()
     rerank: RerankConfig = RerankConfig()
     vector_store: VectorStoreConfig = VectorStoreConfig()
     bm25: BM25Config = BM25Config()
+    ingest: IngestConfig = IngestConfig()
     sql: SQLConfig = SQLConfig()
     evaluation: EvaluationConfig = EvaluationConfig()
     logging: LoggingConfig = LoggingConfig()
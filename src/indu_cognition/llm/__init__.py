@@ -1,18 +1,38 @@
 """LLM 包入口。"""
 
-from .factory import build_llm_clients
+from .cache import AsyncCachedEmbeddingClient, CachedEmbeddingClient, LRUCache
+from .factory import build_async_llm_clients, build_llm_clients
 from .eval.g_eval import GEvalClient
-from .providers.dashscope import DashScopeEmbeddingClient, QwenRerankClient
-from .providers.deepseek import DeepSeekChatClient
+from .providers.dashscope import (
+    AsyncDashScopeEmbeddingClient,
+    AsyncQwenRerankClient,
+    DashScopeEmbeddingClient,
+    QwenRerankClient,
+)
+from .providers.deepseek import AsyncDeepSeekChatClient, DeepSeekChatClient
+from .rerank.cache import AsyncCachedRerankClient, CachedRerankClient
+from .streaming import AsyncChatStream, ChatStream
 from .types.base import ChatMessage
-from .types.clients import LLMClients
+from .types.clients import AsyncLLMClients, LLMClients
 
 __all__ = [
     "build_llm_clients",
+    "build_async_llm_clients",
+    "CachedEmbeddingClient",
+    "AsyncCachedEmbeddingClient",
+    "CachedRerankClient",
+    "AsyncCachedRerankClient",
+    "LRUCache",
     "GEvalClient",
     "DashScopeEmbeddingClient",
+    "AsyncDashScopeEmbeddingClient",
     "QwenRerankClient",
+    "AsyncQwenRerankClient",
     "DeepSeekChatClient",
+    "AsyncDeepSeekChatClient",
     "LLMClients",
+    "AsyncLLMClients",
     "ChatMessage",
+    "ChatStream",
+    "AsyncChatStream",
 ]
@@ -0,0 +1,285 @@
+"""LLM 调用结果缓存。
+
+- `LRUCache`：线程安全的内存 LRU，支持条目数/字节数上限、TTL 与命中统计；
+- `EmbeddingDiskCache`：基于 SQLite 的向量持久缓存，可限制条目数与有效期；
+- `CachedEmbeddingClient` / `AsyncCachedEmbeddingClient`：按 (model, 文本哈希) 寻址，
+  透明包装任意（同步/异步）embedding 客户端，只把未命中的文本发往上游。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .types.base import EmbeddingResponse
+from .types.clients import EmbeddingClientProtocol
+
+_MISSING = object()
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存。
+
+    - max_entries：条目数上限；
+    - ttl_sec：默认过期时间（None 表示不过期），`set` 时可按条目覆盖；
+    - max_bytes / sizeof：可选的近似内存上限，sizeof 用于估算单条大小。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_sec: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda _: 0)
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """是否存在未过期的条目（不计入命中统计，不改变 LRU 顺序）。"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or entry[1] > time.monotonic())
+
+    def _pop(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at, _ = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._pop(key)
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl_sec: Optional[float] = None) -> None:
+        ttl = self.ttl_sec if ttl_sec is None else ttl_sec
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class EmbeddingDiskCache:
+    """SQLite 持久化的向量缓存，向量以 float32 字节存储。
+
+    - max_entries：条目数上限（0 表示不限），超出约 10% 后按写入时间删除最旧的条目；
+    - ttl_sec：有效期（None 表示不过期），过期条目读取时视为未命中，并在清理时删除。
+    """
+
+    _PRUNE_SLACK = 1.1
+
+    def __init__(self, path: str | Path, max_entries: int = 0, ttl_sec: Optional[float] = None) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "created" not in columns:
+            # 旧库没有写入时间，按 0 处理，清理时最先被淘汰
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN created REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created ON embeddings (created)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # 自上次计数以来的近似条目数，超过上限一定比例才真正 COUNT 并清理
+        self._approx_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._prune()
+
+    def _min_created(self) -> float:
+        return time.time() - self.ttl_sec if self.ttl_sec is not None else float("-inf")
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        min_created = self._min_created()
+        # SQLite 默认最多 999 个绑定参数
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vec, created FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob, created in rows:
+                    if created >= min_created:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        now = time.time()
+        rows = [(key, np.asarray(vec, dtype=np.float32).tobytes(), now) for key, vec in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vec, created) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+            self._approx_count += len(rows)
+            if self.max_entries and self._approx_count > self.max_entries * self._PRUNE_SLACK:
+                self._prune_locked()
+
+    def _prune(self) -> None:
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self) -> None:
+        if self.ttl_sec is not None:
+            self._conn.execute("DELETE FROM embeddings WHERE created < ?", (self._min_created(),))
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if self.max_entries and count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY created LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            count = self.max_entries
+        self._conn.commit()
+        self._approx_count = count
+
+
+class CachedEmbeddingClient:
+    """内容寻址的 embedding 缓存：内存 LRU -> 磁盘 -> 上游。"""
+
+    def __init__(
+        self,
+        client: EmbeddingClientProtocol,
+        model: str,
+        cache_path: Optional[str] = None,
+        max_entries: int = 10000,
+        disk_max_entries: int = 0,
+        disk_ttl_sec: Optional[float] = None,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.memory = LRUCache(max_entries=max_entries)
+        self.disk = (
+            EmbeddingDiskCache(cache_path, max_entries=disk_max_entries, ttl_sec=disk_ttl_sec) if cache_path else None
+        )
+        self.disk_hits = 0
+        self.upstream_texts = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], List[str], Dict[str, int]]:
+        """查内存与磁盘，返回 (键列表, 已命中向量, 去重后的未命中键, 命中统计)。"""
+        keys = [self._key(t) for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        memory_hits = 0
+        for key in keys:
+            vec = self.memory.get(key)
+            if vec is not None:
+                vectors[key] = vec
+                memory_hits += 1
+
+        missing = list(dict.fromkeys(k for k in keys if k not in vectors))
+        disk_hits = 0
+        if missing and self.disk is not None:
+            found = self.disk.get_many(missing)
+            disk_hits = len(found)
+            self.disk_hits += disk_hits
+            for key, vec in found.items():
+                vectors[key] = vec
+                self.memory.set(key, vec)
+            missing = [k for k in missing if k not in found]
+        return keys, vectors, missing, {"memory_hits": memory_hits, "disk_hits": disk_hits, "misses": len(missing)}
+
+    @staticmethod
+    def _missing_texts(texts: List[str], keys: List[str], missing: List[str]) -> List[str]:
+        # 同一文本只请求一次，保持首次出现的顺序
+        first_text: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            first_text.setdefault(key, text)
+        return [first_text[k] for k in missing]
+
+    def _store(self, vectors: Dict[str, np.ndarray], missing: List[str], resp: EmbeddingResponse) -> None:
+        # 数量不符时 zip 会静默截断，之后按键取向量才报 KeyError，这里直接给出明确错误
+        if len(resp.embeddings) != len(missing):
+            raise ValueError(f"embedding 上游返回 {len(resp.embeddings)} 条向量，请求了 {len(missing)} 条文本")
+        fresh = [(k, np.asarray(e, dtype=np.float32)) for k, e in zip(missing, resp.embeddings)]
+        for key, vec in fresh:
+            vectors[key] = vec
+            self.memory.set(key, vec)
+        if self.disk is not None:
+            self.disk.put_many(fresh)
+        self.upstream_texts += len(missing)
+
+    @staticmethod
+    def _response(keys: List[str], vectors: Dict[str, np.ndarray], raw: Dict[str, Any], info: Dict[str, int]) -> EmbeddingResponse:
+        return EmbeddingResponse(embeddings=[vectors[k].tolist() for k in keys], raw={**raw, "cache": info})
+
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        keys, vectors, missing, info = self._lookup(texts)
+        raw: Dict[str, Any] = {}
+        if missing:
+            resp = self.client.embed(self._missing_texts(texts, keys, missing))
+            self._store(vectors, missing, resp)
+            raw = resp.raw
+        return self._response(keys, vectors, raw, info)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "upstream_texts": self.upstream_texts}
+
+
+class AsyncCachedEmbeddingClient(CachedEmbeddingClient):
+    """`CachedEmbeddingClient` 的异步版本，上游为异步 embedding 客户端；SQLite 读写放入线程。"""
+
+    async def embed(self, texts: List[str]) -> EmbeddingResponse:  # type: ignore[override]
+        keys, vectors, missing, info = await asyncio.to_thread(self._lookup, texts)
+        raw: Dict[str, Any] = {}
+        if missing:
+            resp = await self.client.embed(self._missing_texts(texts, keys, missing))  # type: ignore[misc]
+            await asyncio.to_thread(self._store, vectors, missing, resp)
+            raw = resp.raw
+        return self._response(keys, vectors, raw, info)
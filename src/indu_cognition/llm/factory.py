@@ -2,15 +2,66 @@
 
 from __future__ import annotations
 
-from .providers.dashscope import DashScopeEmbeddingClient, QwenRerankClient
-from .providers.deepseek import DeepSeekChatClient
-from .types.clients import LLMClients
+from .cache import AsyncCachedEmbeddingClient, CachedEmbeddingClient
+from .providers.dashscope import (
+    AsyncDashScopeEmbeddingClient,
+    AsyncQwenRerankClient,
+    DashScopeEmbeddingClient,
+    QwenRerankClient,
+)
+from .providers.deepseek import AsyncDeepSeekChatClient, DeepSeekChatClient
+from .providers.transport import AsyncHTTPTransport, HTTPTransport
+from .rerank.cache import AsyncCachedRerankClient, CachedRerankClient
+from .types.clients import AsyncLLMClients, LLMClients
 from ..config.models import AppConfig
 
 
 def build_llm_clients(config: AppConfig) -> LLMClients:
     """根据全局配置实例化 chat / embedding / rerank 客户端。"""
-    chat = DeepSeekChatClient(config.llm)
-    embedding = DashScopeEmbeddingClient(config.embedding)
-    rerank = QwenRerankClient(config.rerank)
+    # 三类客户端共享同一传输层，按 base_url 复用连接池
+    transport = HTTPTransport(config.http)
+    chat = DeepSeekChatClient(config.llm, transport=transport)
+    embedding = DashScopeEmbeddingClient(config.embedding, transport=transport)
+    if config.embedding.cache_enabled:
+        embedding = CachedEmbeddingClient(
+            embedding,
+            model=config.embedding.model,
+            cache_path=config.embedding.cache_path,
+            max_entries=config.embedding.cache_max_entries,
+            disk_max_entries=config.embedding.cache_disk_max_entries,
+            disk_ttl_sec=config.embedding.cache_disk_ttl_sec,
+        )
+    rerank = QwenRerankClient(config.rerank, transport=transport)
+    if config.rerank.cache_enabled:
+        rerank = CachedRerankClient(
+            rerank,
+            model=config.rerank.model,
+            max_entries=config.rerank.cache_max_entries,
+            ttl_sec=config.rerank.cache_ttl_sec,
+        )
     return LLMClients(chat=chat, embedding=embedding, rerank=rerank)
+
+
+def build_async_llm_clients(config: AppConfig) -> AsyncLLMClients:
+    """异步版本的客户端集合，供 `Orchestrator.arun` 使用。"""
+    transport = AsyncHTTPTransport(config.http)
+    chat = AsyncDeepSeekChatClient(config.llm, transport=transport)
+    embedding = AsyncDashScopeEmbeddingClient(config.embedding, transport=transport)
+    if config.embedding.cache_enabled:
+        embedding = AsyncCachedEmbeddingClient(
+            embedding,
+            model=config.embedding.model,
+            cache_path=config.embedding.cache_path,
+            max_entries=config.embedding.cache_max_entries,
+            disk_max_entries=config.embedding.cache_disk_max_entries,
+            disk_ttl_sec=config.embedding.cache_disk_ttl_sec,
+        )
+    rerank = AsyncQwenRerankClient(config.rerank, transport=transport)
+    if config.rerank.cache_enabled:
+        rerank = AsyncCachedRerankClient(
+            rerank,
+            model=config.rerank.model,
+            max_entries=config.rerank.cache_max_entries,
+            ttl_sec=config.rerank.cache_ttl_sec,
+        )
+    return AsyncLLMClients(chat=chat, embedding=embedding, rerank=rerank, transport=transport)
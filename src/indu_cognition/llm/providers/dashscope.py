@@ -6,15 +6,26 @@ from typing import List, Optional
 
 from ...config.models import EmbeddingConfig, RerankConfig
 from ..types.base import EmbeddingResponse, RerankResponse
-from .openai_compatible import OpenAIEmbeddingClient, OpenAIRerankClient
+from .openai_compatible import (
+    AsyncOpenAIEmbeddingClient,
+    AsyncOpenAIRerankClient,
+    OpenAIEmbeddingClient,
+    OpenAIRerankClient,
+)
+from .transport import AsyncHTTPTransport, HTTPTransport
 
 
 class DashScopeEmbeddingClient:
     """使用 text-embedding-v3 的封装。"""
 
-    def __init__(self, config: EmbeddingConfig, timeout: int = 60) -> None:
+    def __init__(self, config: EmbeddingConfig, transport: Optional[HTTPTransport] = None) -> None:
         self.client = OpenAIEmbeddingClient(
-            base_url=config.base_url, model=config.model, api_key=config.api_key, timeout=timeout
+            base_url=config.base_url,
+            model=config.model,
+            api_key=config.api_key,
+            batch_size=config.batch_size,
+            max_workers=config.max_concurrency,
+            transport=transport,
         )
 
     def embed(self, texts: List[str]) -> EmbeddingResponse:
@@ -24,14 +35,49 @@ class DashScopeEmbeddingClient:
 class QwenRerankClient:
     """Qwen rerank 封装。"""
 
-    def __init__(self, config: RerankConfig, timeout: int = 60) -> None:
+    def __init__(self, config: RerankConfig, transport: Optional[HTTPTransport] = None) -> None:
         self.client = OpenAIRerankClient(
             base_url=config.base_url,
             model=config.model,
             api_key=config.api_key,
             default_top_n=config.top_n,
-            timeout=timeout,
+            transport=transport,
+            return_documents=config.return_documents,
         )
 
     def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:
         return self.client.rerank(query=query, documents=documents, top_n=top_n)
+
+
+class AsyncDashScopeEmbeddingClient:
+    """text-embedding-v3 异步封装。"""
+
+    def __init__(self, config: EmbeddingConfig, transport: Optional[AsyncHTTPTransport] = None) -> None:
+        self.client = AsyncOpenAIEmbeddingClient(
+            base_url=config.base_url,
+            model=config.model,
+            api_key=config.api_key,
+            batch_size=config.batch_size,
+            max_workers=config.max_concurrency,
+            transport=transport,
+        )
+
+    async def embed(self, texts: List[str]) -> EmbeddingResponse:
+        return await self.client.embed(texts)
+
+
+class AsyncQwenRerankClient:
+    """Qwen rerank 异步封装。"""
+
+    def __init__(self, config: RerankConfig, transport: Optional[AsyncHTTPTransport] = None) -> None:
+        self.client = AsyncOpenAIRerankClient(
+            base_url=config.base_url,
+            model=config.model,
+            api_key=config.api_key,
+            default_top_n=config.top_n,
+            transport=transport,
+            return_documents=config.return_documents,
+        )
+
+    async def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:
+        return await self.client.rerank(query=query, documents=documents, top_n=top_n)
@@ -2,30 +2,58 @@
 
 from __future__ import annotations
 
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 from ...config.models import LLMConfig
+from ..streaming import AsyncChatStream, ChatStream
 from ..types.base import ChatMessage, LLMResponse
-from .openai_compatible import OpenAIChatClient
+from .openai_compatible import AsyncOpenAIChatClient, OpenAIChatClient
+from .transport import AsyncHTTPTransport, HTTPTransport
+
+
+def _default_params(config: LLMConfig) -> Dict[str, Any]:
+    return {
+        "temperature": config.temperature,
+        "top_p": config.top_p,
+        "top_k": config.top_k,
+        "max_tokens": config.max_tokens,
+        "frequency_penalty": config.frequency_penalty,
+    }
 
 
 class DeepSeekChatClient:
     """针对 deepseek-chat 的轻量包装。"""
 
-    def __init__(self, config: LLMConfig) -> None:
-        default_params = {
-            "temperature": config.temperature,
-            "top_p": config.top_p,
-            "top_k": config.top_k,
-            "max_tokens": config.max_tokens,
-            "frequency_penalty": config.frequency_penalty,
-        }
+    def __init__(self, config: LLMConfig, transport: Optional[HTTPTransport] = None) -> None:
         self.client = OpenAIChatClient(
             base_url=config.base_url,
             model=config.model,
             api_key=config.api_key,
-            default_params=default_params,
+            default_params=_default_params(config),
+            transport=transport,
         )
 
     def generate(self, messages: List[ChatMessage], **kwargs: Any) -> LLMResponse:
         return self.client.generate(messages, **kwargs)
+
+    def stream(self, messages: List[ChatMessage], **kwargs: Any) -> ChatStream:
+        return self.client.stream(messages, **kwargs)
+
+
+class AsyncDeepSeekChatClient:
+    """deepseek-chat 异步包装。"""
+
+    def __init__(self, config: LLMConfig, transport: Optional[AsyncHTTPTransport] = None) -> None:
+        self.client = AsyncOpenAIChatClient(
+            base_url=config.base_url,
+            model=config.model,
+            api_key=config.api_key,
+            default_params=_default_params(config),
+            transport=transport,
+        )
+
+    async def generate(self, messages: List[ChatMessage], **kwargs: Any) -> LLMResponse:
+        return await self.client.generate(messages, **kwargs)
+
+    async def stream(self, messages: List[ChatMessage], **kwargs: Any) -> AsyncChatStream:
+        return await self.client.stream(messages, **kwargs)
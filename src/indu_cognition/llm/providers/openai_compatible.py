@@ -1,16 +1,19 @@
 """兼容 OpenAI API 的轻量客户端。
 
 用于 DeepSeek Chat、DashScope embedding/rerank 等 openai-compatible 场景。
+`Async*` 为基于 httpx 的异步版本，方法名与同步版一致但返回协程。
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
-
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
+from ..streaming import AsyncChatStream, ChatStream
 from ..types.base import ChatMessage, EmbeddingResponse, LLMResponse, RerankItem, RerankResponse
+from .transport import AsyncHTTPTransport, HTTPTransport, default_transport
 
 logger = logging.getLogger(__name__)
 
@@ -22,57 +25,98 @@ class OpenAIChatClient:
         model: str,
         api_key: Optional[str],
         default_params: Optional[Dict[str, Any]] = None,
-        timeout: int = 60,
+        transport: Optional[HTTPTransport] = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.api_key = api_key
-        self.timeout = timeout
         self.default_params = default_params or {}
+        self.transport = transport or default_transport()
 
-    def generate(self, messages: List[ChatMessage], **kwargs: Any) -> LLMResponse:
+    def _payload(self, messages: List[ChatMessage], **kwargs: Any) -> Dict[str, Any]:
         if not self.api_key:
             raise ValueError("API key 未配置，无法调用 chat 接口")
-        payload = {
+        return {
             "model": self.model,
             "messages": [m.__dict__ for m in messages],
             **self.default_params,
             **kwargs,
         }
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers={"Authorization": f"Bearer {self.api_key}"},
-            json=payload,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
+
+    def _stream_payload(self, messages: List[ChatMessage], **kwargs: Any) -> Dict[str, Any]:
+        return self._payload(messages, stream=True, stream_options={"include_usage": True}, **kwargs)
+
+    @staticmethod
+    def _parse(data: Dict[str, Any]) -> LLMResponse:
         content = data["choices"][0]["message"]["content"]
         usage = data.get("usage")
         return LLMResponse(content=content, raw=data, usage=usage)
 
+    def generate(self, messages: List[ChatMessage], **kwargs: Any) -> LLMResponse:
+        payload = self._payload(messages, **kwargs)
+        return self._parse(self.transport.post(f"{self.base_url}/chat/completions", self.api_key, payload).json())
+
+    def stream(self, messages: List[ChatMessage], **kwargs: Any) -> ChatStream:
+        """流式生成：请求在调用时发出（连接与状态码错误在此抛出），迭代返回值得到增量文本。"""
+        payload = self._stream_payload(messages, **kwargs)
+        return ChatStream(self.transport.post(f"{self.base_url}/chat/completions", self.api_key, payload, stream=True))
+
 
 class OpenAIEmbeddingClient:
-    def __init__(self, base_url: str, model: str, api_key: Optional[str], timeout: int = 60) -> None:
+    """Embedding 客户端：按 batch_size 切批，有界并发发送，保持输入顺序；重试由 transport 负责。"""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str],
+        batch_size: int = 10,
+        max_workers: int = 4,
+        transport: Optional[HTTPTransport] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.api_key = api_key
-        self.timeout = timeout
+        self.transport = transport or default_transport()
+        self.batch_size = max(batch_size, 1)
+        self.max_workers = max(max_workers, 1)
+        self._pool: Optional[ThreadPoolExecutor] = None
 
-    def embed(self, texts: List[str]) -> EmbeddingResponse:
+    @staticmethod
+    def _parse_batch(data: Dict[str, Any]) -> Tuple[List[List[float]], Dict[str, Any]]:
+        items = sorted(data.get("data", []), key=lambda item: item.get("index", 0))
+        return [item["embedding"] for item in items], data
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
         if not self.api_key:
             raise ValueError("API key 未配置，无法调用 embedding 接口")
+        return [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)] or [texts]
+
+    def _merge(self, results: List[Tuple[List[List[float]], Dict[str, Any]]]) -> EmbeddingResponse:
+        if len(results) == 1:
+            embeddings, data = results[0]
+            return EmbeddingResponse(embeddings=embeddings, raw=data)
+        embeddings: List[List[float]] = []
+        usage: Dict[str, int] = {}
+        for batch_embeddings, data in results:
+            embeddings.extend(batch_embeddings)
+            for key, value in (data.get("usage") or {}).items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+        return EmbeddingResponse(embeddings=embeddings, raw={"model": self.model, "usage": usage, "batches": len(results)})
+
+    def _embed_batch(self, texts: List[str]) -> Tuple[List[List[float]], Dict[str, Any]]:
         payload = {"model": self.model, "input": texts}
-        response = requests.post(
-            f"{self.base_url}/embeddings",
-            headers={"Authorization": f"Bearer {self.api_key}"},
-            json=payload,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
-        embeddings = [item["embedding"] for item in data.get("data", [])]
-        return EmbeddingResponse(embeddings=embeddings, raw=data)
+        return self._parse_batch(self.transport.post(f"{self.base_url}/embeddings", self.api_key, payload).json())
+
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        batches = self._batches(texts)
+        if len(batches) == 1:
+            return self._merge([self._embed_batch(batches[0])])
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed")
+        return self._merge(list(self._pool.map(self._embed_batch, batches)))
 
 
 class OpenAIRerankClient:
@@ -82,38 +126,115 @@ class OpenAIRerankClient:
         model: str,
         api_key: Optional[str],
         default_top_n: int = 50,
-        timeout: int = 60,
+        transport: Optional[HTTPTransport] = None,
+        return_documents: bool = False,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.api_key = api_key
         self.default_top_n = default_top_n
-        self.timeout = timeout
+        self.transport = transport or default_transport()
+        # 分数按 index 映射回候选，无需服务端回传文档正文
+        self.return_documents = return_documents
 
-    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:
+    def _payload(self, query: str, documents: List[str], top_n: Optional[int]) -> Dict[str, Any]:
         if not self.api_key:
             raise ValueError("API key 未配置，无法调用 rerank 接口")
-        payload = {
+        return {
             "model": self.model,
             "query": query,
             "documents": documents,
             "top_n": top_n or self.default_top_n,
+            "return_documents": self.return_documents,
         }
-        response = requests.post(
-            f"{self.base_url}/rerank",
-            headers={"Authorization": f"Bearer {self.api_key}"},
-            json=payload,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
+
+    @staticmethod
+    def _parse(data: Dict[str, Any], documents: List[str]) -> RerankResponse:
         results: List[RerankItem] = []
         for idx, item in enumerate(data.get("results", [])):
+            index = item.get("index", idx)
             results.append(
                 RerankItem(
-                    index=item.get("index", idx),
+                    index=index,
                     score=item.get("relevance_score", 0.0),
-                    text=item.get("document", ""),
+                    text=documents[index] if 0 <= index < len(documents) else "",
                 )
             )
         return RerankResponse(results=results, raw=data)
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:
+        payload = self._payload(query, documents, top_n)
+        return self._parse(self.transport.post(f"{self.base_url}/rerank", self.api_key, payload).json(), documents)
+
+
+class AsyncOpenAIChatClient(OpenAIChatClient):
+    """`OpenAIChatClient` 的异步版本，`generate` 为协程。"""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str],
+        default_params: Optional[Dict[str, Any]] = None,
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> None:
+        super().__init__(base_url, model, api_key, default_params)
+        self.transport = transport or AsyncHTTPTransport()  # type: ignore[assignment]
+
+    async def generate(self, messages: List[ChatMessage], **kwargs: Any) -> LLMResponse:  # type: ignore[override]
+        payload = self._payload(messages, **kwargs)
+        response = await self.transport.post(f"{self.base_url}/chat/completions", self.api_key, payload)  # type: ignore[misc]
+        return self._parse(response.json())
+
+    async def stream(self, messages: List[ChatMessage], **kwargs: Any) -> AsyncChatStream:  # type: ignore[override]
+        payload = self._stream_payload(messages, **kwargs)
+        response = await self.transport.post(f"{self.base_url}/chat/completions", self.api_key, payload, stream=True)  # type: ignore[misc]
+        return AsyncChatStream(response)
+
+
+class AsyncOpenAIEmbeddingClient(OpenAIEmbeddingClient):
+    """`OpenAIEmbeddingClient` 的异步版本：批次以信号量限流并发。"""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str],
+        batch_size: int = 10,
+        max_workers: int = 4,
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> None:
+        super().__init__(base_url, model, api_key, batch_size, max_workers)
+        self.transport = transport or AsyncHTTPTransport()  # type: ignore[assignment]
+
+    async def _aembed_batch(self, texts: List[str], semaphore: asyncio.Semaphore) -> Tuple[List[List[float]], Dict[str, Any]]:
+        payload = {"model": self.model, "input": texts}
+        async with semaphore:
+            response = await self.transport.post(f"{self.base_url}/embeddings", self.api_key, payload)  # type: ignore[misc]
+        return self._parse_batch(response.json())
+
+    async def embed(self, texts: List[str]) -> EmbeddingResponse:  # type: ignore[override]
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results = await asyncio.gather(*(self._aembed_batch(b, semaphore) for b in self._batches(texts)))
+        return self._merge(list(results))
+
+
+class AsyncOpenAIRerankClient(OpenAIRerankClient):
+    """`OpenAIRerankClient` 的异步版本。"""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str],
+        default_top_n: int = 50,
+        transport: Optional[AsyncHTTPTransport] = None,
+        return_documents: bool = False,
+    ) -> None:
+        super().__init__(base_url, model, api_key, default_top_n, return_documents=return_documents)
+        self.transport = transport or AsyncHTTPTransport()  # type: ignore[assignment]
+
+    async def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:  # type: ignore[override]
+        payload = self._payload(query, documents, top_n)
+        response = await self.transport.post(f"{self.base_url}/rerank", self.api_key, payload)  # type: ignore[misc]
+        return self._parse(response.json(), documents)
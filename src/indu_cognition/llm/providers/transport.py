@@ -0,0 +1,190 @@
+"""共享 HTTP 传输层：按 base_url 复用 keep-alive 连接池，带指数退避重试。
+
+所有 openai-compatible 客户端通过同一个 `HTTPTransport` 发请求，避免每次调用
+都重新进行 TCP/TLS 握手；429/5xx 与连接错误按带抖动的指数退避重试，并遵循
+服务端返回的 `Retry-After`。`AsyncHTTPTransport` 是基于 httpx 的异步版本。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from ...config.models import HTTPConfig
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期）。"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(cfg: HTTPConfig, attempt: int, retry_after: Optional[float]) -> float:
+    if retry_after is not None:
+        return min(retry_after, cfg.backoff_max_sec)
+    # full jitter
+    return random.uniform(0, min(cfg.backoff_max_sec, cfg.backoff_base_sec * 2**attempt))
+
+
+class HTTPTransport:
+    def __init__(self, cfg: Optional[HTTPConfig] = None) -> None:
+        self.cfg = cfg or HTTPConfig()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return (self.cfg.connect_timeout_sec, self.cfg.read_timeout_sec)
+
+    def session_for(self, url: str) -> requests.Session:
+        """同一 scheme://host 共享一个带连接池的 Session。"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(origin)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(origin)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.cfg.pool_maxsize, max_retries=0)
+                    session.mount(f"{parts.scheme}://", adapter)
+                    self._sessions[origin] = session
+        return session
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        return _backoff_delay(self.cfg, attempt, retry_after)
+
+    def post(self, url: str, api_key: Optional[str], json: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """POST JSON，可重试错误按退避重试，最终失败时抛出 requests 异常。"""
+        session = self.session_for(url)
+        headers = {"Authorization": f"Bearer {api_key}"}
+        for attempt in range(self.cfg.max_retries + 1):
+            last_try = attempt == self.cfg.max_retries
+            try:
+                response = session.post(url, headers=headers, json=json, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_try:
+                    raise
+                delay = self._backoff(attempt, None)
+                logger.warning("请求 %s 失败（%s），%.2fs 后重试 (%d/%d)", url, e, delay, attempt + 1, self.cfg.max_retries)
+                time.sleep(delay)
+                continue
+            if response.status_code in RETRY_STATUS and not last_try:
+                delay = self._backoff(attempt, _parse_retry_after(response.headers.get("Retry-After")))
+                logger.warning(
+                    "请求 %s 返回 %d，%.2fs 后重试 (%d/%d)", url, response.status_code, delay, attempt + 1, self.cfg.max_retries
+                )
+                response.close()
+                time.sleep(delay)
+                continue
+            if stream and not response.ok:
+                response.close()
+            response.raise_for_status()
+            return response
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+
+class AsyncHTTPTransport:
+    """httpx 异步传输层，重试策略与 `HTTPTransport` 一致。
+
+    httpx.AsyncClient 绑定创建时的事件循环，因此按 (事件循环, scheme://host) 复用。
+    以循环对象（而非 id）为键，已关闭循环的客户端在下次取用时丢弃，不会被复用到新循环上；
+    长期持有本实例时应在退出前 `await aclose()`。
+    """
+
+    def __init__(self, cfg: Optional[HTTPConfig] = None) -> None:
+        self.cfg = cfg or HTTPConfig()
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        for dead in [l for l in self._clients if l.is_closed()]:
+            # 所属循环已关闭，无法再 aclose，直接丢弃由 GC 回收连接
+            del self._clients[dead]
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(origin)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.cfg.async_max_connections,
+                max_keepalive_connections=self.cfg.pool_maxsize,
+            )
+            timeout = httpx.Timeout(self.cfg.read_timeout_sec, connect=self.cfg.connect_timeout_sec)
+            client = clients[origin] = httpx.AsyncClient(limits=limits, timeout=timeout)
+        return client
+
+    async def post(self, url: str, api_key: Optional[str], json: Dict[str, Any], stream: bool = False) -> httpx.Response:
+        """POST JSON，可重试错误按退避重试，最终失败时抛出 httpx 异常。
+
+        stream=True 时只读取响应头，调用方负责读取响应体并 `aclose`。
+        """
+        client = self.client_for(url)
+        headers = {"Authorization": f"Bearer {api_key}"}
+        for attempt in range(self.cfg.max_retries + 1):
+            last_try = attempt == self.cfg.max_retries
+            try:
+                request = client.build_request("POST", url, headers=headers, json=json)
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if last_try:
+                    raise
+                delay = _backoff_delay(self.cfg, attempt, None)
+                logger.warning("请求 %s 失败（%s），%.2fs 后重试 (%d/%d)", url, e, delay, attempt + 1, self.cfg.max_retries)
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code in RETRY_STATUS and not last_try:
+                delay = _backoff_delay(self.cfg, attempt, _parse_retry_after(response.headers.get("Retry-After")))
+                logger.warning(
+                    "请求 %s 返回 %d，%.2fs 后重试 (%d/%d)", url, response.status_code, delay, attempt + 1, self.cfg.max_retries
+                )
+                await response.aclose()
+                await asyncio.sleep(delay)
+                continue
+            if response.is_error:
+                await response.aclose()
+            response.raise_for_status()
+            return response
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的客户端；绑定其他循环的客户端无法在此 await，一并丢弃。"""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        self._clients.clear()
+        for client in clients.values():
+            await client.aclose()
+
+
+_default_transport: Optional[HTTPTransport] = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> HTTPTransport:
+    """未显式注入传输层的客户端共享的进程级默认实例。"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
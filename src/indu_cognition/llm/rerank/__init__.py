@@ -0,0 +1,5 @@
+"""Rerank 相关工具。"""
+
+from .cache import AsyncCachedRerankClient, CachedRerankClient
+
+__all__ = ["CachedRerankClient", "AsyncCachedRerankClient"]
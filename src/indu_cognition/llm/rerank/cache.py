@@ -0,0 +1,71 @@
+"""Rerank 结果缓存。
+
+键为 (model, query, 候选文档哈希序列, top_n)，值只存 (index, score) 列表，命中时按
+index 从当前传入的 documents 回填文本，因此不依赖服务端回传文档内容。
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..cache import LRUCache
+from ..types.base import RerankItem, RerankResponse
+from ..types.clients import RerankClientProtocol
+
+CacheKey = Tuple[str, str, Tuple[str, ...], Optional[int]]
+
+
+def _doc_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CachedRerankClient:
+    """带 TTL + LRU 的 rerank 缓存包装，接口与被包装客户端一致。"""
+
+    def __init__(
+        self,
+        client: RerankClientProtocol,
+        model: str,
+        max_entries: int = 2048,
+        ttl_sec: Optional[float] = 3600.0,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.cache = LRUCache(max_entries=max_entries, ttl_sec=ttl_sec)
+
+    def _key(self, query: str, documents: List[str], top_n: Optional[int]) -> CacheKey:
+        return (self.model, query, tuple(_doc_hash(d) for d in documents), top_n)
+
+    @staticmethod
+    def _response(scores: List[Tuple[int, float]], documents: List[str], raw: Dict[str, Any]) -> RerankResponse:
+        results = [RerankItem(index=i, score=s, text=documents[i] if 0 <= i < len(documents) else "") for i, s in scores]
+        return RerankResponse(results=results, raw=raw)
+
+    def _store(self, key: CacheKey, resp: RerankResponse) -> None:
+        self.cache.set(key, [(item.index, item.score) for item in resp.results])
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:
+        key = self._key(query, documents, top_n)
+        scores = self.cache.get(key)
+        if scores is not None:
+            return self._response(scores, documents, {"cache": "hit"})
+        resp = self.client.rerank(query=query, documents=documents, top_n=top_n)
+        self._store(key, resp)
+        return resp
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+class AsyncCachedRerankClient(CachedRerankClient):
+    """`CachedRerankClient` 的异步版本。"""
+
+    async def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> RerankResponse:  # type: ignore[override]
+        key = self._key(query, documents, top_n)
+        scores = self.cache.get(key)
+        if scores is not None:
+            return self._response(scores, documents, {"cache": "hit"})
+        resp = await self.client.rerank(query=query, documents=documents, top_n=top_n)  # type: ignore[misc]
+        self._store(key, resp)
+        return resp
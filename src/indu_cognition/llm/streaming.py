@@ -0,0 +1,148 @@
+"""Chat 流式输出：SSE 解析与增量拼装。
+
+openai-compatible 的 `stream=true` 接口以 server-sent events 返回 `chat.completion.chunk`，
+以 `data: [DONE]` 结束；请求时附带 `stream_options.include_usage`，usage 在最后一个 chunk 中。
+`ChatStream` / `AsyncChatStream` 迭代产出增量文本，迭代结束后 `response` 为拼装好的
+`LLMResponse`，其 `raw` 与非流式接口的返回结构一致。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+import requests
+
+from .types.base import LLMResponse
+
+DONE = "[DONE]"
+
+
+class SSEParser:
+    """逐行解析 SSE：空行分隔事件，多行 data 以换行拼接，忽略注释行与其他字段。"""
+
+    def __init__(self) -> None:
+        self._data: List[str] = []
+        self.done = False
+
+    def feed(self, line: str) -> Optional[str]:
+        """输入一行（不含换行符），事件结束时返回其 data。"""
+        if line:
+            if not line.startswith(":"):
+                name, _, value = line.partition(":")
+                if name == "data":
+                    self._data.append(value[1:] if value.startswith(" ") else value)
+            return None
+        return self.flush()
+
+    def flush(self) -> Optional[str]:
+        if not self._data:
+            return None
+        data, self._data = "\n".join(self._data), []
+        if data == DONE:
+            self.done = True
+            return None
+        return data
+
+
+class ChatChunkAccumulator:
+    """累积 chunk 中第 0 个 choice 的增量文本、finish_reason 与 usage。"""
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.meta: Dict[str, Any] = {}
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+
+    def feed(self, data: str) -> str:
+        """解析一个 chunk，返回其中的增量文本（可能为空）。"""
+        chunk = json.loads(data)
+        if "error" in chunk:
+            raise RuntimeError(f"流式响应返回错误: {chunk['error']}")
+        for key in ("id", "model", "created"):
+            if key in chunk:
+                self.meta.setdefault(key, chunk[key])
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        text = ""
+        for choice in chunk.get("choices") or []:
+            if choice.get("index", 0) != 0:
+                continue
+            text = (choice.get("delta") or {}).get("content") or ""
+            self.finish_reason = choice.get("finish_reason") or self.finish_reason
+        if text:
+            self.parts.append(text)
+        return text
+
+    def response(self) -> LLMResponse:
+        content = "".join(self.parts)
+        raw = {
+            **self.meta,
+            "object": "chat.completion",
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": self.finish_reason}
+            ],
+            "usage": self.usage,
+        }
+        return LLMResponse(content=content, raw=raw, usage=self.usage)
+
+
+class ChatStream:
+    """同步流式回答；只能迭代一次，中途放弃时调用 `close` 释放连接。"""
+
+    def __init__(self, http_response: requests.Response) -> None:
+        self._http = http_response
+        self.response: Optional[LLMResponse] = None
+
+    def __iter__(self) -> Iterator[str]:
+        parser, acc = SSEParser(), ChatChunkAccumulator()
+        try:
+            # chunk_size=None：分块传输时每收到一块就解析，不等缓冲区填满
+            for raw_line in self._http.iter_lines(chunk_size=None):
+                data = parser.feed(raw_line.decode("utf-8"))
+                if data is not None and (text := acc.feed(data)):
+                    yield text
+                if parser.done:
+                    break
+            else:
+                data = parser.flush()
+                if data is not None and (text := acc.feed(data)):
+                    yield text
+        finally:
+            self.close()
+        self.response = acc.response()
+
+    def close(self) -> None:
+        self._http.close()
+
+
+class AsyncChatStream:
+    """`ChatStream` 的异步版本，使用 `async for` 迭代，中途放弃时调用 `aclose`。"""
+
+    def __init__(self, http_response: httpx.Response) -> None:
+        self._http = http_response
+        self.response: Optional[LLMResponse] = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        parser, acc = SSEParser(), ChatChunkAccumulator()
+        try:
+            async for line in self._http.aiter_lines():
+                data = parser.feed(line)
+                if data is not None and (text := acc.feed(data)):
+                    yield text
+                if parser.done:
+                    break
+            else:
+                data = parser.flush()
+                if data is not None and (text := acc.feed(data)):
+                    yield text
+        finally:
+            await self.aclose()
+        self.response = acc.response()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
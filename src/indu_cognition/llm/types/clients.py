@@ -3,15 +3,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
 
 from .base import EmbeddingResponse, LLMResponse, RerankResponse
 
+if TYPE_CHECKING:
+    from ..providers.transport import AsyncHTTPTransport
+    from ..streaming import AsyncChatStream, ChatStream
+
 
 @dataclass
 class ChatClientProtocol:
     def generate(self, messages: list, **kwargs) -> LLMResponse:  # pragma: no cover - 协议占位
         ...
 
+    def stream(self, messages: list, **kwargs) -> "ChatStream":  # pragma: no cover - 协议占位
+        ...
+
 
 @dataclass
 class EmbeddingClientProtocol:
@@ -30,3 +38,36 @@ class LLMClients:
     chat: ChatClientProtocol
     embedding: EmbeddingClientProtocol
     rerank: RerankClientProtocol
+
+
+@dataclass
+class AsyncChatClientProtocol:
+    async def generate(self, messages: list, **kwargs) -> LLMResponse:  # pragma: no cover - 协议占位
+        ...
+
+    async def stream(self, messages: list, **kwargs) -> "AsyncChatStream":  # pragma: no cover - 协议占位
+        ...
+
+
+@dataclass
+class AsyncEmbeddingClientProtocol:
+    async def embed(self, texts: list[str]) -> EmbeddingResponse:  # pragma: no cover - 协议占位
+        ...
+
+
+@dataclass
+class AsyncRerankClientProtocol:
+    async def rerank(self, query: str, documents: list[str], top_n: int | None = None) -> RerankResponse:  # pragma: no cover - 协议占位
+        ...
+
+
+@dataclass
+class AsyncLLMClients:
+    chat: AsyncChatClientProtocol
+    embedding: AsyncEmbeddingClientProtocol
+    rerank: AsyncRerankClientProtocol
+    transport: Optional["AsyncHTTPTransport"] = None  # 共享的传输层，由 `aclose` 释放连接池
+
+    async def aclose(self) -> None:
+        if self.transport is not None:
+            await self.transport.aclose()
@@ -1,22 +1,35 @@
 """检索子包入口。"""
 
 from .bm25_store import BM25Store
-from .chunking import Chunk, make_hierarchical_chunks, split_children
+from .chunking import Chunk, iter_children, iter_hierarchical_chunks, make_hierarchical_chunks, split_children
 from .feedback import FeedbackUpdater
-from .hybrid import hybrid_search
-from .q2q import synthesize_queries
+from .hybrid import ahybrid_search, hybrid_search, hybrid_search_batch
+from .indexer import DocumentIndexer, IndexManifest, IndexStats
+from .q2q import Q2QSynthesizer, synthesize_queries
 from .types import RetrievalCandidate, RetrievalResult
-from .vector_store import ChromaStore
+from .numpy_vector_store import NumpyVectorStore
+from .vector_store import ChromaStore, VectorStore, build_vector_store
 
 __all__ = [
     "Chunk",
     "make_hierarchical_chunks",
     "split_children",
+    "iter_children",
+    "iter_hierarchical_chunks",
     "synthesize_queries",
+    "Q2QSynthesizer",
     "ChromaStore",
+    "NumpyVectorStore",
+    "VectorStore",
+    "build_vector_store",
     "BM25Store",
     "FeedbackUpdater",
+    "DocumentIndexer",
+    "IndexManifest",
+    "IndexStats",
     "hybrid_search",
+    "ahybrid_search",
+    "hybrid_search_batch",
     "RetrievalCandidate",
     "RetrievalResult",
 ]
@@ -0,0 +1,271 @@
+"""BM25 索引的磁盘格式（可 mmap）。
+
+目录布局（均为 `.npy`，按 `mmap_mode="r"` 加载，多进程共享同一份页缓存）：
+
+- `meta.json`：格式版本、文档数、词表大小、总长度与分词配置；
+- `vocab.bin` / `vocab_offsets.npy`：按 UTF-8 字节序排序的词表，词项 id 即排序位置；
+- `post_offsets.npy` / `post_docs.npy` / `post_tfs.npy`：CSR 倒排表；
+- `doc_offsets.npy` / `doc_terms.npy` / `doc_tfs.npy`：CSR 正排表；
+- `doc_lens.npy`：文档长度；
+- `{texts,ids,metas}.bin` 与对应 `_offsets.npy`：原文、id 与 JSON 元数据字符串表。
+
+以上为主段（整体合并时重写）。检查点只追加增量段 `delta-NNNNNN/`，由 `deltas.json`
+按顺序列出；增量段沿用全局文档下标与词项 id，布局与主段相同，另有：
+
+- `post_terms.npy`：本段出现的词项 id（升序），倒排表按其 CSR 存储；
+- `vocab.bin`：本段新增词项（按 id 顺序，不排序）；
+- `deleted.npy`：本段期间产生的墓碑（全局文档下标）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_ARRAYS = ("post_offsets", "post_docs", "post_tfs", "doc_offsets", "doc_terms", "doc_tfs", "doc_lens")
+_DELTA_ARRAYS = ("post_terms",) + _ARRAYS + ("deleted",)
+_TABLES = ("vocab", "texts", "ids", "metas")
+DELTA_LOG = "deltas.json"
+
+
+class StringTable:
+    """只读 UTF-8 字符串表（一个或多个 blob + offsets 分段，可 mmap）加内存中的追加部分。"""
+
+    def __init__(self, blob: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None) -> None:
+        self._parts: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._starts: List[int] = []
+        self.base_len = 0
+        self._add_part(blob, offsets if offsets is not None else np.zeros(1, dtype=np.int64))
+        self._tail: List[Any] = []
+
+    def _add_part(self, blob: Optional[np.ndarray], offsets: np.ndarray) -> None:
+        self._starts.append(self.base_len)
+        self._parts.append((blob if blob is not None else np.empty(0, dtype=np.uint8), offsets))
+        self.base_len += len(offsets) - 1
+
+    @classmethod
+    def chain(cls, tables: List["StringTable"]) -> "StringTable":
+        """把多个表的只读部分按顺序拼接为一个表（不复制数据）。"""
+        chained = cls()
+        chained._parts, chained._starts, chained.base_len = [], [], 0
+        for table in tables:
+            for blob, offsets in table._parts:
+                chained._add_part(blob, offsets)
+        return chained
+
+    def __len__(self) -> int:
+        return self.base_len + len(self._tail)
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += len(self)
+        if idx < self.base_len:
+            return self._decode(self.raw(idx).decode("utf-8"))
+        return self._tail[idx - self.base_len]
+
+    def __iter__(self) -> Iterator[Any]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def raw(self, idx: int) -> bytes:
+        """只读部分第 idx 项的原始字节。"""
+        part = bisect_right(self._starts, idx) - 1 if len(self._parts) > 1 else 0
+        blob, offsets = self._parts[part]
+        idx -= self._starts[part]
+        return blob[offsets[idx] : offsets[idx + 1]].tobytes()
+
+    def append(self, value: Any) -> None:
+        self._tail.append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        self._tail.extend(values)
+
+    def _decode(self, value: str) -> Any:
+        return value
+
+    def _encode(self, value: Any) -> str:
+        return value
+
+    def encoded_tail(self) -> List[bytes]:
+        """内存追加部分的字节形式。"""
+        return [self._encode(v).encode("utf-8") for v in self._tail]
+
+    def encoded(self) -> List[bytes]:
+        return [self.raw(i) for i in range(self.base_len)] + self.encoded_tail()
+
+
+class JSONTable(StringTable):
+    """元数据表：只读部分按 JSON 存储，追加部分直接保存对象。"""
+
+    def _decode(self, value: str) -> Any:
+        return json.loads(value)
+
+    def _encode(self, value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+
+@dataclass
+class BM25Segment:
+    """只读索引段，数组可能是 mmap 视图。"""
+
+    post_offsets: np.ndarray
+    post_docs: np.ndarray
+    post_tfs: np.ndarray
+    doc_offsets: np.ndarray
+    doc_terms: np.ndarray
+    doc_tfs: np.ndarray
+    doc_lens: np.ndarray
+    total_len: int = 0
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_lens)
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.post_offsets) - 1
+
+    @classmethod
+    def empty(cls) -> "BM25Segment":
+        zero = np.zeros(1, dtype=np.int64)
+        none = np.empty(0, dtype=np.int32)
+        return cls(zero, none, none, zero, none, none, none, 0)
+
+
+@dataclass
+class BM25Delta:
+    """只读增量段：文档下标从 first_doc 起，新增词项 id 从 vocab_start 起。"""
+
+    name: str
+    first_doc: int
+    vocab_start: int
+    post_terms: np.ndarray
+    post_offsets: np.ndarray
+    post_docs: np.ndarray
+    post_tfs: np.ndarray
+    doc_offsets: np.ndarray
+    doc_terms: np.ndarray
+    doc_tfs: np.ndarray
+    doc_lens: np.ndarray
+    deleted: np.ndarray
+    tables: Dict[str, StringTable]
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_lens)
+
+    def posting(self, term_id: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        pos = int(np.searchsorted(self.post_terms, term_id))
+        if pos == len(self.post_terms) or self.post_terms[pos] != term_id:
+            return None
+        start, end = self.post_offsets[pos], self.post_offsets[pos + 1]
+        return self.post_docs[start:end], self.post_tfs[start:end]
+
+
+def _pack(items: List[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in items], out=offsets[1:])
+    return np.frombuffer(b"".join(items), dtype=np.uint8), offsets
+
+
+def _write_dir(path: Path, meta: Dict[str, Any], arrays: Dict[str, np.ndarray], tables: Dict[str, List[bytes]]) -> None:
+    path.mkdir()
+    for name, arr in arrays.items():
+        np.save(path / f"{name}.npy", arr)
+    for name, items in tables.items():
+        blob, offsets = _pack(items)
+        blob.tofile(path / f"{name}.bin")
+        np.save(path / f"{name}_offsets.npy", offsets)
+    (path / "meta.json").write_text(json.dumps({"version": FORMAT_VERSION, **meta}, ensure_ascii=False), encoding="utf-8")
+
+
+def write_index(
+    path: Path,
+    meta: Dict[str, Any],
+    arrays: Dict[str, np.ndarray],
+    tables: Dict[str, List[bytes]],
+) -> None:
+    """写入临时目录后整体替换（旧的增量段随之删除），已 mmap 旧文件的进程不受影响。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    _write_dir(tmp, meta, {name: arrays[name] for name in _ARRAYS}, {name: tables[name] for name in _TABLES})
+
+    old = path.with_name(f"{path.name}.old-{os.getpid()}")
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def write_delta(
+    root: Path,
+    name: str,
+    meta: Dict[str, Any],
+    arrays: Dict[str, np.ndarray],
+    tables: Dict[str, List[bytes]],
+) -> None:
+    """在主段目录下写入一个增量段（写完才改名，未列入 deltas.json 前不生效）。"""
+    tmp = Path(root) / f"{name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    _write_dir(tmp, meta, {n: arrays[n] for n in _DELTA_ARRAYS}, {n: tables[n] for n in _TABLES})
+    os.replace(tmp, Path(root) / name)
+
+
+def read_delta_log(root: Path) -> Dict[str, Any]:
+    """{"segments": [{"name", "n_docs"}...], "total_len": 有效总长度, "next": 下一个段号}。"""
+    path = Path(root) / DELTA_LOG
+    if not path.exists():
+        return {"segments": [], "total_len": None, "next": 1}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_delta_log(root: Path, log: Dict[str, Any]) -> None:
+    """原子替换 deltas.json，并删除未列出的增量段目录（合并后的旧段、崩溃残留）。"""
+    root = Path(root)
+    tmp = root / f"{DELTA_LOG}.tmp-{os.getpid()}"
+    tmp.write_text(json.dumps(log, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, root / DELTA_LOG)
+    live = {seg["name"] for seg in log["segments"]}
+    for path in root.glob("delta-*"):
+        if path.name not in live:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _read_tables(path: Path) -> Dict[str, StringTable]:
+    tables: Dict[str, StringTable] = {}
+    for name in _TABLES:
+        blob_path = path / f"{name}.bin"
+        # 空文件无法 mmap
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if blob_path.stat().st_size else None
+        table_cls = JSONTable if name == "metas" else StringTable
+        tables[name] = table_cls(blob, np.load(path / f"{name}_offsets.npy", mmap_mode="r"))
+    return tables
+
+
+def read_delta(root: Path, name: str) -> BM25Delta:
+    path = Path(root) / name
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    arrays = {n: np.load(path / f"{n}.npy", mmap_mode="r") for n in _DELTA_ARRAYS}
+    return BM25Delta(name=name, first_doc=int(meta["first_doc"]), vocab_start=int(meta["vocab_start"]), tables=_read_tables(path), **arrays)
+
+
+def read_index(path: Path) -> tuple[Dict[str, Any], BM25Segment, Dict[str, StringTable]]:
+    """以 mmap 方式打开索引目录。"""
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"不支持的 BM25 索引版本: {meta.get('version')}")
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+    segment = BM25Segment(**arrays, total_len=int(meta["total_len"]))
+    return meta, segment, _read_tables(path)
@@ -1,38 +1,510 @@
-"""BM25 索引封装（使用 rank_bm25）。"""
+"""BM25 索引封装（增量倒排索引实现）。
+
+追加文档时只更新新文档涉及的倒排表、文档频率与平均长度统计，
+检索时只对查询词倒排表中出现的文档向量化打分，并用部分排序选出 Top-K。
+分词由 `BM25Config.tokenizer` 指定，词项映射为整数 id 后紧凑存储。
+
+索引由三部分组成：从磁盘 mmap 加载的只读主段与若干只读增量段（见 bm25_persist），
+以及内存中的待写增量。`save` 只把内存部分写成一个新的增量段，末尾相邻增量段按
+二进制计数器方式合并（后一段不小于前一段时合并），写入量均摊为 O(n log n)；
+增量段文档数与墓碑数之和达到主段文档数时才整体重写主段，写入后内存部分即被释放。
+
+删除采用墓碑：`delete` 只标记文档，并借助正排表扣减其词项的文档频率与总长度，
+检索时跳过被删文档；整体重写主段时墓碑文档被真正剔除。
+"""
 
 from __future__ import annotations
 
-from typing import List, Tuple
+import math
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
 from ..config.models import BM25Config
+from .bm25_persist import (
+    BM25Delta,
+    BM25Segment,
+    JSONTable,
+    StringTable,
+    read_delta,
+    read_delta_log,
+    read_index,
+    write_delta,
+    write_delta_log,
+    write_index,
+)
+from .tokenizers import Tokenizer, Vocabulary, build_tokenizer
+
+
+_TABLE_NAMES = {"texts": "texts", "ids": "ids", "metadatas": "metas"}
 
 
 class BM25Store:
-    def __init__(self, cfg: BM25Config) -> None:
+    def __init__(self, cfg: BM25Config, tokenizer: Tokenizer | None = None) -> None:
         self.cfg = cfg
-        self.corpus: List[List[str]] = []
-        self.texts: List[str] = []
-        self.metadatas: List[dict] = []
-        self.ids: List[str] = []
-        self.model: BM25Okapi | None = None
+        self.tokenizer = tokenizer or build_tokenizer(cfg)
+        # NumPy 视图会锁定 array 缓冲区，追加与检索需互斥；保存时在锁内整体替换状态
+        self._lock = threading.Lock()
+        self.root: Optional[Path] = None
+        empty = {"vocab": StringTable(), "texts": StringTable(), "ids": StringTable(), "metas": JSONTable()}
+        self._attach(BM25Segment.empty(), empty, [], {"segments": [], "total_len": None, "next": 1})
+
+    def _attach(
+        self,
+        base: BM25Segment,
+        base_tables: Dict[str, StringTable],
+        deltas: List[BM25Delta],
+        log: Dict[str, Any],
+    ) -> None:
+        self.base = base
+        self._base_tables = base_tables
+        self.vocab = Vocabulary(base_tables["vocab"])
+        for delta in deltas:
+            self.vocab.extend(delta.tables["vocab"])
+        self._log = log
+        self._set_deltas(deltas)
+        self.total_len = base.total_len if log["total_len"] is None else int(log["total_len"])
+        # 墓碑：被删除的全局文档下标，及其对各词项文档频率的扣减量；_new_deleted 为尚未写盘的部分
+        self.deleted: set[int] = set()
+        self._deleted_df: Counter = Counter()
+        self._deleted_arr: np.ndarray | None = None
+        self._new_deleted: List[int] = []
+        self._id_rows: Dict[str, List[int]] | None = None
+        for delta in deltas:
+            for doc_idx in delta.deleted.tolist():
+                self.deleted.add(doc_idx)
+                self._deleted_df.update(self._doc_entry(doc_idx)[0].tolist())
+        if self.deleted:
+            self._deleted_arr = np.fromiter(sorted(self.deleted), dtype=np.int32, count=len(self.deleted))
+
+    def _set_deltas(self, deltas: List[BM25Delta]) -> None:
+        """挂载只读增量段并清空内存部分（文档下标与词项 id 均不变）。"""
+        self.deltas = deltas
+        self._starts = [0] + [d.first_doc for d in deltas]
+        self._mem_start = self.base.n_docs + sum(d.n_docs for d in deltas)
+        self._saved_terms = len(self.vocab)
+        for attr, name in _TABLE_NAMES.items():
+            parts = [self._base_tables[name]] + [d.tables[name] for d in deltas]
+            setattr(self, attr, type(self._base_tables[name]).chain(parts))
+        # 内存部分倒排表：词项 id -> (全局文档下标数组, 词频数组)，紧凑存储便于转为 NumPy
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        # 内存部分正排表：第 i 篇的词项 id / 词频位于 doc_terms[doc_offsets[i]:doc_offsets[i + 1]]
+        self.doc_offsets = array("q", [0])
+        self.doc_terms = array("i")
+        self.doc_tfs = array("i")
+        self.doc_lens = array("i")
+
+    def _n_rows(self) -> int:
+        # 含墓碑文档的总行数，即下一篇文档的全局下标
+        return self._mem_start + len(self.doc_lens)
+
+    def __len__(self) -> int:
+        return self._n_rows() - len(self.deleted)
+
+    @property
+    def avgdl(self) -> float:
+        n_docs = len(self)
+        return self.total_len / n_docs if n_docs else 0.0
+
+    def _idf(self, df: int) -> float:
+        # 采用非负 idf 变体，避免高频词在增量场景下出现负分
+        return math.log(1.0 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def _tokenizer_meta(self) -> Dict[str, Any]:
+        return {
+            "tokenizer": self.tokenizer.name,
+            "ngram_min": self.cfg.ngram_min,
+            "ngram_max": self.cfg.ngram_max,
+            "lowercase": self.cfg.lowercase,
+        }
 
     def add(self, queries: List[str], ids: List[str], metadatas: List[dict] | None = None) -> None:
         metadatas = metadatas or [{} for _ in queries]
-        tokenized = [q.split() for q in queries]
-        self.corpus.extend(tokenized)
-        self.texts.extend(queries)
-        self.metadatas.extend(metadatas)
-        self.ids.extend(ids)
-        self.model = BM25Okapi(self.corpus, k1=self.cfg.k1, b=self.cfg.b)
+        # 分词放在锁外，避免阻塞并发检索
+        tokenized = [self.tokenizer.tokenize(q) for q in queries]
+        with self._lock:
+            for text, tokens, doc_id, meta in zip(queries, tokenized, ids, metadatas):
+                doc_idx = self._n_rows()
+                for term, tf in Counter(tokens).items():
+                    term_id = self.vocab.add(term)
+                    posting = self.postings.get(term_id)
+                    if posting is None:
+                        posting = self.postings[term_id] = (array("i"), array("i"))
+                    posting[0].append(doc_idx)
+                    posting[1].append(tf)
+                    self.doc_terms.append(term_id)
+                    self.doc_tfs.append(tf)
+                self.doc_offsets.append(len(self.doc_terms))
+                self.doc_lens.append(len(tokens))
+                self.total_len += len(tokens)
+                self.texts.append(text)
+                self.metadatas.append(meta)
+                self.ids.append(doc_id)
+                if self._id_rows is not None:
+                    self._id_rows.setdefault(doc_id, []).append(doc_idx)
+
+    def _doc_entry(self, doc_idx: int) -> Tuple[np.ndarray, int]:
+        """正排表中某文档的 (词项 id 数组, 文档长度)。"""
+        if doc_idx < self._mem_start:
+            seg_idx = bisect_right(self._starts, doc_idx) - 1
+            seg = self.deltas[seg_idx - 1] if seg_idx else self.base
+            i = doc_idx - self._starts[seg_idx]
+            start, end = seg.doc_offsets[i], seg.doc_offsets[i + 1]
+            return np.asarray(seg.doc_terms[start:end]), int(seg.doc_lens[i])
+        i = doc_idx - self._mem_start
+        start, end = self.doc_offsets[i], self.doc_offsets[i + 1]
+        return np.array(self.doc_terms[start:end], dtype=np.int32), self.doc_lens[i]
+
+    def delete(self, ids: List[str]) -> int:
+        """按 id 删除文档（同一 id 的多篇一并删除），返回实际删除的篇数。"""
+        removed = 0
+        with self._lock:
+            if self._id_rows is None:
+                self._id_rows = {}
+                for idx, doc_id in enumerate(self.ids):
+                    self._id_rows.setdefault(doc_id, []).append(idx)
+            for doc_id in ids:
+                for doc_idx in self._id_rows.pop(doc_id, []):
+                    if doc_idx in self.deleted:
+                        continue
+                    terms, length = self._doc_entry(doc_idx)
+                    self._deleted_df.update(terms.tolist())
+                    self.total_len -= length
+                    self.deleted.add(doc_idx)
+                    self._new_deleted.append(doc_idx)
+                    removed += 1
+            if removed:
+                self._deleted_arr = np.fromiter(sorted(self.deleted), dtype=np.int32, count=len(self.deleted))
+        return removed
+
+    def _posting(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """合并主段、各增量段与内存部分中某词项的倒排。"""
+        doc_parts: List[np.ndarray] = []
+        tf_parts: List[np.ndarray] = []
+        if term_id < self.base.n_terms:
+            start, end = self.base.post_offsets[term_id], self.base.post_offsets[term_id + 1]
+            doc_parts.append(self.base.post_docs[start:end])
+            tf_parts.append(self.base.post_tfs[start:end])
+        for seg in self.deltas:
+            found = seg.posting(term_id)
+            if found is not None:
+                doc_parts.append(found[0])
+                tf_parts.append(found[1])
+        delta = self.postings.get(term_id)
+        if delta:
+            doc_parts.append(np.array(delta[0], dtype=np.int32))
+            tf_parts.append(np.array(delta[1], dtype=np.int32))
+        if len(doc_parts) == 1:
+            return doc_parts[0], tf_parts[0]
+        if not doc_parts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        return np.concatenate(doc_parts), np.concatenate(tf_parts)
+
+    def _doc_lens_at(self, docs: np.ndarray) -> np.ndarray:
+        parts = [(start, seg.doc_lens) for start, seg in zip(self._starts, [self.base, *self.deltas]) if seg.n_docs]
+        if self.doc_lens:
+            parts.append((self._mem_start, np.frombuffer(self.doc_lens, dtype=np.int32)))
+        if len(parts) == 1:
+            start, seg_lens = parts[0]
+            return seg_lens[docs - start] if start else seg_lens[docs]
+        which = np.searchsorted([start for start, _ in parts], docs, side="right") - 1
+        lens = np.empty(len(docs), dtype=np.int32)
+        for i, (start, seg_lens) in enumerate(parts):
+            mask = which == i
+            if mask.any():
+                lens[mask] = seg_lens[docs[mask] - start]
+        return lens
+
+    def _term_scores(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """单个词项（qtf=1）对其倒排中各文档的 BM25 贡献。"""
+        docs, tfs = self._posting(term_id)
+        df = len(docs) - self._deleted_df.get(term_id, 0)
+        if self._deleted_arr is not None and len(docs):
+            live = ~np.isin(docs, self._deleted_arr, assume_unique=True)
+            docs, tfs = docs[live], tfs[live]
+        if not len(docs):
+            return docs, np.empty(0, dtype=np.float64)
+        k1, b = self.cfg.k1, self.cfg.b
+        tfs = tfs.astype(np.float64)
+        norm = k1 * (1 - b + b * self._doc_lens_at(docs) / (self.avgdl or 1.0))
+        return docs, self._idf(df) * tfs * (k1 + 1) / (tfs + norm)
+
+    def _score(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """只对查询词倒排表覆盖的文档打分，返回 (文档下标, 分数)。"""
+        doc_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        # 与 rank_bm25 一致：查询中重复出现的词按出现次数累计
+        for term, qtf in Counter(tokens).items():
+            term_id = self.vocab.lookup(term)
+            if term_id < 0:
+                continue
+            docs, scores = self._term_scores(term_id)
+            if not len(docs):
+                continue
+            doc_parts.append(docs)
+            score_parts.append(qtf * scores)
+        if not doc_parts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        if len(doc_parts) == 1:
+            return doc_parts[0], score_parts[0]
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        return docs, np.bincount(inverse, weights=np.concatenate(score_parts))
+
+    def _tables(self) -> Tuple[StringTable, StringTable, StringTable]:
+        # 在锁内取得，保存时整体重写会重排文档下标，打分结果须用同一时刻的表解析
+        return self.texts, self.ids, self.metadatas
+
+    @staticmethod
+    def _top_k(
+        docs: np.ndarray, scores: np.ndarray, k: int, tables: Tuple[StringTable, StringTable, StringTable]
+    ) -> List[Tuple[str, float, dict]]:
+        if len(docs) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            docs, scores = docs[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        texts, ids, metadatas = tables
+        results: List[Tuple[str, float, dict]] = []
+        for idx, score in zip(docs[order].tolist(), scores[order].tolist()):
+            results.append((texts[idx], float(score), {"id": ids[idx], **metadatas[idx]}))
+        return results
 
     def search(self, query: str, k: int) -> List[Tuple[str, float, dict]]:
-        if not self.model:
+        if not len(self) or k <= 0:
             return []
-        scores = self.model.get_scores(query.split())
-        ranked = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:k]
-        results: List[Tuple[str, float, dict]] = []
-        for idx, score in ranked:
-            results.append((self.texts[idx], float(score), {"id": self.ids[idx], **self.metadatas[idx]}))
+        tokens = self.tokenizer.tokenize(query)
+        with self._lock:
+            docs, scores = self._score(tokens)
+            tables = self._tables()
+        return self._top_k(docs, scores, k, tables)
+
+    def search_batch(self, queries: List[str], k: int, block_size: int = 64) -> List[List[Tuple[str, float, dict]]]:
+        """批量检索，结果与逐条 `search` 一致。
+
+        按块处理查询：块内共享的词项只取一次倒排、计算一次贡献；块内被命中的文档
+        压缩为连续列号，整块分数以一次 bincount 累加为稠密矩阵（行数受 _DENSE_CELLS 限制），
+        全程线性时间，无需排序去重。
+        """
+        if not len(self) or k <= 0:
+            return [[] for _ in queries]
+        counted = [Counter(self.tokenizer.tokenize(q)) for q in queries]
+        results: List[List[Tuple[str, float, dict]]] = []
+        for start in range(0, len(counted), block_size):
+            block_terms: List[List[Tuple[int, int]]] = []
+            term_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+            with self._lock:
+                n_docs = self._n_rows()
+                tables = self._tables()
+                for counts in counted[start : start + block_size]:
+                    terms: List[Tuple[int, int]] = []
+                    for term, qtf in counts.items():
+                        term_id = self.vocab.lookup(term)
+                        if term_id < 0:
+                            continue
+                        if term_id not in term_cache:
+                            term_cache[term_id] = self._term_scores(term_id)
+                        if len(term_cache[term_id][0]):
+                            terms.append((term_id, qtf))
+                    block_terms.append(terms)
+            results.extend(self._score_block(block_terms, term_cache, n_docs, k, tables))
+        return results
+
+    _DENSE_CELLS = 1 << 22
+
+    def _score_block(
+        self,
+        block_terms: List[List[Tuple[int, int]]],
+        term_cache: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        n_docs: int,
+        k: int,
+        tables: Tuple[StringTable, StringTable, StringTable],
+    ) -> List[List[Tuple[str, float, dict]]]:
+        touched = np.zeros(n_docs, dtype=bool)
+        for docs, _ in term_cache.values():
+            touched[docs] = True
+        columns = np.flatnonzero(touched)
+        n_cols = len(columns)
+        if not n_cols:
+            return [[] for _ in block_terms]
+        col_of = np.cumsum(touched, dtype=np.int64) - 1
+        positions = {term_id: col_of[docs] for term_id, (docs, _) in term_cache.items()}
+
+        results: List[List[Tuple[str, float, dict]]] = []
+        rows_per_pass = max(1, self._DENSE_CELLS // n_cols)
+        for lo in range(0, len(block_terms), rows_per_pass):
+            rows = block_terms[lo : lo + rows_per_pass]
+            idx_parts: List[np.ndarray] = []
+            weight_parts: List[np.ndarray] = []
+            # 行内按查询词顺序累加，浮点求和顺序与 `_score` 相同
+            for row, terms in enumerate(rows):
+                for term_id, qtf in terms:
+                    idx_parts.append(positions[term_id] + row * n_cols)
+                    weight_parts.append(qtf * term_cache[term_id][1])
+            if not idx_parts:
+                results.extend([] for _ in rows)
+                continue
+            dense = np.bincount(
+                np.concatenate(idx_parts), weights=np.concatenate(weight_parts), minlength=len(rows) * n_cols
+            ).reshape(len(rows), n_cols)
+            for scores in dense:
+                hit = np.flatnonzero(scores)
+                results.append(self._top_k(columns[hit].astype(np.int32), scores[hit], k, tables))
         return results
+
+    def _doc_arrays(self, first_seg: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """从第 first_seg 个只读段（0 为主段）到内存部分，拼接正排表 (offsets, terms, tfs, lens)。"""
+        segs = [self.base, *self.deltas][first_seg:]
+        offsets = [np.zeros(1, dtype=np.int64)]
+        shift = 0
+        for seg_offsets in [seg.doc_offsets for seg in segs] + [np.array(self.doc_offsets, dtype=np.int64)]:
+            offsets.append(np.asarray(seg_offsets[1:], dtype=np.int64) + shift)
+            shift += int(seg_offsets[-1])
+        return (
+            np.concatenate(offsets),
+            np.concatenate([seg.doc_terms for seg in segs] + [np.array(self.doc_terms, dtype=np.int32)]),
+            np.concatenate([seg.doc_tfs for seg in segs] + [np.array(self.doc_tfs, dtype=np.int32)]),
+            np.concatenate([seg.doc_lens for seg in segs] + [np.array(self.doc_lens, dtype=np.int32)]),
+        )
+
+    def _encoded_rows(self, start: int) -> Dict[str, List[bytes]]:
+        return {
+            name: [table.raw(i) for i in range(start, table.base_len)] + table.encoded_tail()
+            for name, table in (("texts", self.texts), ("ids", self.ids), ("metas", self.metadatas))
+        }
+
+    def save(self, path: str | Path | None = None) -> Path:
+        """写入磁盘并释放内存部分；期间持有锁，并发的检索与写入会等待保存完成。
+
+        目标为当前挂载的目录时只追加增量段（必要时合并），否则整体写入；
+        写入其他目录（导出副本）时当前实例仍挂载原目录。
+        """
+        target = Path(path or self.cfg.persist_path or "")
+        if not str(target):
+            raise ValueError("未配置 BM25 索引持久化路径")
+        with self._lock:
+            if self.root is None or target.resolve() != self.root.resolve():
+                self._write_full(target)
+                if self.root is None:
+                    self._open(target)
+            elif self._n_rows() > self._mem_start or self._new_deleted:
+                if not self._write_delta(target):
+                    self._write_full(target)
+                    self._open(target)
+        return target
+
+    def _write_delta(self, root: Path) -> bool:
+        """把内存部分（连同需合并的末尾增量段）写成一个增量段；应整体重写主段时返回 False。"""
+        sizes = [d.n_docs for d in self.deltas] + [self._n_rows() - self._mem_start]
+        first = len(self.deltas)
+        # 二进制计数器：后一段不小于前一段时合并，段数保持 O(log n)
+        while first and sizes[first - 1] <= sum(sizes[first:]):
+            first -= 1
+        if sum(sizes) + len(self.deleted) >= self.base.n_docs:
+            return False
+
+        merged = self.deltas[first:]
+        first_doc = merged[0].first_doc if merged else self._mem_start
+        vocab_start = merged[0].vocab_start if merged else self._saved_terms
+        doc_offsets, doc_terms, doc_tfs, doc_lens = self._doc_arrays(1 + first)
+        owners = np.repeat(np.arange(first_doc, first_doc + len(doc_lens), dtype=np.int32), np.diff(doc_offsets))
+        perm = np.argsort(doc_terms, kind="stable")
+        post_terms, counts = np.unique(doc_terms[perm], return_counts=True)
+        post_offsets = np.zeros(len(post_terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=post_offsets[1:])
+        arrays = {
+            "post_terms": post_terms.astype(np.int32),
+            "post_offsets": post_offsets,
+            "post_docs": owners[perm],
+            "post_tfs": doc_tfs[perm],
+            "doc_offsets": doc_offsets,
+            "doc_terms": doc_terms,
+            "doc_tfs": doc_tfs,
+            "doc_lens": doc_lens,
+            "deleted": np.concatenate([d.deleted for d in merged] + [np.array(self._new_deleted, dtype=np.int32)]),
+        }
+        tables = self._encoded_rows(first_doc)
+        tables["vocab"] = [self.vocab.term(i).encode("utf-8") for i in range(vocab_start, len(self.vocab))]
+        name = f"delta-{self._log['next']:06d}"
+        meta = {"first_doc": first_doc, "n_docs": len(doc_lens), "vocab_start": vocab_start, "n_terms": len(tables["vocab"])}
+        write_delta(root, name, meta, arrays, tables)
+        segments = self._log["segments"][:first] + [{"name": name, "n_docs": len(doc_lens)}]
+        self._log = {"segments": segments, "total_len": self.total_len, "next": self._log["next"] + 1}
+        write_delta_log(root, self._log)
+        # 文档下标与词项 id 不变，墓碑与 id 索引沿用，只把内存部分换成刚写入的 mmap 段
+        self._set_deltas(self.deltas[:first] + [read_delta(root, name)])
+        self._new_deleted = []
+        return True
+
+    def _write_full(self, target: Path) -> None:
+        """合并全部段写入 target（整体替换旧目录），墓碑文档在此剔除。"""
+        doc_offsets, doc_terms, doc_tfs, doc_lens = self._doc_arrays(0)
+        terms = [self.vocab.term(i).encode("utf-8") for i in range(len(self.vocab))]
+        tables = self._encoded_rows(0)
+        if self._deleted_arr is not None:
+            keep = np.ones(len(doc_lens), dtype=bool)
+            keep[self._deleted_arr] = False
+            entry_keep = np.repeat(keep, np.diff(doc_offsets))
+            doc_terms, doc_tfs = doc_terms[entry_keep], doc_tfs[entry_keep]
+            doc_offsets = np.concatenate([[0], np.cumsum(np.diff(doc_offsets)[keep])]).astype(np.int64)
+            doc_lens = doc_lens[keep]
+            kept = np.flatnonzero(keep).tolist()
+            tables = {name: [rows[i] for i in kept] for name, rows in tables.items()}
+
+        # 词表按字节序重排，词项 id 随之重映射；倒排由正排按词项稳定排序得到，保持文档升序
+        n_terms = len(terms)
+        order = sorted(range(n_terms), key=terms.__getitem__)
+        new_ids = np.empty(n_terms, dtype=np.int32)
+        new_ids[order] = np.arange(n_terms, dtype=np.int32)
+        doc_terms = new_ids[doc_terms]
+        owners = np.repeat(np.arange(len(doc_lens), dtype=np.int32), np.diff(doc_offsets))
+        perm = np.argsort(doc_terms, kind="stable")
+        post_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_terms, minlength=n_terms), out=post_offsets[1:])
+        arrays = {
+            "post_offsets": post_offsets,
+            "post_docs": owners[perm],
+            "post_tfs": doc_tfs[perm],
+            "doc_offsets": doc_offsets,
+            "doc_terms": doc_terms,
+            "doc_tfs": doc_tfs,
+            "doc_lens": doc_lens,
+        }
+        tables["vocab"] = [terms[i] for i in order]
+        meta = {"n_docs": len(doc_lens), "n_terms": n_terms, "total_len": self.total_len, **self._tokenizer_meta()}
+        write_index(target, meta, arrays, tables)
+
+    def _open(self, root: Path) -> Dict[str, Any]:
+        """挂载 root 下的主段与增量段，返回主段 meta。"""
+        meta, segment, tables = read_index(root)
+        log = read_delta_log(root)
+        deltas = [read_delta(root, seg["name"]) for seg in log["segments"]]
+        self._attach(segment, tables, deltas, log)
+        self.root = Path(root)
+        return meta
+
+    def reopen(self, path: str | Path | None = None) -> None:
+        """从磁盘重新 mmap 加载，丢弃内存中尚未保存的部分。"""
+        with self._lock:
+            self._open(Path(path or self.cfg.persist_path or ""))
+
+    @classmethod
+    def load(cls, cfg: BM25Config, path: str | Path | None = None, tokenizer: Tokenizer | None = None) -> "BM25Store":
+        """以 mmap 方式加载索引，不重新分词；之后的追加写入内存部分。"""
+        store = cls(cfg, tokenizer)
+        meta = store._open(Path(path or cfg.persist_path or ""))
+        expected = store._tokenizer_meta()
+        saved = {key: meta.get(key) for key in expected}
+        if saved != expected:
+            raise ValueError(f"BM25 索引分词配置不一致：磁盘 {saved}，当前 {expected}")
+        return store
+
+    @classmethod
+    def load_or_create(cls, cfg: BM25Config, tokenizer: Tokenizer | None = None) -> "BM25Store":
+        """persist_path 下存在索引时加载，否则返回空索引。"""
+        if cfg.persist_path and (Path(cfg.persist_path) / "meta.json").exists():
+            return cls.load(cfg, tokenizer=tokenizer)
+        return cls(cfg, tokenizer)
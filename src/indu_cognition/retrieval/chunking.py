@@ -1,15 +1,25 @@
 """文档切分与层次化块结构。
 
 对应设计文档 Methods 3.2：父/子块切分 + 重叠。
+
+切分以生成器流式进行：`iter_hierarchical_chunks` 可直接读取文件或文本流，
+按固定大小分批读入，内存占用只与单个分段/父块大小有关，与文档大小无关；
+`make_hierarchical_chunks` / `split_children` 为其列表形式，输出不变。
 """
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, TextIO, Union
 
 from ..config import RetrievalConfig
 
+# 流式读取时每次读入的字符数
+READ_SIZE = 1 << 16
+
+TextSource = Union[str, TextIO]
+
 
 @dataclass
 class Chunk:
@@ -31,23 +41,72 @@ def _split_by_delimiters(text: str, delimiters: Iterable[str]) -> List[str]:
     return [p.strip() for p in parts if p.strip()]
 
 
-def split_children(text: str, cfg: RetrievalConfig) -> List[str]:
-    """按子块大小与重叠近似切分。
+def _read_blocks(source: TextSource, read_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        for i in range(0, len(source), read_size):
+            yield source[i : i + read_size]
+        return
+    while True:
+        block = source.read(read_size)
+        if not block:
+            return
+        yield block
+
+
+def _iter_pieces(source: TextSource, delim: str, read_size: int) -> Iterator[str]:
+    """按单个分隔符流式切分（不 strip），等价于 `text.split(delim)`。"""
+    pending = ""
+    for block in _read_blocks(source, read_size):
+        pending += block
+        parts = pending.split(delim)
+        pending = parts.pop()
+        yield from parts
+    yield pending
+
+
+def iter_segments(source: TextSource, delimiters: List[str], read_size: int = READ_SIZE) -> Iterator[str]:
+    """流式产出与 `_split_by_delimiters` 相同的分段。
+
+    分隔符均为单字符时（默认配置）以一个正则一次切分所有分隔符；否则先按第一个分隔符
+    流式切分，再对每段依次应用其余分隔符，以保持逐个分隔符切分的语义。
+    """
+    if not delimiters:
+        yield from _split_by_delimiters("".join(_read_blocks(source, read_size)), [])
+        return
+    if all(len(d) == 1 for d in delimiters):
+        pattern = re.compile("[" + "".join(re.escape(d) for d in delimiters) + "]")
+        pending = ""
+        for block in _read_blocks(source, read_size):
+            parts = pattern.split(pending + block)
+            pending = parts.pop()
+            for p in parts:
+                p = p.strip()
+                if p:
+                    yield p
+        pending = pending.strip()
+        if pending:
+            yield pending
+        return
+    for piece in _iter_pieces(source, delimiters[0], read_size):
+        yield from _split_by_delimiters(piece, delimiters[1:])
+
+
+def iter_children(source: TextSource, cfg: RetrievalConfig, read_size: int = READ_SIZE) -> Iterator[str]:
+    """按子块大小与重叠近似切分，逐个产出子块文本。
 
     采用字符长度近似 token，重叠通过窗口滑动实现。
     """
-    raw_segments = _split_by_delimiters(text, cfg.child_delimiters)
-    chunks: List[str] = []
     current: List[str] = []
     current_len = 0
-    for seg in raw_segments:
+    for seg in iter_segments(source, cfg.child_delimiters, read_size):
         seg_len = len(seg)
         if current and current_len + seg_len > cfg.child_max_tokens:
-            chunks.append(" ".join(current).strip())
+            chunk = " ".join(current).strip()
+            yield chunk
             # 重叠：保留末尾重叠近似
             overlap_chars = max(cfg.overlap, 0)
-            if overlap_chars > 0 and chunks[-1]:
-                tail = chunks[-1][-overlap_chars:]
+            if overlap_chars > 0 and chunk:
+                tail = chunk[-overlap_chars:]
                 current = [tail]
                 current_len = len(tail)
             else:
@@ -56,23 +115,27 @@ def split_children(text: str, cfg: RetrievalConfig) -> List[str]:
         current.append(seg)
         current_len += seg_len
     if current:
-        chunks.append(" ".join(current).strip())
-    return chunks
+        yield " ".join(current).strip()
 
 
-def make_hierarchical_chunks(doc_id: str, text: str, cfg: RetrievalConfig) -> List[Chunk]:
-    """生成父/子块层次结构."""
-    children = split_children(text, cfg)
-    chunks: List[Chunk] = []
+def split_children(text: str, cfg: RetrievalConfig) -> List[str]:
+    """按子块大小与重叠近似切分。"""
+    return list(iter_children(text, cfg))
+
+
+def iter_hierarchical_chunks(
+    doc_id: str, source: TextSource, cfg: RetrievalConfig, read_size: int = READ_SIZE
+) -> Iterator[Chunk]:
+    """流式生成父/子块：子块即时产出，父块在其全部子块之后产出。"""
     parent_buffer: List[str] = []
     parent_len = 0
     parent_idx = 0
     child_idx = 0
-    for child in children:
+    for child in iter_children(source, cfg, read_size):
         if parent_buffer and parent_len + len(child) > cfg.parent_max_tokens:
             parent_text = " ".join(parent_buffer).strip()
             parent_id = f"{doc_id}_p{parent_idx}"
-            chunks.append(Chunk(text=parent_text, parent_id=parent_id, chunk_id=parent_id, level="parent"))
+            yield Chunk(text=parent_text, parent_id=parent_id, chunk_id=parent_id, level="parent")
             parent_idx += 1
             parent_buffer = []
             parent_len = 0
@@ -80,11 +143,15 @@ def make_hierarchical_chunks(doc_id: str, text: str, cfg: RetrievalConfig) -> Li
         parent_len += len(child)
         parent_id = f"{doc_id}_p{parent_idx}"
         chunk_id = f"{doc_id}_c{child_idx}"
-        chunks.append(Chunk(text=child, parent_id=parent_id, chunk_id=chunk_id, level="child"))
+        yield Chunk(text=child, parent_id=parent_id, chunk_id=chunk_id, level="child")
         child_idx += 1
 
     if parent_buffer:
         parent_text = " ".join(parent_buffer).strip()
         parent_id = f"{doc_id}_p{parent_idx}"
-        chunks.append(Chunk(text=parent_text, parent_id=parent_id, chunk_id=parent_id, level="parent"))
-    return chunks
+        yield Chunk(text=parent_text, parent_id=parent_id, chunk_id=parent_id, level="parent")
+
+
+def make_hierarchical_chunks(doc_id: str, text: str, cfg: RetrievalConfig) -> List[Chunk]:
+    """生成父/子块层次结构."""
+    return list(iter_hierarchical_chunks(doc_id, text, cfg))
@@ -2,13 +2,13 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, List, Optional
 
 from ..config.models import RetrievalConfig, VectorStoreConfig
 from ..llm.providers.dashscope import DashScopeEmbeddingClient
 from .bm25_store import BM25Store
 from .chunking import make_hierarchical_chunks
-from .vector_store import ChromaStore
+from .vector_store import VectorStore, build_vector_store
 
 
 class FeedbackUpdater:
@@ -20,10 +20,17 @@ class FeedbackUpdater:
         vector_cfg: VectorStoreConfig,
         embedding_client: DashScopeEmbeddingClient,
         bm25_store: BM25Store,
+        vector_store: Optional[VectorStore] = None,
     ) -> None:
         self.retrieval_cfg = retrieval_cfg
-        self.vector_store = ChromaStore(vector_cfg, embedding_client)
+        # 优先复用检索侧的向量库实例：numpy 后端的增量段只在同一实例内可见
+        self.vector_store = vector_store or build_vector_store(vector_cfg, embedding_client)
         self.bm25_store = bm25_store
+        self._listeners: List[Callable[[str, str, List[List[float]]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, str, List[List[float]]], None]) -> None:
+        """注册语料变化回调，每次 append_qa 写入后以 (qa_id, 问题, 新增子块向量) 调用（如答案缓存失效）。"""
+        self._listeners.append(listener)
 
     def append_qa(self, qa_id: str, question: str, answer: str) -> None:
         text = f"Q: {question}\nA: {answer}"
@@ -32,7 +39,11 @@ class FeedbackUpdater:
         docs = [c.text for c in child_chunks]
         ids = [c.chunk_id for c in child_chunks]
         metas = [{"parent_id": c.parent_id, "qa_id": qa_id, "level": c.level} for c in child_chunks]
-        self.vector_store.add_texts(docs, ids, metas)
+        # 向量只算一次，同时用于写入与通知监听器
+        embeddings = self.vector_store.embedding_client.embed(docs).embeddings if docs else []
+        self.vector_store.add_texts(docs, ids, metas, embeddings=embeddings)
 
         # BM25 使用合成查询近似文本自身
         self.bm25_store.add(queries=docs, ids=ids, metadatas=metas)
+        for listener in self._listeners:
+            listener(qa_id, question, embeddings)
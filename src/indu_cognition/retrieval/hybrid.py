@@ -1,18 +1,34 @@
-"""混合检索：向量 + BM25 + 自适应 Top-K + Rerank。"""
+"""混合检索：向量 + BM25 + 自适应 Top-K + Rerank。
+
+两路召回并发执行，各自带超时：某一路超时或出错时退化为另一路的结果，
+不阻塞整个请求。每个分支使用独立线程池，一路卡住的任务不会占满另一路的线程。各分支耗时与降级情况写入每条结果的 `raw`。
+"""
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import math
 import statistics
-from typing import List
-
-import numpy as np
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from ..config.models import RetrievalConfig
-from ..llm.providers.dashscope import QwenRerankClient
+from ..llm.providers.dashscope import AsyncDashScopeEmbeddingClient, AsyncQwenRerankClient, QwenRerankClient
+from ..llm.types.base import RerankResponse
+from ..llm.types.clients import EmbeddingClientProtocol, RerankClientProtocol
 from .bm25_store import BM25Store
 from .types import RetrievalCandidate, RetrievalResult
-from .vector_store import ChromaStore
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# (分支名, 线程数) -> 线程池；按大小区分，配置变化后使用新池
+_branch_pools: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+_branch_pool_lock = threading.Lock()
 
 
 def _cosine_from_distance(distance: float) -> float:
@@ -20,19 +36,71 @@ def _cosine_from_distance(distance: float) -> float:
     return 1.0 - distance
 
 
-def hybrid_search(
-    query: str,
-    cfg: RetrievalConfig,
-    vector_store: ChromaStore,
-    bm25_store: BM25Store,
-    rerank_client: QwenRerankClient,
-) -> List[RetrievalResult]:
-    k = max(1, math.floor(cfg.llm_context_len / max(cfg.expected_chunk_len, 1)))
+def _adaptive_k(cfg: RetrievalConfig) -> int:
+    return max(1, math.floor(cfg.llm_context_len / max(cfg.expected_chunk_len, 1)))
+
+
+def _get_branch_pool(branch: str, max_workers: int) -> ThreadPoolExecutor:
+    key = (branch, max_workers)
+    with _branch_pool_lock:
+        pool = _branch_pools.get(key)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"recall-{branch}")
+            _branch_pools[key] = pool
+        return pool
+
+
+def _new_report() -> Dict[str, Any]:
+    return {"latency_ms": {}, "degraded": []}
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    return fn(*args), (time.perf_counter() - start) * 1000
 
-    vector_hits = vector_store.similarity_search(query, k=cfg.top_k)
+
+def _degrade(report: Dict[str, Any], branch: str, started: float, reason: str) -> List[Any]:
+    report["latency_ms"][branch] = (time.perf_counter() - started) * 1000
+    report["degraded"].append(branch)
+    logger.warning("%s 召回分支%s，降级为单路检索", branch, reason)
+    return []
+
+
+def _collect_branch(
+    report: Dict[str, Any], branch: str, future: Future, started: float, timeout: Optional[float]
+) -> List[Any]:
+    """等待分支结果；超时或异常时记录降级并返回空列表（不取消已在执行的线程）。"""
+    remaining = None if timeout is None else max(started + timeout - time.perf_counter(), 0.0)
+    try:
+        hits, elapsed = future.result(timeout=remaining)
+    except FuturesTimeoutError:
+        future.cancel()
+        return _degrade(report, branch, started, f"超时（>{timeout}s）")
+    except Exception as e:
+        return _degrade(report, branch, started, f"失败: {e}")
+    report["latency_ms"][branch] = elapsed
+    return hits
+
+
+async def _acollect_branch(
+    report: Dict[str, Any], branch: str, coro: Awaitable[List[Any]], timeout: Optional[float]
+) -> List[Any]:
+    started = time.perf_counter()
+    try:
+        hits = await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        return _degrade(report, branch, started, f"超时（>{timeout}s）")
+    except Exception as e:
+        return _degrade(report, branch, started, f"失败: {e}")
+    report["latency_ms"][branch] = (time.perf_counter() - started) * 1000
+    return hits
+
+
+def _vector_candidates(vector_hits: List[dict]) -> List[RetrievalCandidate]:
     vector_candidates: List[RetrievalCandidate] = []
     for hit in vector_hits:
-        score_cos = _cosine_from_distance(hit.get("distance", 0.0))
+        # numpy 后端直接给出真实余弦分数，Chroma 仍由距离近似
+        score_cos = hit["score"] if "score" in hit else _cosine_from_distance(hit.get("distance", 0.0))
         meta = hit.get("metadata", {}) or {}
         vector_candidates.append(
             RetrievalCandidate(
@@ -43,10 +111,14 @@ def hybrid_search(
                 metadata=meta,
             )
         )
+    return vector_candidates
+
 
-    bm25_hits = bm25_store.search(query, k=cfg.top_k)
+def _bm25_candidates(bm25_hits: List[Tuple[str, float, dict]]) -> List[RetrievalCandidate]:
     bm25_candidates: List[RetrievalCandidate] = []
     for text, score_bm25, meta in bm25_hits:
+        # Q2Q 索引中 BM25 文本是合成查询，原文在元数据里
+        text = meta.pop("chunk_text", text)
         bm25_candidates.append(
             RetrievalCandidate(
                 text=text,
@@ -56,7 +128,13 @@ def hybrid_search(
                 metadata=meta,
             )
         )
+    return bm25_candidates
 
+
+def _fuse_and_filter(
+    cfg: RetrievalConfig, vector_candidates: List[RetrievalCandidate], bm25_candidates: List[RetrievalCandidate]
+) -> List[RetrievalCandidate]:
+    """合并两路召回、计算混合分并按 μ + γσ 阈值过滤。"""
     merged = {}
     for cand in vector_candidates + bm25_candidates:
         key = cand.source_id or cand.text
@@ -82,22 +160,132 @@ def hybrid_search(
     filtered = [c for c in candidates if c.score_hybrid > tau]
     if not filtered:
         filtered = sorted(candidates, key=lambda x: x.score_hybrid, reverse=True)[: cfg.top_k]
+    return filtered
 
-    documents = [c.text for c in filtered]
-    rerank_resp = rerank_client.rerank(query=query, documents=documents, top_n=min(len(documents), k))
-    rerank_scores = {res.text: res.score for res in rerank_resp.results}
+
+def _apply_rerank(
+    filtered: List[RetrievalCandidate], rerank_resp: RerankResponse, k: int, report: Dict[str, Any]
+) -> List[RetrievalResult]:
+    # 按 index 映射：重复文本也能各自拿到分数，且不需要服务端回传文档
+    rerank_scores = {res.index: res.score for res in rerank_resp.results}
 
     results: List[RetrievalResult] = []
-    for cand in filtered:
+    for idx, cand in enumerate(filtered):
         results.append(
             RetrievalResult(
                 text=cand.text,
                 source_id=cand.source_id,
                 parent_id=cand.parent_id,
-                score=rerank_scores.get(cand.text, cand.score_hybrid),
+                score=rerank_scores.get(idx, cand.score_hybrid),
                 metadata=cand.metadata,
-                raw={"hybrid": cand.score_hybrid},
+                raw={"hybrid": cand.score_hybrid, **report},
             )
         )
 
     return sorted(results, key=lambda x: x.score, reverse=True)[: k]
+
+
+def hybrid_search(
+    query: str,
+    cfg: RetrievalConfig,
+    vector_store: VectorStore,
+    bm25_store: BM25Store,
+    rerank_client: QwenRerankClient,
+) -> List[RetrievalResult]:
+    k = _adaptive_k(cfg)
+    report = _new_report()
+
+    started = time.perf_counter()
+    vector_future = _get_branch_pool("vector", cfg.branch_max_workers).submit(
+        _timed, vector_store.similarity_search, query, cfg.top_k
+    )
+    bm25_future = _get_branch_pool("bm25", cfg.branch_max_workers).submit(_timed, bm25_store.search, query, cfg.top_k)
+    vector_hits = _collect_branch(report, "vector", vector_future, started, cfg.vector_timeout_sec)
+    bm25_hits = _collect_branch(report, "bm25", bm25_future, started, cfg.bm25_timeout_sec)
+
+    filtered = _fuse_and_filter(cfg, _vector_candidates(vector_hits), _bm25_candidates(bm25_hits))
+    if not filtered:
+        return []
+
+    documents = [c.text for c in filtered]
+    rerank_resp, report["latency_ms"]["rerank"] = _timed(
+        rerank_client.rerank, query, documents, min(len(documents), k)
+    )
+    return _apply_rerank(filtered, rerank_resp, k, report)
+
+
+def hybrid_search_batch(
+    queries: List[str],
+    cfg: RetrievalConfig,
+    vector_store: VectorStore,
+    bm25_store: BM25Store,
+    rerank_client: RerankClientProtocol,
+    embedding_client: EmbeddingClientProtocol,
+) -> List[List[RetrievalResult]]:
+    """批量混合检索，逐条结果与 `hybrid_search` 相同。
+
+    所有查询一次批量 embedding、一次多查询 Chroma 检索、BM25 按块矩阵化打分，
+    rerank 在独立线程池中并发执行。用于离线评估与批量问答，不做分支超时降级；
+    `raw.latency_ms` 中 vector/bm25 为整批耗时。
+    """
+    if not queries:
+        return []
+    k = _adaptive_k(cfg)
+    report = _new_report()
+    report["batch"] = len(queries)
+
+    def vector_branch() -> List[List[dict]]:
+        embeddings = embedding_client.embed(queries).embeddings
+        return vector_store.similarity_search_by_vectors(embeddings, k=cfg.top_k)
+
+    vector_future = _get_branch_pool("vector", cfg.branch_max_workers).submit(_timed, vector_branch)
+    bm25_future = _get_branch_pool("bm25", cfg.branch_max_workers).submit(
+        _timed, bm25_store.search_batch, queries, cfg.top_k
+    )
+    vector_hits, report["latency_ms"]["vector"] = vector_future.result()
+    bm25_hits, report["latency_ms"]["bm25"] = bm25_future.result()
+
+    filtered = [
+        _fuse_and_filter(cfg, _vector_candidates(v), _bm25_candidates(b)) for v, b in zip(vector_hits, bm25_hits)
+    ]
+
+    def rerank_one(query: str, cands: List[RetrievalCandidate]) -> List[RetrievalResult]:
+        if not cands:
+            return []
+        documents = [c.text for c in cands]
+        rerank_resp, elapsed = _timed(rerank_client.rerank, query, documents, min(len(documents), k))
+        query_report = {**report, "latency_ms": {**report["latency_ms"], "rerank": elapsed}}
+        return _apply_rerank(cands, rerank_resp, k, query_report)
+
+    return list(_get_branch_pool("rerank", cfg.branch_max_workers).map(rerank_one, queries, filtered))
+
+
+async def ahybrid_search(
+    query: str,
+    cfg: RetrievalConfig,
+    vector_store: VectorStore,
+    bm25_store: BM25Store,
+    rerank_client: AsyncQwenRerankClient,
+    embedding_client: AsyncDashScopeEmbeddingClient,
+) -> List[RetrievalResult]:
+    """`hybrid_search` 的异步版本：远程调用走异步客户端，本地 Chroma / BM25 计算放入线程。"""
+    k = _adaptive_k(cfg)
+    report = _new_report()
+
+    async def vector_branch() -> List[dict]:
+        emb = (await embedding_client.embed([query])).embeddings[0]
+        return await asyncio.to_thread(vector_store.similarity_search_by_vector, emb, cfg.top_k)
+
+    vector_hits, bm25_hits = await asyncio.gather(
+        _acollect_branch(report, "vector", vector_branch(), cfg.vector_timeout_sec),
+        _acollect_branch(report, "bm25", asyncio.to_thread(bm25_store.search, query, cfg.top_k), cfg.bm25_timeout_sec),
+    )
+    filtered = _fuse_and_filter(cfg, _vector_candidates(vector_hits), _bm25_candidates(bm25_hits))
+    if not filtered:
+        return []
+
+    documents = [c.text for c in filtered]
+    started = time.perf_counter()
+    rerank_resp = await rerank_client.rerank(query=query, documents=documents, top_n=min(len(documents), k))
+    report["latency_ms"]["rerank"] = (time.perf_counter() - started) * 1000
+    return _apply_rerank(filtered, rerank_resp, k, report)
@@ -0,0 +1,290 @@
+"""基于内容哈希清单的增量文档索引。
+
+清单按文档记录每个子块的 id、文本哈希与合成查询。子块 id 由“父块文本哈希 + 子块文本哈希”
+派生，文档中间插入或修改内容时，其余块的 id 不变，因此重建索引只需：
+
+- 未变化的块：直接跳过，不调用 LLM / embedding；
+- 新增或修改的块：合成查询优先按文本哈希复用清单中已有结果，向量优先从向量库中
+  同文本的旧块复制，其余才调用 Q2Q 与 embedding 服务；
+- 已消失的块：从向量库与 BM25 中删除。
+
+向量库存子块原文；BM25 存合成查询（Q2Q 索引），原文放在元数据 `chunk_text` 中。
+未提供 chat 客户端时不做 Q2Q，BM25 直接索引原文。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from ..config.models import RetrievalConfig
+from ..llm.types.clients import ChatClientProtocol
+from .bm25_store import BM25Store
+from .chunking import TextSource, iter_hierarchical_chunks
+from .q2q import Q2QSynthesizer
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IndexStats:
+    doc_id: str
+    added: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    queries_reused: int = 0
+    queries_generated: int = 0
+    embeddings_reused: int = 0
+
+
+@dataclass
+class IndexPlan:
+    """单篇文档的增量索引计划，依次经 plan -> prepare -> apply 填充与写入。"""
+
+    doc_id: str
+    metadata: dict
+    old: Dict[str, dict]
+    new: Dict[str, dict]
+    added: List[str]
+    removed: List[str]
+    stats: IndexStats
+    queries: Dict[str, str] = field(default_factory=dict)
+    embeddings: Dict[str, List[float]] = field(default_factory=dict)
+
+
+class IndexManifest:
+    """{doc_id: {chunk_id: {"hash": 子块文本哈希, "query": 合成查询}}}。
+
+    主文件为整体 JSON；`save` 只把上次保存后变化的文档追加到 `<path>.log`（每行
+    `{"doc": doc_id, "chunks": {...} 或 null}`），日志行数超过文档数时才整体重写主文件并清空日志。
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = Path(path) if path else None
+        self.docs: Dict[str, Dict[str, Dict[str, Optional[str]]]] = {}
+        self._dirty: Set[str] = set()
+        self._log_lines = 0
+        if self.path and self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"不支持的索引清单版本: {data.get('version')}")
+            self.docs = data["docs"]
+            self._replay_log()
+
+    @property
+    def log_path(self) -> Optional[Path]:
+        return self.path.with_name(f"{self.path.name}.log") if self.path else None
+
+    def _replay_log(self) -> None:
+        if not self.log_path.exists():
+            return
+        with self.log_path.open("r+b") as f:
+            valid = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # 写到一半中断的末行：截掉，对应文档会在续跑时重新处理
+                    logger.warning("索引清单日志末行不完整，已截断")
+                    f.truncate(valid)
+                    break
+                valid += len(line)
+                if entry["chunks"] is None:
+                    self.docs.pop(entry["doc"], None)
+                else:
+                    self.docs[entry["doc"]] = entry["chunks"]
+                self._log_lines += 1
+
+    def set(self, doc_id: str, chunks: Dict[str, Dict[str, Optional[str]]]) -> None:
+        self.docs[doc_id] = chunks
+        self._dirty.add(doc_id)
+
+    def remove(self, doc_id: str) -> Dict[str, Dict[str, Optional[str]]]:
+        self._dirty.add(doc_id)
+        return self.docs.pop(doc_id, {})
+
+    def queries_by_hash(self) -> Dict[str, str]:
+        return {
+            entry["hash"]: entry["query"]
+            for chunks in self.docs.values()
+            for entry in chunks.values()
+            if entry.get("query")
+        }
+
+    def save(self) -> None:
+        if self.path is None or (not self._dirty and self.path.exists()):
+            return
+        if not self.path.exists() or self._log_lines + len(self._dirty) > len(self.docs):
+            self._compact()
+        else:
+            lines = [
+                json.dumps({"doc": doc_id, "chunks": self.docs.get(doc_id)}, ensure_ascii=False) + "\n"
+                for doc_id in sorted(self._dirty)
+            ]
+            with self.log_path.open("a", encoding="utf-8") as f:
+                f.writelines(lines)
+            self._log_lines += len(lines)
+        self._dirty.clear()
+
+    def _compact(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "docs": self.docs}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+        # 若在两步之间中断，重放旧日志至多让相应文档在续跑时重新比对一次
+        self.log_path.unlink(missing_ok=True)
+        self._log_lines = 0
+
+
+class DocumentIndexer:
+    """增量索引文档；修改后的清单与 BM25 段在 `save` 时一起落盘。"""
+
+    def __init__(
+        self,
+        retrieval_cfg: RetrievalConfig,
+        vector_store: VectorStore,
+        bm25_store: BM25Store,
+        chat_client: Optional[ChatClientProtocol] = None,
+        manifest_path: Optional[str] = None,
+    ) -> None:
+        self.cfg = retrieval_cfg
+        self.vector_store = vector_store
+        self.bm25_store = bm25_store
+        self.synthesizer = Q2QSynthesizer(chat_client, retrieval_cfg.q2q) if chat_client is not None else None
+        self.manifest = IndexManifest(manifest_path if manifest_path is not None else retrieval_cfg.manifest_path)
+        self._queries = self.manifest.queries_by_hash()
+
+    def _child_entries(self, doc_id: str, source: TextSource) -> Dict[str, dict]:
+        """流式切分文档，返回 chunk_id -> 子块信息（同文档内完全相同的块只保留一个）。"""
+        entries: Dict[str, dict] = {}
+        children: List[str] = []
+        # 父块在其子块之后产出，只需缓存当前父块下的子块
+        for c in iter_hierarchical_chunks(doc_id, source, self.cfg):
+            if c.level == "child":
+                children.append(c.text)
+                continue
+            p_hash = _hash(c.text)
+            for text in children:
+                t_hash = _hash(text)
+                chunk_id = f"{doc_id}_c{_hash(p_hash + t_hash)[:16]}"
+                entries.setdefault(chunk_id, {"text": text, "hash": t_hash, "parent_id": f"{doc_id}_p{p_hash[:16]}"})
+            children = []
+        return entries
+
+    def _queries_for(self, texts: Dict[str, str], stats: IndexStats) -> Dict[str, str]:
+        """文本哈希 -> 合成查询，已有的直接复用，其余批量生成。"""
+        pending = {h: t for h, t in texts.items() if h not in self._queries}
+        stats.queries_reused = len(texts) - len(pending)
+        if pending and self.synthesizer is not None:
+            hashes = list(pending)
+            generated = self.synthesizer.run([pending[h] for h in hashes])
+            self._queries.update(zip(hashes, generated))
+            stats.queries_generated = len(hashes)
+        return {h: self._queries[h] for h in texts if h in self._queries}
+
+    def plan(self, doc_id: str, source: TextSource, metadata: Optional[dict] = None) -> IndexPlan:
+        """切分并与清单比对，得到需新增 / 删除的子块（不调用远程服务）。"""
+        old = self.manifest.docs.get(doc_id, {})
+        new = self._child_entries(doc_id, source)
+        added = [cid for cid in new if cid not in old]
+        removed = [cid for cid in old if cid not in new]
+        stats = IndexStats(doc_id=doc_id, added=len(added), unchanged=len(new) - len(added), removed=len(removed))
+        return IndexPlan(doc_id=doc_id, metadata=metadata or {}, old=old, new=new, added=added, removed=removed, stats=stats)
+
+    def prepare(self, plan: IndexPlan) -> IndexPlan:
+        """为新增子块准备合成查询与向量，可在多个线程中并发调用。"""
+        if not plan.added:
+            return plan
+        new, stats = plan.new, plan.stats
+        if self.synthesizer is not None:
+            plan.queries = self._queries_for({new[cid]["hash"]: new[cid]["text"] for cid in plan.added}, stats)
+
+        # 可复用的向量：同文本的旧块（父块变化或位置移动），以及上次中断前已写入的同 id 块
+        old_by_hash = {entry["hash"]: cid for cid, entry in plan.old.items()}
+        donors = {cid: old_by_hash.get(new[cid]["hash"], cid) for cid in plan.added}
+        stored = self.vector_store.get_embeddings(sorted(set(donors.values())))
+        fresh = [cid for cid in plan.added if donors[cid] not in stored]
+        embeddings = self.vector_store.embedding_client.embed([new[cid]["text"] for cid in fresh]).embeddings if fresh else []
+        plan.embeddings = {cid: stored[donors[cid]] for cid in plan.added if donors[cid] in stored}
+        plan.embeddings.update(zip(fresh, embeddings))
+        stats.embeddings_reused = len(plan.added) - len(fresh)
+        return plan
+
+    def apply(self, plan: IndexPlan) -> IndexStats:
+        """把准备好的计划写入向量库、BM25 与清单；同一时刻只应有一个线程调用。"""
+        stats, new = plan.stats, plan.new
+        if not plan.added and not plan.removed:
+            return stats
+        # 先删除：既清理消失的块，也防止上次中断时已写入的新块重复
+        stale = plan.removed + plan.added
+        self.vector_store.delete(stale)
+        self.bm25_store.delete(stale)
+
+        if plan.added:
+            metas = [
+                {
+                    **plan.metadata,
+                    "doc_id": plan.doc_id,
+                    "parent_id": new[cid]["parent_id"],
+                    "level": "child",
+                    "content_hash": new[cid]["hash"],
+                }
+                for cid in plan.added
+            ]
+            texts = [new[cid]["text"] for cid in plan.added]
+            self.vector_store.add_texts(texts, plan.added, metas, embeddings=[plan.embeddings[cid] for cid in plan.added])
+            bm25_texts, bm25_metas = [], []
+            for text, meta in zip(texts, metas):
+                query = plan.queries.get(meta["content_hash"])
+                bm25_texts.append(query or text)
+                bm25_metas.append({**meta, "chunk_text": text} if query else meta)
+            self.bm25_store.add(queries=bm25_texts, ids=plan.added, metadatas=bm25_metas)
+
+        self.manifest.set(
+            plan.doc_id,
+            {
+                cid: {"hash": entry["hash"], "query": plan.queries.get(entry["hash"], plan.old.get(cid, {}).get("query"))}
+                for cid, entry in new.items()
+            },
+        )
+        logger.info(
+            "文档 %s 索引完成：新增 %d，未变 %d，删除 %d，复用查询 %d，复用向量 %d",
+            plan.doc_id, stats.added, stats.unchanged, stats.removed, stats.queries_reused, stats.embeddings_reused,
+        )
+        return stats
+
+    def index_document(self, doc_id: str, source: TextSource, metadata: Optional[dict] = None) -> IndexStats:
+        """新增或重建一篇文档的索引（source 为文本或文本流），只处理内容发生变化的子块。"""
+        return self.apply(self.prepare(self.plan(doc_id, source, metadata)))
+
+    def remove_document(self, doc_id: str) -> int:
+        """删除一篇文档的全部子块，返回删除块数。"""
+        chunk_ids = list(self.manifest.remove(doc_id))
+        if chunk_ids:
+            self.vector_store.delete(chunk_ids)
+            self.bm25_store.delete(chunk_ids)
+        return len(chunk_ids)
+
+    def save(self, reopen: bool = False) -> None:
+        """持久化 BM25 与清单（均只写入上次保存后的增量）；向量库写入时已落盘。
+
+        BM25 保存后即从磁盘 mmap 挂载、释放内存部分。reopen=True 时随后重新打开 numpy 向量库，
+        供批量导入定期调用；向量库在锁内整体替换状态，可与 `prepare` 并发。
+        """
+        if self.bm25_store.cfg.persist_path:
+            self.bm25_store.save()
+        self.manifest.save()
+        if reopen and hasattr(self.vector_store, "reopen"):
+            self.vector_store.reopen()
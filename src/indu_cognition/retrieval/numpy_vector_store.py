@@ -0,0 +1,447 @@
+"""进程内 NumPy 向量索引（ChromaStore 的轻量替代后端）。
+
+向量写入前做 L2 归一化，检索分数即真实余弦相似度。目录布局（均为追加写）：
+
+- `meta.json`：维度与已提交文档数，最后写入，作为提交标记；
+- `vectors.f32`：n × dim 的 float32 行矩阵，按 mmap 加载；
+- `{texts,ids,metas}.bin` 与 `.off`：UTF-8 字符串表与 int64 偏移（首项为 0）；
+- `ivf_*.npy`：可选的 IVF 索引（球面 k-means 聚类中心与倒排表），覆盖前 `ivf_n_indexed` 行；
+- `deleted.i64`：被删除行的行号（墓碑），检索时跳过。
+
+未被 IVF 覆盖的新增行始终精确扫描，因此追加后无需立即重建索引；尾部变长后
+沿用已有聚类中心把新行归入倒排表，文档数翻倍时才重新训练聚类中心。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.models import VectorStoreConfig
+from ..llm.types.clients import EmbeddingClientProtocol
+from .bm25_persist import JSONTable, StringTable
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+_TABLES = ("texts", "ids", "metas")
+# 精确检索时每次参与矩阵乘的行数，控制 (行数 × 查询数) 临时矩阵的大小
+_SCAN_ROWS = 65536
+# 未索引行超过已索引行的该比例时把尾部归入倒排表
+_IVF_REBUILD_RATIO = 0.2
+# 文档数达到上次训练时的该倍数时重新训练聚类中心
+_IVF_RETRAIN_GROWTH = 2.0
+# 每个聚类的训练样本数
+_IVF_SAMPLES_PER_LIST = 64
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _merge_top_k(
+    ids: np.ndarray, scores: np.ndarray, new_ids: np.ndarray, new_scores: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """按行合并两组候选并保留每行 Top-K（未排序）。"""
+    ids = np.concatenate([ids, new_ids], axis=1)
+    scores = np.concatenate([scores, new_scores], axis=1)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ids = np.take_along_axis(ids, top, axis=1)
+        scores = np.take_along_axis(scores, top, axis=1)
+    return ids, scores
+
+
+def _spherical_kmeans(x: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """在单位向量样本上训练 nlist 个聚类中心。"""
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    centroids = x[rng.choice(len(x), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        centroids[nonempty] = np.add.reduceat(x[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class NumpyVectorStore:
+    """与 ChromaStore 接口一致的本地向量库：精确（flat）或 IVF 检索。"""
+
+    def __init__(self, cfg: VectorStoreConfig, embedding_client: EmbeddingClientProtocol) -> None:
+        self.cfg = cfg
+        self.embedding_client = embedding_client
+        self.path = Path(cfg.persist_path)
+        self._lock = threading.Lock()
+        self._open()
+
+    # ---- 持久化 ----
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _write_meta(self) -> None:
+        meta = {
+            "version": FORMAT_VERSION,
+            "dim": self.dim,
+            "n_docs": len(self),
+            "ivf_n_indexed": self._ivf_n_indexed,
+            "ivf_n_trained": self._ivf_n_trained,
+        }
+        tmp = self._file(f"meta.json.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._file("meta.json"))
+
+    def _open(self) -> None:
+        self.__dict__.update(self._load_committed())
+        self._maybe_build_ivf()
+
+    def _load_committed(self) -> Dict[str, Any]:
+        """从磁盘读取已提交的数据，返回待替换的实例状态（不修改 self）。"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self._file("meta.json")
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        if meta and meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的向量索引版本: {meta.get('version')}")
+        dim: Optional[int] = meta.get("dim")
+        n_docs = int(meta.get("n_docs", 0))
+        self._truncate_uncommitted(n_docs, dim)
+
+        base = (
+            np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(n_docs, dim))
+            if n_docs
+            else np.empty((0, dim or 0), dtype=np.float32)
+        )
+        tables: Dict[str, StringTable] = {}
+        for name in _TABLES:
+            offsets = np.memmap(self._file(f"{name}.off"), dtype=np.int64, mode="r", shape=(n_docs + 1,))
+            size = int(offsets[-1])
+            blob = np.memmap(self._file(f"{name}.bin"), dtype=np.uint8, mode="r", shape=(size,)) if size else None
+            tables[name] = (JSONTable if name == "metas" else StringTable)(blob, offsets)
+
+        deleted_path = self._file("deleted.i64")
+        rows = np.fromfile(deleted_path, dtype=np.int64) if deleted_path.exists() else np.empty(0, dtype=np.int64)
+        ivf_n_indexed = int(meta.get("ivf_n_indexed", 0))
+        ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        if ivf_n_indexed:
+            ivf = tuple(  # type: ignore[assignment]
+                np.load(self._file(f"ivf_{name}.npy"), mmap_mode="r") for name in ("centroids", "offsets", "ids")
+            )
+        return {
+            "dim": dim,
+            "_base": base,
+            "_delta": [],
+            "_delta_matrix": None,
+            "tables": tables,
+            "_deleted": set(rows[rows < n_docs].tolist()),
+            "_dead_mask": None,
+            "_id_rows": None,
+            "_ivf_n_indexed": ivf_n_indexed,
+            "_ivf_n_trained": int(meta.get("ivf_n_trained", 0)),
+            "_ivf": ivf,
+        }
+
+    def _truncate_uncommitted(self, n_docs: int, dim: Optional[int]) -> None:
+        """丢弃上次崩溃时写了一半、未被 meta.json 提交的尾部数据。"""
+        vectors = self._file("vectors.f32")
+        if not vectors.exists():
+            vectors.touch()
+        with open(vectors, "r+b") as f:
+            f.truncate(n_docs * (dim or 0) * 4)
+        for name in _TABLES:
+            off_path, bin_path = self._file(f"{name}.off"), self._file(f"{name}.bin")
+            if not off_path.exists():
+                off_path.write_bytes(np.zeros(1, dtype=np.int64).tobytes())
+                bin_path.write_bytes(b"")
+            with open(off_path, "r+b") as f:
+                f.truncate((n_docs + 1) * 8)
+                f.seek(n_docs * 8)
+                size = int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+            with open(bin_path, "r+b") as f:
+                f.truncate(size)
+
+    def _append_files(self, vectors: np.ndarray, columns: Dict[str, List[bytes]]) -> None:
+        with open(self._file("vectors.f32"), "ab") as f:
+            f.write(vectors.tobytes())
+        for name, items in columns.items():
+            with open(self._file(f"{name}.bin"), "ab") as f:
+                start = f.tell()
+                f.write(b"".join(items))
+            ends = start + np.cumsum([len(b) for b in items], dtype=np.int64)
+            with open(self._file(f"{name}.off"), "ab") as f:
+                f.write(ends.tobytes())
+
+    def reopen(self) -> None:
+        """重新 mmap 打开已提交的数据，释放内存中的增量段。
+
+        新状态先在锁外构建，再在锁内整体替换，并发的读取方只会看到替换前或替换后的完整状态；
+        写入方（`add_texts` / `delete`）仍应与 reopen 在同一线程中串行调用。
+        """
+        state = self._load_committed()
+        with self._lock:
+            self.__dict__.update(state)
+        self._maybe_build_ivf()
+
+    # ---- 写入 ----
+
+    def __len__(self) -> int:
+        return len(self._base) + sum(len(d) for d in self._delta)
+
+    def add_texts(
+        self,
+        texts: List[str],
+        ids: List[str],
+        metadatas: Optional[List[dict]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> None:
+        """追加文本；传入 embeddings 时直接复用，不再调用 embedding 服务。"""
+        if not texts:
+            return
+        metadatas = metadatas or [{} for _ in texts]
+        if embeddings is None:
+            embeddings = self.embedding_client.embed(texts).embeddings
+        vectors = _normalize(embeddings)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._base = np.empty((0, self.dim), dtype=np.float32)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度不一致：索引 {self.dim}，输入 {vectors.shape[1]}")
+            metas = [meta or {} for meta in metadatas]
+            start = len(self)
+            self._append_files(
+                vectors,
+                {
+                    "texts": [t.encode("utf-8") for t in texts],
+                    "ids": [i.encode("utf-8") for i in ids],
+                    "metas": [json.dumps(m, ensure_ascii=False).encode("utf-8") for m in metas],
+                },
+            )
+            self._delta.append(vectors)
+            self._delta_matrix = None
+            self.tables["texts"].extend(texts)
+            self.tables["ids"].extend(ids)
+            self.tables["metas"].extend(metas)
+            self._write_meta()
+            self._dead_mask = None
+            if self._id_rows is not None:
+                for row, doc_id in enumerate(ids, start):
+                    self._id_rows.setdefault(doc_id, []).append(row)
+        self._maybe_build_ivf()
+
+    def _rows_by_id(self) -> Dict[str, List[int]]:
+        """id -> 未删除行号，首次调用时扫描 id 表建立（调用方需持锁）。"""
+        if self._id_rows is None:
+            self._id_rows = {}
+            for row, doc_id in enumerate(self.tables["ids"]):
+                if row not in self._deleted:
+                    self._id_rows.setdefault(doc_id, []).append(row)
+        return self._id_rows
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        """按 id 取回已存储的（归一化）向量，同一 id 多行时取最后写入的一行。"""
+        with self._lock:
+            id_rows = self._rows_by_id()
+            found = {doc_id: id_rows[doc_id][-1] for doc_id in ids if id_rows.get(doc_id)}
+            segments = self._segments()
+        if not found:
+            return {}
+        order = sorted(found, key=found.__getitem__)
+        vectors = self._rows(segments, np.array([found[doc_id] for doc_id in order], dtype=np.int64))
+        return {doc_id: vec.tolist() for doc_id, vec in zip(order, vectors)}
+
+    def delete(self, ids: List[str]) -> int:
+        """按 id 删除（同一 id 的多行一并删除），返回删除行数。只写墓碑，不回收空间。"""
+        with self._lock:
+            id_rows = self._rows_by_id()
+            rows = [row for doc_id in ids for row in id_rows.pop(doc_id, [])]
+            if rows:
+                with open(self._file("deleted.i64"), "ab") as f:
+                    f.write(np.asarray(rows, dtype=np.int64).tobytes())
+                self._deleted.update(rows)
+                self._dead_mask = None
+        return len(rows)
+
+    # ---- IVF ----
+
+    def _maybe_build_ivf(self) -> None:
+        n = len(self)
+        if self.cfg.index != "ivf" or n < max(self.cfg.ivf_min_docs, 1):
+            return
+        if self._ivf is None or n >= _IVF_RETRAIN_GROWTH * self._ivf_n_trained:
+            self.build_ivf(retrain=True)
+        elif n - self._ivf_n_indexed > _IVF_REBUILD_RATIO * self._ivf_n_indexed:
+            self.build_ivf(retrain=False)
+
+    def build_ivf(self, retrain: bool = True) -> None:
+        """重建 IVF 倒排表；retrain=False 时沿用现有聚类中心，只归类新增行。"""
+        with self._lock:
+            segments = self._segments()
+            ivf, n_indexed = self._ivf, self._ivf_n_indexed
+        retrain = retrain or ivf is None
+        n = sum(len(seg) for _, seg in segments)
+        assign = np.empty(n, dtype=np.int32)
+        if retrain:
+            nlist = min(self.cfg.ivf_nlist or max(1, int(np.sqrt(n))), n)
+            sample = np.random.default_rng(0).choice(n, min(n, _IVF_SAMPLES_PER_LIST * nlist), replace=False)
+            centroids = _spherical_kmeans(self._rows(segments, np.sort(sample)), nlist)
+            start = 0
+        else:
+            centroids, offsets, members = ivf  # type: ignore[misc]
+            nlist = len(centroids)
+            assign[members] = np.repeat(np.arange(nlist, dtype=np.int32), np.diff(offsets))
+            start = n_indexed
+        for offset, seg in segments:
+            for lo in range(max(start - offset, 0), len(seg), _SCAN_ROWS):
+                block = np.asarray(seg[lo : lo + _SCAN_ROWS])
+                assign[offset + lo : offset + lo + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        members = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        for name, arr in (("centroids", centroids), ("offsets", offsets), ("ids", members)):
+            tmp = self._file(f"ivf_{name}.tmp-{os.getpid()}.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, self._file(f"ivf_{name}.npy"))
+        with self._lock:
+            self._ivf = (centroids, offsets, members)
+            self._ivf_n_indexed = n
+            if retrain:
+                self._ivf_n_trained = n
+            self._write_meta()
+        logger.info("IVF 索引已%s：%d 条向量，%d 个聚类", "重新训练" if retrain else "更新", n, nlist)
+
+    # ---- 检索 ----
+
+    def _dead(self) -> Optional[np.ndarray]:
+        """墓碑行的布尔掩码，无删除时为 None（调用方需持锁）。"""
+        if not self._deleted:
+            return None
+        if self._dead_mask is None:
+            mask = np.zeros(len(self), dtype=bool)
+            mask[np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))] = True
+            self._dead_mask = mask
+        return self._dead_mask
+
+    def _segments(self) -> List[Tuple[int, np.ndarray]]:
+        """(全局起始行号, 行矩阵) 列表：mmap 只读段与内存增量段，不拷贝只读段（调用方需持锁）。"""
+        segments = [(0, self._base)] if len(self._base) else []
+        if self._delta:
+            if self._delta_matrix is None:
+                self._delta_matrix = np.concatenate(self._delta)
+            segments.append((len(self._base), self._delta_matrix))
+        return segments
+
+    @staticmethod
+    def _rows(segments: List[Tuple[int, np.ndarray]], idx: np.ndarray) -> np.ndarray:
+        """按全局行号（升序）取向量。"""
+        parts = []
+        for offset, seg in segments:
+            local = idx[(idx >= offset) & (idx < offset + len(seg))] - offset
+            if len(local):
+                parts.append(seg[local])
+        return np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def _hit(tables: Dict[str, StringTable], idx: int, score: float) -> dict:
+        return {
+            "id": tables["ids"][idx],
+            "text": tables["texts"][idx],
+            "score": score,
+            "distance": 1.0 - score,
+            "metadata": tables["metas"][idx],
+        }
+
+    @staticmethod
+    def _exact(
+        segments: List[Tuple[int, np.ndarray]],
+        queries: np.ndarray,
+        k: int,
+        start: int = 0,
+        dead: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """全局行号 >= start 的精确 Top-K，按块矩阵乘避免大临时矩阵；墓碑行分数记为 -inf。"""
+        m = len(queries)
+        ids = np.empty((m, 0), dtype=np.int64)
+        scores = np.empty((m, 0), dtype=np.float32)
+        for offset, seg in segments:
+            for lo in range(max(start - offset, 0), len(seg), _SCAN_ROWS):
+                block = np.asarray(seg[lo : lo + _SCAN_ROWS]) @ queries.T
+                if dead is not None:
+                    block[dead[offset + lo : offset + lo + len(block)]] = -np.inf
+                kk = min(k, len(block))
+                top = np.argpartition(-block, kk - 1, axis=0)[:kk].T
+                ids, scores = _merge_top_k(ids, scores, top + offset + lo, np.take_along_axis(block.T, top, axis=1), k)
+        return ids, scores
+
+    def _ivf_search(
+        self, segments: List[Tuple[int, np.ndarray]], ivf: Tuple[np.ndarray, np.ndarray, np.ndarray], n_indexed: int,
+        query: np.ndarray, k: int, dead: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        centroids, offsets, members = ivf
+        nprobe = min(self.cfg.ivf_nprobe, len(centroids))
+        probes = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.sort(np.concatenate([members[offsets[p] : offsets[p + 1]] for p in probes]))
+        if dead is not None:
+            candidates = candidates[~dead[candidates]]
+        scores = self._rows(segments, candidates) @ query if len(candidates) else np.empty(0, dtype=np.float32)
+        tail_ids, tail_scores = self._exact(segments, query[None, :], k, start=n_indexed, dead=dead)
+        return _merge_top_k(candidates[None, :], scores[None, :].astype(np.float32), tail_ids, tail_scores, k)
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], k: int) -> List[List[dict]]:
+        """多个查询向量的 Top-K，分数为余弦相似度，`distance` = 1 - 余弦。"""
+        if not embeddings:
+            return []
+        with self._lock:
+            segments = self._segments()
+            tables = self.tables
+            ivf = self._ivf if self.cfg.index == "ivf" else None
+            n_indexed = self._ivf_n_indexed
+            dead = self._dead()
+        if not segments or k <= 0:
+            return [[] for _ in embeddings]
+        queries = _normalize(embeddings)
+        if ivf is not None:
+            pairs = [self._ivf_search(segments, ivf, n_indexed, q, k, dead) for q in queries]
+            ids = [p[0][0] for p in pairs]
+            scores = [p[1][0] for p in pairs]
+        else:
+            ids, scores = self._exact(segments, queries, k, dead=dead)  # type: ignore[assignment]
+        results: List[List[dict]] = []
+        for row_ids, row_scores in zip(ids, scores):
+            order = np.argsort(-row_scores, kind="stable")
+            results.append(
+                [self._hit(tables, int(i), float(s)) for i, s in zip(row_ids[order], row_scores[order]) if s != -np.inf]
+            )
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int) -> List[dict]:
+        return self.similarity_search_by_vectors([embedding], k=k)[0]
+
+    def similarity_search(self, query: str, k: int) -> List[dict]:
+        emb = self.embedding_client.embed([query]).embeddings[0]
+        return self.similarity_search_by_vector(emb, k=k)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "n_docs": len(self),
+            "n_deleted": len(self._deleted),
+            "dim": self.dim,
+            "index": self.cfg.index,
+            "ivf_n_indexed": self._ivf_n_indexed,
+            "ivf_n_trained": self._ivf_n_trained,
+        }
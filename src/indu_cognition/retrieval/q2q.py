@@ -1,25 +1,210 @@
-"""合成查询（Q2Q）。对应设计文档 Methods 3.2 Q2Q 索引。"""
+"""合成查询（Q2Q）。对应设计文档 Methods 3.2 Q2Q 索引。
+
+`Q2QSynthesizer` 以有界并发 + 令牌桶限速调用 chat 接口，可把多个文本块合并进同一
+prompt，并把每个完成的结果追加写入 JSONL 断点文件；重启后按 (prompt 模板, 文本) 哈希
+跳过已完成的块。`synthesize_queries` 保留原有的调用方式。
+"""
 
 from __future__ import annotations
 
-from typing import List
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
 
-from ..config import RetrievalConfig
+from ..config import Q2QConfig
 from ..llm import ChatMessage
 from ..llm.providers.deepseek import DeepSeekChatClient
 
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "你是工业文档索引助手，请为给定文本生成最可能的用户查询。只返回一句查询。"
+DEFAULT_PROMPT = "文本：{text}\n请给出一个最可能的用户查询。"
+BATCH_SYSTEM_PROMPT = "你是工业文档索引助手，请为每段给定文本分别生成最可能的用户查询。"
+BATCH_PROMPT = (
+    "下面有 {n} 段文本，请按编号为每段各生成一条最可能的用户查询。\n"
+    "只返回长度为 {n} 的 JSON 字符串数组，顺序与编号一致，不要输出其他内容。\n\n{texts}"
+)
+
+
+class RateLimiter:
+    """线程安全的令牌桶，rate_per_sec <= 0 时不限速。"""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        self.rate = rate_per_sec
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Q2QCheckpoint:
+    """JSONL 断点：每行 {"key": ..., "query": ...}，追加写入。"""
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = Path(path) if path else None
+        self.done: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时可能留下半行，忽略即可
+                        continue
+                    self.done[record["key"]] = record["query"]
+
+    def save(self, results: Dict[str, str]) -> None:
+        with self._lock:
+            self.done.update(results)
+            if self.path is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                for key, query in results.items():
+                    f.write(json.dumps({"key": key, "query": query}, ensure_ascii=False) + "\n")
+
+
+def _parse_query_list(content: str, n: int) -> Optional[List[str]]:
+    """解析批量 prompt 的 JSON 数组输出，兼容 ```json 代码块。"""
+    match = re.search(r"\[.*\]", content, re.S)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, list) or len(data) != n:
+        return None
+    return [str(q).strip() for q in data]
+
+
+class Q2QSynthesizer:
+    """并发、限速、可断点续跑的合成查询生成器。"""
+
+    def __init__(
+        self,
+        chat_client: DeepSeekChatClient,
+        cfg: Optional[Q2QConfig] = None,
+        prompt_template: str | None = None,
+    ) -> None:
+        self.chat_client = chat_client
+        self.cfg = cfg or Q2QConfig()
+        self.prompt_template = prompt_template or DEFAULT_PROMPT
+        self.limiter = RateLimiter(self.cfg.requests_per_minute / 60.0, burst=self.cfg.max_concurrency)
+        # 断点文件只在首次 run 时读入，之后多次（含并发）调用共享同一份
+        self._checkpoint: Optional[Q2QCheckpoint] = None
+        self._checkpoint_lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.prompt_template}\0{text}".encode("utf-8")).hexdigest()
+
+    def _chat(self, messages: List[ChatMessage]) -> str:
+        self.limiter.acquire()
+        return self.chat_client.generate(messages).content.strip()
+
+    def _single(self, text: str) -> str:
+        messages = [
+            ChatMessage(role="system", content=SYSTEM_PROMPT),
+            ChatMessage(role="user", content=self.prompt_template.format(text=text)),
+        ]
+        return self._chat(messages)
+
+    def _batch(self, texts: List[str]) -> Optional[List[str]]:
+        numbered = "\n\n".join(f"[{i + 1}] {t}" for i, t in enumerate(texts))
+        messages = [
+            ChatMessage(role="system", content=BATCH_SYSTEM_PROMPT),
+            ChatMessage(role="user", content=BATCH_PROMPT.format(n=len(texts), texts=numbered)),
+        ]
+        return _parse_query_list(self._chat(messages), len(texts))
+
+    def _run_group(self, texts: List[str]) -> List[str]:
+        """生成一组文本的查询。只在批量输出无法解析时重试；请求错误由传输层重试，这里直接抛出。"""
+        if len(texts) == 1:
+            return [self._single(texts[0])]
+        for attempt in range(self.cfg.max_retries + 1):
+            queries = self._batch(texts)
+            if queries is not None:
+                return queries
+            logger.warning("批量 Q2Q 输出无法解析（第 %d 次）", attempt + 1)
+        # 多次解析失败时退化为逐块生成
+        return [self._single(t) for t in texts]
+
+    def _group_size(self) -> int:
+        # 自定义模板只描述单块，此时不合并
+        if self.prompt_template != DEFAULT_PROMPT:
+            return 1
+        return max(self.cfg.chunks_per_prompt, 1)
+
+    def run(self, chunks: List[str]) -> List[str]:
+        """按输入顺序返回每个文本块的合成查询。
+
+        失败的分组不会写入断点；其余分组完成后抛出 RuntimeError，重新运行即可续跑。
+        """
+        with self._checkpoint_lock:
+            if self._checkpoint is None:
+                self._checkpoint = Q2QCheckpoint(self.cfg.checkpoint_path)
+            checkpoint = self._checkpoint
+        keys = [self._key(c) for c in chunks]
+        pending: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in checkpoint.done:
+                pending.setdefault(key, chunk)
+        if len(pending) < len(set(keys)):
+            logger.info("Q2Q 断点命中 %d 块，待生成 %d 块", len(set(keys)) - len(pending), len(pending))
+
+        items = list(pending.items())
+        size = self._group_size()
+        groups = [items[i : i + size] for i in range(0, len(items), size)]
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.cfg.max_concurrency, thread_name_prefix="q2q") as pool:
+            futures = {pool.submit(self._run_group, [text for _, text in group]): group for group in groups}
+            for done, future in enumerate(as_completed(futures), 1):
+                group = futures[future]
+                try:
+                    queries = future.result()
+                except Exception as e:
+                    failed += len(group)
+                    logger.error("Q2Q 分组失败（%d 块）: %s", len(group), e)
+                    continue
+                checkpoint.save({key: query for (key, _), query in zip(group, queries)})
+                if done % 50 == 0 or done == len(groups):
+                    logger.info("Q2Q 进度 %d/%d 组", done, len(groups))
+        if failed:
+            raise RuntimeError(f"Q2Q 有 {failed} 个文本块生成失败，已完成部分已写入断点，可重新运行续跑")
+        return [checkpoint.done[key] for key in keys]
+
 
-def synthesize_queries(chunks: List[str], chat_client: DeepSeekChatClient, prompt_template: str | None = None) -> List[str]:
+def synthesize_queries(
+    chunks: List[str],
+    chat_client: DeepSeekChatClient,
+    prompt_template: str | None = None,
+    cfg: Optional[Q2QConfig] = None,
+) -> List[str]:
     """为每个文本块生成合成查询。
 
-    prompt_template 如未提供，使用默认模板，要求返回单条查询。
+    prompt_template 如未提供，使用默认模板，要求返回单条查询；cfg 控制并发、限速、
+    合并块数与断点文件（未提供时使用默认值，且不落盘）。
     """
-    synthesized: List[str] = []
-    for chunk in chunks:
-        system_prompt = "你是工业文档索引助手，请为给定文本生成最可能的用户查询。只返回一句查询。"
-        user_prompt = prompt_template or "文本：{text}\n请给出一个最可能的用户查询。"
-        content = user_prompt.format(text=chunk)
-        messages = [ChatMessage(role="system", content=system_prompt), ChatMessage(role="user", content=content)]
-        resp = chat_client.generate(messages)
-        synthesized.append(resp.content.strip())
-    return synthesized
+    cfg = cfg or Q2QConfig(checkpoint_path=None)
+    return Q2QSynthesizer(chat_client, cfg, prompt_template).run(chunks)
@@ -0,0 +1,136 @@
+"""BM25 分词器与整数词表。
+
+语料以中文为主，`str.split()` 会把整句当作一个词。这里提供无网络依赖的
+字符 n-gram 分词：中文连续片段切成 1~n 字的 n-gram，英文/数字保留整词。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Protocol
+
+from ..config.models import BM25Config
+
+# 中日韩统一表意文字（含扩展 A 与兼容区）；英文单词与数字（含小数）
+_TOKEN_RE = re.compile(r"([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)|([0-9A-Za-z_]+(?:\.[0-9]+)?)")
+
+
+class Tokenizer(Protocol):
+    """分词器协议；`name` 与分词参数一起写入索引元数据，加载时校验。"""
+
+    name: str
+
+    def tokenize(self, text: str) -> List[str]:  # pragma: no cover - 协议占位
+        ...
+
+
+class WhitespaceTokenizer:
+    """按空白切分，兼容旧行为。"""
+
+    name = "whitespace"
+
+    def __init__(self, lowercase: bool = False) -> None:
+        self.lowercase = lowercase
+
+    def tokenize(self, text: str) -> List[str]:
+        return (text.lower() if self.lowercase else text).split()
+
+
+class CharNgramTokenizer:
+    """中文按字符 n-gram 切分，英文/数字保留整词。"""
+
+    name = "char_ngram"
+
+    def __init__(self, ngram_min: int = 1, ngram_max: int = 2, lowercase: bool = True) -> None:
+        if ngram_min < 1 or ngram_max < ngram_min:
+            raise ValueError(f"非法的 n-gram 范围: [{ngram_min}, {ngram_max}]")
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.lowercase = lowercase
+
+    def tokenize(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = text.lower()
+        tokens: List[str] = []
+        lo, hi = self.ngram_min, self.ngram_max
+        for cjk, word in _TOKEN_RE.findall(text):
+            if word:
+                tokens.append(word)
+                continue
+            size = len(cjk)
+            for n in range(lo, min(hi, size) + 1):
+                if n == 1:
+                    tokens.extend(cjk)
+                else:
+                    tokens.extend([cjk[i : i + n] for i in range(size - n + 1)])
+        return tokens
+
+
+def build_tokenizer(cfg: BM25Config) -> Tokenizer:
+    """根据 BM25Config.tokenizer 构造分词器。"""
+    if cfg.tokenizer == "whitespace":
+        return WhitespaceTokenizer(lowercase=cfg.lowercase)
+    if cfg.tokenizer == "char_ngram":
+        return CharNgramTokenizer(ngram_min=cfg.ngram_min, ngram_max=cfg.ngram_max, lowercase=cfg.lowercase)
+    raise ValueError(f"未知的 BM25 分词器: {cfg.tokenizer}")
+
+
+class Vocabulary:
+    """词项到连续整数 id 的映射。
+
+    可挂载磁盘上按 UTF-8 字节序排序的只读词表（见 bm25_persist），其中词项 id
+    即排序位置，通过二分查找定位；新增词项从只读部分末尾继续编号。
+    """
+
+    def __init__(self, base: Any = None) -> None:
+        self._base = base
+        self.base_len = base.base_len if base is not None else 0
+        # 新增词项及已命中的只读词项缓存
+        self.term_to_id: Dict[str, int] = {}
+        self.terms: List[str] = []
+
+    def __len__(self) -> int:
+        return self.base_len + len(self.terms)
+
+    def _search_base(self, term: str) -> int:
+        key = term.encode("utf-8")
+        lo, hi = 0, self.base_len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._base.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.base_len and self._base.raw(lo) == key:
+            return lo
+        return -1
+
+    def lookup(self, term: str) -> int:
+        """返回词项 id，不存在时返回 -1。"""
+        term_id = self.term_to_id.get(term)
+        if term_id is not None:
+            return term_id
+        if self.base_len:
+            term_id = self._search_base(term)
+            if term_id >= 0:
+                self.term_to_id[term] = term_id
+            return term_id
+        return -1
+
+    def add(self, term: str) -> int:
+        term_id = self.lookup(term)
+        if term_id < 0:
+            term_id = self.term_to_id[term] = len(self)
+            self.terms.append(term)
+        return term_id
+
+    def extend(self, terms: Iterable[str]) -> None:
+        """按顺序追加已知为新词项的词（如增量段词表），id 依次递增。"""
+        for term in terms:
+            self.term_to_id[term] = len(self)
+            self.terms.append(term)
+
+    def term(self, term_id: int) -> str:
+        if term_id < self.base_len:
+            return self._base[term_id]
+        return self.terms[term_id - self.base_len]
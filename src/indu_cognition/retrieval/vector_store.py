@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 import chromadb
 from chromadb.api import ClientAPI
 
 from ..config.models import VectorStoreConfig
 from ..llm.providers.dashscope import DashScopeEmbeddingClient
+from .numpy_vector_store import NumpyVectorStore
 
 
 class ChromaStore:
@@ -18,18 +19,68 @@ class ChromaStore:
         self.client: ClientAPI = chromadb.PersistentClient(path=cfg.persist_path)
         self.collection = self.client.get_or_create_collection(name=cfg.collection)
 
-    def add_texts(self, texts: List[str], ids: List[str], metadatas: Optional[List[dict]] = None) -> None:
-        embeddings = self.embedding_client.embed(texts).embeddings
+    def add_texts(
+        self,
+        texts: List[str],
+        ids: List[str],
+        metadatas: Optional[List[dict]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> None:
+        """写入文本；传入 embeddings 时直接复用，不再调用 embedding 服务。"""
+        if embeddings is None:
+            embeddings = self.embedding_client.embed(texts).embeddings
         self.collection.add(documents=texts, ids=ids, metadatas=metadatas, embeddings=embeddings)
 
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        """按 id 取回已存储的向量，不存在的 id 不出现在结果中。"""
+        if not ids:
+            return {}
+        res = self.collection.get(ids=ids, include=["embeddings"])
+        return {_id: list(emb) for _id, emb in zip(res["ids"], res["embeddings"])}
+
+    def get_by_metadata(self, where: dict) -> List[dict]:
+        """按元数据条件取出全部匹配条目（不做向量检索）。"""
+        res = self.collection.get(where=where, include=["documents", "metadatas"])
+        return [
+            {"id": _id, "text": doc, "metadata": meta}
+            for _id, doc, meta in zip(res["ids"], res["documents"], res["metadatas"])
+        ]
+
     def similarity_search(self, query: str, k: int) -> List[dict]:
         emb = self.embedding_client.embed([query]).embeddings[0]
-        res = self.collection.query(query_embeddings=[emb], n_results=k, include=["documents", "distances", "metadatas", "ids"])
-        documents = res.get("documents", [[]])[0]
-        distances = res.get("distances", [[]])[0]
-        metadatas = res.get("metadatas", [[]])[0]
-        ids = res.get("ids", [[]])[0]
-        results: List[dict] = []
-        for doc, dist, meta, _id in zip(documents, distances, metadatas, ids):
-            results.append({"id": _id, "text": doc, "distance": dist, "metadata": meta})
-        return results
+        return self.similarity_search_by_vector(emb, k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int) -> List[dict]:
+        """使用已计算好的查询向量检索（供异步/批量路径复用）。"""
+        return self.similarity_search_by_vectors([embedding], k=k)[0]
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], k: int) -> List[List[dict]]:
+        """多个查询向量一次 Chroma 查询，按输入顺序返回每个查询的结果。"""
+        if not embeddings:
+            return []
+        res = self.collection.query(query_embeddings=embeddings, n_results=k, include=["documents", "distances", "metadatas"])
+        batches: List[List[dict]] = []
+        for documents, distances, metadatas, ids in zip(res["documents"], res["distances"], res["metadatas"], res["ids"]):
+            batches.append(
+                [
+                    {"id": _id, "text": doc, "distance": dist, "metadata": meta}
+                    for doc, dist, meta, _id in zip(documents, distances, metadatas, ids)
+                ]
+            )
+        return batches
+
+
+VectorStore = Union[ChromaStore, NumpyVectorStore]
+
+
+def build_vector_store(cfg: VectorStoreConfig, embedding_client: DashScopeEmbeddingClient) -> VectorStore:
+    """按 `VectorStoreConfig.backend` 创建向量库。"""
+    if cfg.backend == "chroma":
+        return ChromaStore(cfg, embedding_client)
+    if cfg.backend == "numpy":
+        return NumpyVectorStore(cfg, embedding_client)
+    raise ValueError(f"未知的向量库后端: {cfg.backend}")
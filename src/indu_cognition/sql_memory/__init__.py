@@ -1,15 +1,27 @@
 """SQL 记忆与 Text-to-SQL 模块入口。"""
 
+from .columnar import ColumnarResult, ResultSummary
 from .executors import SQLExecutor
 from .memory_store import SQLMemoryStore
 from .prompt_builder import build_augmented_prompt
+from .result_cache import CachedSQLExecutor, SQLResultCache, normalize_sql, sql_fingerprint
+from .validator import SchemaCatalog, SQLValidator, ValidationResult
 from .text2sql import SQLAttempt, Text2SQLGenerator, Text2SQLResult
 
 __all__ = [
     "SQLExecutor",
+    "ColumnarResult",
+    "ResultSummary",
     "SQLMemoryStore",
     "build_augmented_prompt",
     "Text2SQLGenerator",
     "Text2SQLResult",
     "SQLAttempt",
+    "CachedSQLExecutor",
+    "SQLResultCache",
+    "normalize_sql",
+    "sql_fingerprint",
+    "SchemaCatalog",
+    "SQLValidator",
+    "ValidationResult",
 ]
@@ -0,0 +1,183 @@
+"""列式查询结果与摘要。
+
+`ColumnarBuilder` 按批接收行，转置为每列一个 NumPy 数组（数值列为 int64/float64，
+NULL 记为 NaN 并单独计数；其他类型为 object 数组），并按近似字节数限制内存。
+`ResultSummary` 给出行列数、各列统计与前几行，用于构造紧凑的提示词。
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _to_array(values: List[Any]) -> np.ndarray:
+    """一批单列值转为数组：全为整数 -> int64，数值（可含 NULL）-> float64，否则 object。"""
+    if values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    if values and all(v is None or (isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)) for v in values):
+        if any(v is not None for v in values):
+            return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _nbytes(arr: np.ndarray) -> int:
+    if arr.dtype != object:
+        return arr.nbytes
+    return arr.nbytes + sum(sys.getsizeof(v) for v in arr)
+
+
+def _all_null(arr: np.ndarray) -> bool:
+    return arr.dtype == object and all(v is None for v in arr)
+
+
+@dataclass
+class ColumnStats:
+    name: str
+    dtype: str
+    nulls: int
+    min: Any = None
+    max: Any = None
+    mean: Optional[float] = None
+    distinct: Optional[int] = None  # 非数值列的不同值个数
+
+    def to_text(self) -> str:
+        parts = [f"{self.name}({self.dtype})"]
+        if self.mean is not None:
+            parts.append(f"min={self.min:.6g}, max={self.max:.6g}, mean={self.mean:.6g}")
+        elif self.min is not None:
+            parts.append(f"min={self.min}, max={self.max}")
+        if self.distinct is not None:
+            parts.append(f"distinct={self.distinct}")
+        if self.nulls:
+            parts.append(f"nulls={self.nulls}")
+        return " ".join(parts)
+
+
+@dataclass
+class ResultSummary:
+    n_rows: int
+    n_cols: int
+    columns: List[ColumnStats]
+    head: List[List[Any]]
+    truncated: bool = False
+
+    def to_text(self) -> str:
+        rows = f"{self.n_rows}+" if self.truncated else str(self.n_rows)
+        lines = [f"共 {rows} 行 × {self.n_cols} 列" + ("（超出内存上限，仅统计已读取部分）" if self.truncated else "")]
+        lines.append(" | ".join(c.name for c in self.columns))
+        lines.extend(" | ".join("" if v is None else str(v) for v in row) for row in self.head)
+        if self.n_rows > len(self.head):
+            lines.append(f"……（仅展示前 {len(self.head)} 行）")
+            lines.append("列统计：" + "；".join(c.to_text() for c in self.columns))
+        return "\n".join(lines)
+
+
+@dataclass
+class ColumnarResult:
+    columns: List[str]
+    arrays: List[np.ndarray] = field(default_factory=list)
+    n_rows: int = 0
+    nbytes: int = 0
+    truncated: bool = False
+    error: Optional[str] = None
+
+    def head(self, n: int) -> List[List[Any]]:
+        """前 n 行（Python 原生值，NaN 还原为 None）。"""
+        cols = [arr[:n].tolist() for arr in self.arrays]
+        return [[None if isinstance(v, float) and math.isnan(v) else v for v in row] for row in zip(*cols)]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[self.columns.index(name)]
+
+    def summary(self, head_rows: int = 5) -> ResultSummary:
+        stats: List[ColumnStats] = []
+        for name, arr in zip(self.columns, self.arrays):
+            if arr.dtype.kind in "if":
+                valid = arr[~np.isnan(arr)] if arr.dtype.kind == "f" else arr
+                nulls = len(arr) - len(valid)
+                if len(valid):
+                    stats.append(
+                        ColumnStats(name, str(arr.dtype), nulls, valid.min().item(), valid.max().item(), float(valid.mean()))
+                    )
+                else:
+                    stats.append(ColumnStats(name, str(arr.dtype), nulls))
+                continue
+            present = [v for v in arr if v is not None]
+            col = ColumnStats(name, "object", len(arr) - len(present))
+            try:
+                col.distinct = len(set(present))
+                if present:
+                    col.min, col.max = min(present), max(present)
+            except TypeError:
+                # 不可哈希或不可比较的值只统计 NULL
+                pass
+            stats.append(col)
+        return ResultSummary(self.n_rows, len(self.columns), stats, self.head(head_rows), self.truncated)
+
+    def to_dict(self, head_rows: int = 5) -> Dict[str, Any]:
+        """与 `SQLExecutor.run` 行模式兼容的结果字典：rows 仅含前几行，另附摘要。"""
+        summary = self.summary(head_rows)
+        return {
+            "error": self.error,
+            "columns": list(self.columns),
+            "rows": summary.head,
+            "n_rows": self.n_rows,
+            "truncated": self.truncated,
+            "summary": summary.to_text(),
+        }
+
+
+class ColumnarBuilder:
+    """按批追加行，超过字节上限时停止接收（`add_batch` 返回 False）。"""
+
+    def __init__(self, columns: Sequence[str], max_bytes: Optional[int] = None) -> None:
+        self.columns = list(columns)
+        self.max_bytes = max_bytes
+        self._chunks: List[List[np.ndarray]] = [[] for _ in self.columns]
+        self.n_rows = 0
+        self.nbytes = 0
+        self.truncated = False
+
+    def add_batch(self, rows: Sequence[Sequence[Any]]) -> bool:
+        if not rows:
+            return True
+        arrays = [_to_array(list(col)) for col in zip(*rows)]
+        size = sum(_nbytes(a) for a in arrays)
+        if self.max_bytes is not None and self.nbytes + size > self.max_bytes:
+            self.truncated = True
+            return False
+        for chunks, arr in zip(self._chunks, arrays):
+            chunks.append(arr)
+        self.n_rows += len(rows)
+        self.nbytes += size
+        return True
+
+    def build(self, error: Optional[str] = None) -> ColumnarResult:
+        arrays = []
+        for chunks in self._chunks:
+            if not chunks:
+                arrays.append(np.empty(0, dtype=object))
+            elif len(chunks) == 1:
+                arrays.append(chunks[0])
+            elif len({c.dtype for c in chunks}) == 1:
+                arrays.append(np.concatenate(chunks))
+            elif all(c.dtype.kind in "if" or _all_null(c) for c in chunks):
+                # 整批为 NULL 的块与数值块合并为 float64（NULL -> NaN）
+                arrays.append(
+                    np.concatenate([np.full(len(c), np.nan) if c.dtype == object else c.astype(np.float64) for c in chunks])
+                )
+            else:
+                # 同一列各批类型不一致（如既有数值又有字符串）时退化为 object
+                arrays.append(np.concatenate([c.astype(object) for c in chunks]))
+        return ColumnarResult(self.columns, arrays, self.n_rows, self.nbytes, self.truncated, error)
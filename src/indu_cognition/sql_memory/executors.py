@@ -1,24 +1,46 @@
-"""SQL 执行抽象（首选 MySQL）。"""
+"""SQL 执行抽象（首选 MySQL）。
+
+默认行模式一次取回至多 `max_rows` 行；`columnar=True` 时 `run` 改走 `run_columnar`：
+服务端游标（`stream_results`）按批拉取、转为列式数组，受 `max_result_bytes` 内存上限约束，
+返回结果只保留前几行与摘要文本，避免大结果集撑大进程内存与提示词。
+"""
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 
+from .columnar import ColumnarBuilder, ColumnarResult
+
 logger = logging.getLogger(__name__)
 
 
 class SQLExecutor:
-    def __init__(self, dsn: str, execution_timeout_sec: int = 20, max_rows: int = 1000) -> None:
+    def __init__(
+        self,
+        dsn: str,
+        execution_timeout_sec: int = 20,
+        max_rows: int = 1000,
+        columnar: bool = False,
+        fetch_batch_rows: int = 1000,
+        max_result_bytes: Optional[int] = 32 * 1024 * 1024,
+        summary_head_rows: int = 5,
+    ) -> None:
         self.engine: Engine = create_engine(dsn, pool_pre_ping=True)
         self.timeout = execution_timeout_sec
         self.max_rows = max_rows
+        self.columnar = columnar
+        self.fetch_batch_rows = max(fetch_batch_rows, 1)
+        self.max_result_bytes = max_result_bytes
+        self.summary_head_rows = summary_head_rows
 
     def run(self, sql: str) -> Dict[str, Any]:
+        if self.columnar:
+            return self.run_columnar(sql).to_dict(self.summary_head_rows)
         try:
             with self.engine.connect() as conn:
                 result = conn.execution_options(timeout=self.timeout).execute(text(sql))
@@ -28,3 +50,24 @@ class SQLExecutor:
         except SQLAlchemyError as e:
             logger.warning("SQL 执行错误: %s", e)
             return {"error": str(e), "columns": [], "rows": []}
+
+    def run_columnar(self, sql: str, max_rows: Optional[int] = None) -> ColumnarResult:
+        """流式读取为列式结果；达到行数或内存上限时停止并标记 truncated。"""
+        max_rows = self.max_rows if max_rows is None else max_rows
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(timeout=self.timeout, stream_results=True).execute(text(sql))
+                builder = ColumnarBuilder(list(result.keys()), self.max_result_bytes)
+                while builder.n_rows < max_rows:
+                    batch = result.fetchmany(min(self.fetch_batch_rows, max_rows - builder.n_rows))
+                    if not batch or not builder.add_batch(batch):
+                        break
+                else:
+                    builder.truncated = result.fetchone() is not None
+                if builder.truncated:
+                    # 服务端游标关闭时会读完剩余行；直接废弃连接，避免为丢弃的数据付出传输代价
+                    conn.invalidate()
+                return builder.build()
+        except SQLAlchemyError as e:
+            logger.warning("SQL 执行错误: %s", e)
+            return ColumnarResult(columns=[], error=str(e))
@@ -21,5 +21,12 @@ class SQLMemoryStore:
     def add_items(self, texts: List[str], ids: List[str], metadatas: Optional[List[dict]] = None) -> None:
         self.store.add_texts(texts=texts, ids=ids, metadatas=metadatas)
 
+    def items_by_tag(self, tag: str) -> List[dict]:
+        """取出某一类（metadata.tag）的全部条目，如 tag="ddl" 的建表语句。"""
+        return self.store.get_by_metadata({"tag": tag})
+
     def similarity_search(self, query: str, k: int = 5) -> List[dict]:
         return self.store.similarity_search(query, k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 5) -> List[dict]:
+        return self.store.similarity_search_by_vector(embedding, k=k)
@@ -0,0 +1,204 @@
+"""SQL 结果缓存：按规范化语句指纹缓存查询结果。
+
+规范化：去掉注释与末尾分号，字符串字面量以外的部分统一小写、空白归一，`IN (...)` 中的
+纯字面量列表排序；仅空白、大小写或 IN 列表顺序不同的语句得到同一指纹。
+有效期取语句涉及各表 TTL 的最小值（未单独配置的表用默认 TTL，TTL 为 0 的表不缓存）。
+写语句不缓存，并使涉及表的已缓存结果失效。内存按条目数与近似字节数双重上限 LRU 淘汰。
+
+并发：同一指纹的读语句同时只执行一次，其余调用等待并共享结果；每张表维护失效代数，
+读语句执行期间涉及的表被写语句失效时，其结果不写入缓存，也不再与之后的调用共享。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config.models import SQLResultCacheConfig
+from ..llm.cache import LRUCache
+from .executors import SQLExecutor
+from .sql_lexer import WRITE_VERBS, referenced_tables, tokenize_sql
+
+logger = logging.getLogger(__name__)
+
+
+def _is_literal(token: str) -> bool:
+    return token[0] in "'\"" or token[0].isdigit() or (token[0] == "." and len(token) > 1) or token == "null"
+
+
+def _sort_in_lists(tokens: List[str]) -> List[str]:
+    """把 `in ( 字面量 , ... )` 中的字面量按字典序排序。"""
+    out: List[str] = []
+    i, n = 0, len(tokens)
+    while i < n:
+        out.append(tokens[i])
+        if tokens[i] == "in" and i + 1 < n and tokens[i + 1] == "(":
+            j, items = i + 2, []
+            while j < n and _is_literal(tokens[j]):
+                items.append(tokens[j])
+                j += 1
+                if j < n and tokens[j] == ",":
+                    j += 1
+                    continue
+                break
+            if items and j < n and tokens[j] == ")" and tokens[j - 1] != ",":
+                out.append("(")
+                out.append(" , ".join(sorted(items)))
+                out.append(")")
+                i = j + 1
+                continue
+        i += 1
+    return out
+
+
+def normalize_sql(sql: str) -> str:
+    return " ".join(_sort_in_lists(tokenize_sql(sql)))
+
+
+def sql_fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()
+
+
+def _table_key(name: str) -> str:
+    """表 -> 指纹索引的键：去掉库名前缀，`db.t` 与 `t` 视为同一张表。"""
+    return name.rsplit(".", 1)[-1]
+
+
+def _result_size(result: Dict[str, Any]) -> int:
+    """结果集近似内存占用（字节）。"""
+    rows = result.get("rows") or []
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(c) for c in result.get("columns") or [])
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+class SQLResultCache:
+    """指纹 -> 查询结果；线程安全。"""
+
+    def __init__(self, cfg: SQLResultCacheConfig) -> None:
+        self.cfg = cfg
+        self.cache = LRUCache(max_entries=cfg.max_entries, max_bytes=cfg.max_bytes, sizeof=_result_size)
+        self._by_table: Dict[str, Set[str]] = {}
+        # 失效代数：表 -> 被失效次数，全部清空时递增 _epoch
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._indexed = 0
+        self.bypassed = 0
+
+    def ttl_for(self, tables: Set[str]) -> float:
+        """各表 TTL 的最小值；带库名前缀的表也匹配不带前缀的配置。"""
+        per_table = self.cfg.table_ttl_sec
+        ttls = [per_table.get(t, per_table.get(t.rsplit(".", 1)[-1], self.cfg.ttl_sec)) for t in tables]
+        return min(ttls, default=self.cfg.ttl_sec)
+
+    def generation(self, tables: Set[str]) -> Tuple[int, ...]:
+        """给定表当前的失效代数，执行前取得，写入时用于判断期间是否发生过失效。"""
+        with self._lock:
+            return (self._epoch, *(self._generations.get(_table_key(t), 0) for t in sorted(tables)))
+
+    def get(self, sql: str) -> Optional[Dict[str, Any]]:
+        cached = self.cache.get(sql_fingerprint(sql))
+        if cached is None:
+            return None
+        return {**cached, "rows": [list(r) for r in cached["rows"]], "cached": True}
+
+    def put(self, sql: str, result: Dict[str, Any], generation: Optional[Tuple[int, ...]] = None) -> bool:
+        """缓存成功的读语句结果，返回是否写入；给出 generation 且期间涉及的表已失效时不写入。"""
+        tokens = tokenize_sql(sql)
+        if result.get("error") or not tokens or tokens[0] not in {"select", "with", "show", "describe", "desc", "explain"}:
+            return False
+        tables = referenced_tables(sql)
+        ttl = self.ttl_for(tables)
+        if ttl <= 0:
+            self.bypassed += 1
+            return False
+        key = sql_fingerprint(sql)
+        entry = {**result, "columns": list(result.get("columns") or []), "rows": [tuple(r) for r in result["rows"]]}
+        # 写入与建索引在同一把锁内，避免与 invalidate 交错后留下过期结果
+        with self._lock:
+            current = (self._epoch, *(self._generations.get(_table_key(t), 0) for t in sorted(tables)))
+            if generation is not None and generation != current:
+                return False
+            self.cache.set(key, entry, ttl_sec=ttl)
+            for table in tables:
+                self._by_table.setdefault(_table_key(table), set()).add(key)
+            self._indexed += len(tables)
+            if self._indexed > 2 * self.cfg.max_entries:
+                # 表 -> 指纹索引中清除已被淘汰或过期的条目
+                self._by_table = {t: live for t, keys in self._by_table.items() if (live := {k for k in keys if k in self.cache})}
+                self._indexed = sum(len(keys) for keys in self._by_table.values())
+        return True
+
+    def invalidate(self, tables: Optional[Set[str]] = None) -> None:
+        """使涉及给定表的结果失效；不给表名时清空全部。"""
+        with self._lock:
+            if tables is None:
+                self._epoch += 1
+                self._by_table.clear()
+                self._indexed = 0
+                self.cache.clear()
+                return
+            for t in tables:
+                self._generations[_table_key(t)] = self._generations.get(_table_key(t), 0) + 1
+            for key in {k for t in tables for k in self._by_table.pop(_table_key(t), set())}:
+                self.cache.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "bypassed": self.bypassed}
+
+
+class CachedSQLExecutor:
+    """在 `SQLExecutor` 前加结果缓存，接口与 `SQLExecutor.run` 一致。"""
+
+    def __init__(self, executor: SQLExecutor, cache: SQLResultCache) -> None:
+        self.executor = executor
+        self.cache = cache
+        # (指纹, 失效代数) -> 正在执行的读语句结果
+        self._inflight: Dict[Tuple[str, Tuple[int, ...]], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.shared = 0
+
+    def run(self, sql: str) -> Dict[str, Any]:
+        tokens = tokenize_sql(sql)
+        if tokens and tokens[0] in WRITE_VERBS:
+            result = self.executor.run(sql)
+            # 不论成败都失效：写语句在行模式下也会报 "does not return rows"，失效多余但无害
+            self.cache.invalidate(referenced_tables(sql))
+            return result
+        cached = self.cache.get(sql)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation(referenced_tables(sql))
+        key = (sql_fingerprint(sql), generation)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            result = future.result()
+            self.shared += 1
+            return {**result, "rows": [list(r) for r in result.get("rows") or []], "cached": True}
+
+        try:
+            result = self.executor.run(sql)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        self.cache.put(sql, result, generation)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "shared": self.shared}
@@ -0,0 +1,102 @@
+"""轻量 SQL 词法与表引用解析（MySQL 方言），供结果缓存与静态校验共用。
+
+不做完整语法分析：按词法切分后，在 FROM / JOIN / INTO / UPDATE 之后识别表名与别名；
+函数参数中的 FROM（如 `EXTRACT(YEAR FROM ts)`）不视为表引用。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|\#[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+    |(?P<quoted>`[^`]*`)
+    |(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    |(?P<word>[A-Za-z_][\w$]*)
+    |(?P<op><=>|<=|>=|<>|!=|\|\||&&|:=|\S)
+    """,
+    re.S | re.X,
+)
+_IDENT_RE = re.compile(r"[a-z_][\w$]*")
+
+WRITE_VERBS = frozenset({"insert", "update", "delete", "replace", "create", "alter", "drop", "truncate", "rename"})
+# 其后紧跟表名的关键字
+TABLE_INTRO = frozenset({"from", "join", "into", "update", "table", "straight_join"})
+NOT_ALIAS = frozenset(
+    {
+        "where", "join", "left", "right", "inner", "outer", "cross", "natural", "full", "on", "using",
+        "group", "order", "limit", "having", "union", "window", "for", "set", "values", "straight_join",
+    }
+)
+
+
+def tokenize_sql(sql: str) -> List[str]:
+    """切分为词法单元：去掉注释与末尾分号，字符串字面量原样保留，其余统一小写。
+
+    反引号包裹的普通标识符去掉反引号，便于与未加引号的写法比较。
+    """
+    out: List[str] = []
+    for m in _TOKEN_RE.finditer(sql):
+        kind, text = m.lastgroup, m.group()
+        if kind == "comment":
+            continue
+        if kind == "string":
+            out.append(text)
+        elif kind == "quoted":
+            inner = text[1:-1]
+            out.append(inner.lower() if re.fullmatch(r"[A-Za-z_][\w$]*", inner) else text)
+        else:
+            out.append(text.lower())
+    while out and out[-1] == ";":
+        out.pop()
+    return out
+
+
+def is_identifier(token: str) -> bool:
+    return bool(_IDENT_RE.fullmatch(token))
+
+
+def table_refs(tokens: List[str]) -> List[Tuple[str, Optional[str], int]]:
+    """返回 (表名, 别名, 表名所在下标)；带库名前缀的表名保留为 `db.table`。"""
+    refs: List[Tuple[str, Optional[str], int]] = []
+    n = len(tokens)
+    # 每层括号内是否出现过 SELECT：没有时该层的 FROM 属于函数参数，
+    # 如 EXTRACT(YEAR FROM ts)、TRIM(BOTH 'x' FROM s)、SUBSTRING(s FROM 2)
+    has_select = [True]
+    for i, tok in enumerate(tokens):
+        if tok == "(":
+            has_select.append(False)
+        elif tok == ")" and len(has_select) > 1:
+            has_select.pop()
+        elif tok == "select":
+            has_select[-1] = True
+        if tok not in TABLE_INTRO or (tok == "from" and not has_select[-1]):
+            continue
+        j = i + 1
+        while j < n and is_identifier(tokens[j]) and tokens[j] not in NOT_ALIAS:
+            start, name = j, tokens[j]
+            while j + 2 < n and tokens[j + 1] == "." and is_identifier(tokens[j + 2]):
+                name += "." + tokens[j + 2]
+                j += 2
+            j += 1
+            alias: Optional[str] = None
+            if j + 1 < n and tokens[j] == "as":
+                alias = tokens[j + 1]
+                j += 2
+            elif j < n and is_identifier(tokens[j]) and tokens[j] not in NOT_ALIAS:
+                alias = tokens[j]
+                j += 1
+            refs.append((name, alias, start))
+            if j < n and tokens[j] == ",":
+                j += 1
+                continue
+            break
+    return refs
+
+
+def referenced_tables(sql: str) -> Set[str]:
+    """语句中 FROM / JOIN / INTO / UPDATE 之后的表名（小写，含库名前缀时保留）。"""
+    return {name for name, _, _ in table_refs(tokenize_sql(sql))}
@@ -1,16 +1,35 @@
-"""记忆增强 Text-to-SQL 迭代器。对应设计文档 Methods 3.3。"""
+"""记忆增强 Text-to-SQL 迭代器。对应设计文档 Methods 3.3。
+
+`candidates` > 1 时每轮并发生成多条候选 SQL，候选一生成即提交执行（执行并发数受
+`max_parallel_exec` 限制），首条执行成功的候选即为结果，其余未开始的任务被取消；
+整轮失败时把全部失败候选与错误反馈给下一轮，最多 `candidate_rounds` 轮。
+"""
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from ..config.models import SQLConfig
 from ..llm import ChatMessage
-from ..llm.providers.deepseek import DeepSeekChatClient
+from ..llm.providers.dashscope import AsyncDashScopeEmbeddingClient
+from ..llm.providers.deepseek import AsyncDeepSeekChatClient, DeepSeekChatClient
 from .executors import SQLExecutor
 from .memory_store import SQLMemoryStore
 from .prompt_builder import build_augmented_prompt
+from .validator import SQLValidator
+
+logger = logging.getLogger(__name__)
+
+# SQLAlchemy 错误信息末尾附带的 SQL 原文与文档链接，反馈给模型时去掉
+_ERROR_NOISE_RE = re.compile(r"\s*(\[SQL: .*|\(Background on this error at: [^)]*\))", re.S)
+_SPACE_RE = re.compile(r"\s+")
+_FENCE_RE = re.compile(r"```(?:sql)?\s*(.*?)```", re.S | re.I)
 
 
 @dataclass
@@ -18,6 +37,8 @@ class SQLAttempt:
     sql: str
     result: Dict[str, Any]
     error: Optional[str] = None
+    llm_ms: float = 0.0
+    exec_ms: float = 0.0
 
 
 @dataclass
@@ -25,6 +46,9 @@ class Text2SQLResult:
     final_sql: Optional[str]
     attempts: List[SQLAttempt] = field(default_factory=list)
     succeeded: bool = False
+    iterations: int = 0  # 串行模式为尝试次数，并行模式为轮数
+    retrieval_ms: float = 0.0  # 记忆检索（每次 generate 仅一次）
+    latency_ms: float = 0.0  # generate 总耗时
 
 
 class Text2SQLGenerator:
@@ -34,14 +58,21 @@ class Text2SQLGenerator:
         chat_client: DeepSeekChatClient,
         memory_store: SQLMemoryStore,
         executor: SQLExecutor,
+        validator: Optional[SQLValidator] = None,
     ) -> None:
         self.cfg = config
         self.chat_client = chat_client
         self.memory_store = memory_store
         self.executor = executor
+        # 执行前按 DDL 目录做静态校验，被拒绝的语句不访问数据库
+        self.validator = validator or (
+            SQLValidator(config.validation, memory_store=memory_store) if config.validation.enabled else None
+        )
+        self._llm_pool: Optional[ThreadPoolExecutor] = None
+        self._exec_pool: Optional[ThreadPoolExecutor] = None
 
-    def _retrieve_memory(self, question: str, k: int = 5) -> Dict[str, List[dict]]:
-        hits = self.memory_store.similarity_search(question, k=k)
+    @staticmethod
+    def _bucket_hits(hits: List[dict]) -> Dict[str, List[dict]]:
         # 简单分类：以 metadata.tag 作为分桶
         buckets: Dict[str, List[dict]] = {"ddl": [], "doc": [], "sql": [], "other": []}
         for h in hits:
@@ -50,29 +81,243 @@ class Text2SQLGenerator:
             buckets.setdefault(tag, []).append({"text": h.get("text"), "metadata": meta})
         return buckets
 
-    def _build_prompt(self, question: str, history_sql: List[str]) -> str:
-        buckets = self._retrieve_memory(question)
+    def _retrieve_memory(self, question: str, k: int = 5) -> Dict[str, List[dict]]:
+        return self._bucket_hits(self.memory_store.similarity_search(question, k=k))
+
+    @staticmethod
+    def _prompt_from_buckets(question: str, buckets: Dict[str, List[dict]]) -> str:
         ddl_items = buckets.get("ddl", [])
         doc_items = buckets.get("doc", [])
         sql_items = buckets.get("sql", [])
-        return build_augmented_prompt(question, ddl_items, doc_items, sql_items, history_sql)
+        return build_augmented_prompt(question, ddl_items, doc_items, sql_items)
 
-    def generate(self, question: str, user_feedback: Optional[str] = None) -> Text2SQLResult:
-        attempts: List[SQLAttempt] = []
-        history_sql: List[str] = []
-        for _ in range(self.cfg.t_max):
-            prompt = self._build_prompt(question, history_sql)
-            messages = [
-                ChatMessage(role="system", content="你是 SQL 生成助手，请输出合法的 SQL。"),
-                ChatMessage(role="user", content=prompt),
+    @staticmethod
+    def _sql_messages(prompt: str) -> List[ChatMessage]:
+        return [
+            ChatMessage(role="system", content="你是 SQL 生成助手，请输出合法的 SQL。"),
+            ChatMessage(role="user", content=prompt),
+        ]
+
+    def _compact_error(self, error: Optional[str]) -> str:
+        error = _ERROR_NOISE_RE.sub("", error or "").strip()
+        if len(error) > self.cfg.feedback_error_max_chars:
+            error = error[: self.cfg.feedback_error_max_chars] + "…"
+        return error
+
+    def _feedback_messages(self, failed: List[SQLAttempt]) -> List[ChatMessage]:
+        """失败后追加到对话末尾的消息：失败的 SQL 及其执行错误。
+
+        记忆检索结果与问题所在的前缀保持不变，重试时 prompt 只增长这几条消息。
+        """
+        if len(failed) == 1:
+            return [
+                ChatMessage(role="assistant", content=failed[0].sql),
+                ChatMessage(
+                    role="user",
+                    content=f"上面的 SQL 执行失败：{self._compact_error(failed[0].error)}\n请修正后重新输出完整 SQL，不要解释。",
+                ),
             ]
-            resp = self.chat_client.generate(messages)
-            sql_stmt = resp.content.strip()
-            history_sql.append(sql_stmt)
-            exec_result = self.executor.run(sql_stmt)
-            attempt = SQLAttempt(sql=sql_stmt, result=exec_result, error=exec_result.get("error"))
-            attempts.append(attempt)
-            if not exec_result.get("error"):
-                return Text2SQLResult(final_sql=sql_stmt, attempts=attempts, succeeded=True)
+        lines = ["以下候选 SQL 均执行失败："]
+        for i, attempt in enumerate(failed, 1):
+            lines.append(f"{i}. {attempt.sql}\n   错误：{self._compact_error(attempt.error)}")
+        lines.append("请修正后重新输出完整 SQL，不要解释。")
+        return [ChatMessage(role="user", content="\n".join(lines))]
+
+    @staticmethod
+    def _record(result: Text2SQLResult, attempt: SQLAttempt, started: float) -> bool:
+        """记录一次尝试并更新指标，成功时返回 True。"""
+        result.attempts.append(attempt)
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        if attempt.error:
+            return False
+        result.final_sql = attempt.sql
+        result.succeeded = True
+        return True
+
+    def _candidate_kwargs(self, index: int) -> Dict[str, Any]:
+        """第 0 条候选沿用默认采样参数，其余提高温度以增加多样性。"""
+        return {} if index == 0 else {"temperature": self.cfg.candidate_temperature}
+
+    @staticmethod
+    def _extract_sql(content: str) -> str:
+        """去掉模型输出中的 Markdown 代码块标记。"""
+        m = _FENCE_RE.search(content)
+        return (m.group(1) if m else content).strip()
+
+    def _execute(self, sql_stmt: str, llm_ms: float) -> SQLAttempt:
+        if self.validator is not None:
+            check = self.validator.validate(sql_stmt)
+            if not check.ok:
+                error = f"静态校验未通过（未执行）：{check.reason}"
+                return SQLAttempt(sql=sql_stmt, result={"error": error, "columns": [], "rows": []}, error=error, llm_ms=llm_ms)
+        t0 = time.perf_counter()
+        exec_result = self.executor.run(sql_stmt)
+        return SQLAttempt(
+            sql=sql_stmt,
+            result=exec_result,
+            error=exec_result.get("error"),
+            llm_ms=llm_ms,
+            exec_ms=(time.perf_counter() - t0) * 1000,
+        )
+
+    def generate(self, question: str, user_feedback: Optional[str] = None) -> Text2SQLResult:
+        started = time.perf_counter()
+        buckets = self._retrieve_memory(question)
+        result = Text2SQLResult(final_sql=None, retrieval_ms=(time.perf_counter() - started) * 1000)
+        messages = self._sql_messages(self._prompt_from_buckets(question, buckets))
+        if self.cfg.candidates > 1:
+            return self._generate_parallel(messages, result, started)
+        for i in range(self.cfg.t_max):
+            t0 = time.perf_counter()
+            sql_stmt = self._extract_sql(self.chat_client.generate(messages).content)
+            attempt = self._execute(sql_stmt, (time.perf_counter() - t0) * 1000)
+            result.iterations = i + 1
+            if self._record(result, attempt, started):
+                return result
+            messages += self._feedback_messages([attempt])
         # 达到上限，失败
-        return Text2SQLResult(final_sql=None, attempts=attempts, succeeded=False)
+        return result
+
+    # ---- 并行候选 ----
+
+    def _generate_candidate(self, messages: List[ChatMessage], index: int) -> Tuple[str, float]:
+        t0 = time.perf_counter()
+        sql_stmt = self._extract_sql(self.chat_client.generate(messages, **self._candidate_kwargs(index)).content)
+        return sql_stmt, (time.perf_counter() - t0) * 1000
+
+    def _pools(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        if self._llm_pool is None:
+            self._llm_pool = ThreadPoolExecutor(self.cfg.candidates, thread_name_prefix="sql-gen")
+            self._exec_pool = ThreadPoolExecutor(max(self.cfg.max_parallel_exec, 1), thread_name_prefix="sql-exec")
+        return self._llm_pool, self._exec_pool  # type: ignore[return-value]
+
+    def _run_round(self, messages: List[ChatMessage], result: Text2SQLResult, started: float) -> List[SQLAttempt]:
+        """执行一轮并行候选，返回失败的尝试（成功时为空列表）。"""
+        llm_pool, exec_pool = self._pools()
+        pending: Set[Future] = {llm_pool.submit(self._generate_candidate, messages, i) for i in range(self.cfg.candidates)}
+        seen: Set[str] = set()
+        failed: List[SQLAttempt] = []
+        last_error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    payload = future.result()
+                except Exception as e:
+                    logger.warning("候选 SQL 生成失败: %s", e)
+                    last_error = e
+                    continue
+                if isinstance(payload, SQLAttempt):
+                    if self._record(result, payload, started):
+                        # 未开始的生成 / 执行直接取消；已在运行的无法中断，结果丢弃
+                        for other in pending:
+                            other.cancel()
+                        return []
+                    failed.append(payload)
+                    continue
+                sql_stmt, llm_ms = payload
+                key = _SPACE_RE.sub(" ", sql_stmt).strip().rstrip(";").lower()
+                if key not in seen:
+                    seen.add(key)
+                    pending.add(exec_pool.submit(self._execute, sql_stmt, llm_ms))
+        if not failed and last_error is not None:
+            raise last_error
+        return failed
+
+    def _generate_parallel(self, messages: List[ChatMessage], result: Text2SQLResult, started: float) -> Text2SQLResult:
+        for round_idx in range(self.cfg.candidate_rounds):
+            result.iterations = round_idx + 1
+            failed = self._run_round(messages, result, started)
+            if result.succeeded:
+                break
+            messages = messages + self._feedback_messages(failed)
+        logger.info(
+            "并行 Text2SQL：%d 轮，执行候选 %d 条，成功=%s", result.iterations, len(result.attempts), result.succeeded
+        )
+        return result
+
+    # ---- 异步版本 ----
+
+    async def _aexecute(self, sql_stmt: str, llm_ms: float, semaphore: asyncio.Semaphore) -> SQLAttempt:
+        async with semaphore:
+            return await asyncio.to_thread(self._execute, sql_stmt, llm_ms)
+
+    async def _agenerate_candidate(
+        self, chat_client: AsyncDeepSeekChatClient, messages: List[ChatMessage], index: int
+    ) -> Tuple[str, float]:
+        t0 = time.perf_counter()
+        resp = await chat_client.generate(messages, **self._candidate_kwargs(index))
+        return self._extract_sql(resp.content), (time.perf_counter() - t0) * 1000
+
+    async def _arun_round(
+        self,
+        chat_client: AsyncDeepSeekChatClient,
+        messages: List[ChatMessage],
+        result: Text2SQLResult,
+        started: float,
+        semaphore: asyncio.Semaphore,
+    ) -> List[SQLAttempt]:
+        pending: Set[asyncio.Task] = {
+            asyncio.create_task(self._agenerate_candidate(chat_client, messages, i)) for i in range(self.cfg.candidates)
+        }
+        seen: Set[str] = set()
+        failed: List[SQLAttempt] = []
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.warning("候选 SQL 生成失败: %s", task.exception())
+                        last_error = task.exception()
+                        continue
+                    payload = task.result()
+                    if isinstance(payload, SQLAttempt):
+                        if self._record(result, payload, started):
+                            return []
+                        failed.append(payload)
+                        continue
+                    sql_stmt, llm_ms = payload
+                    key = _SPACE_RE.sub(" ", sql_stmt).strip().rstrip(";").lower()
+                    if key not in seen:
+                        seen.add(key)
+                        pending.add(asyncio.create_task(self._aexecute(sql_stmt, llm_ms, semaphore)))
+        finally:
+            # 成功或被取消时丢弃其余候选（线程中已开始的 SQL 执行会跑完，结果丢弃）
+            for task in pending:
+                task.cancel()
+        if not failed and last_error is not None:
+            raise last_error
+        return failed
+
+    async def agenerate(
+        self,
+        question: str,
+        chat_client: AsyncDeepSeekChatClient,
+        embedding_client: AsyncDashScopeEmbeddingClient,
+        user_feedback: Optional[str] = None,
+    ) -> Text2SQLResult:
+        """`generate` 的异步版本：LLM/embedding 走异步客户端，Chroma 查询与 SQL 执行放入线程。"""
+        started = time.perf_counter()
+        emb = (await embedding_client.embed([question])).embeddings[0]
+        hits = await asyncio.to_thread(self.memory_store.similarity_search_by_vector, emb, 5)
+        result = Text2SQLResult(final_sql=None, retrieval_ms=(time.perf_counter() - started) * 1000)
+        messages = self._sql_messages(self._prompt_from_buckets(question, self._bucket_hits(hits)))
+        if self.cfg.candidates > 1:
+            semaphore = asyncio.Semaphore(max(self.cfg.max_parallel_exec, 1))
+            for round_idx in range(self.cfg.candidate_rounds):
+                result.iterations = round_idx + 1
+                failed = await self._arun_round(chat_client, messages, result, started, semaphore)
+                if result.succeeded:
+                    break
+                messages = messages + self._feedback_messages(failed)
+            return result
+        for i in range(self.cfg.t_max):
+            t0 = time.perf_counter()
+            sql_stmt = self._extract_sql((await chat_client.generate(messages)).content)
+            attempt = await asyncio.to_thread(self._execute, sql_stmt, (time.perf_counter() - t0) * 1000)
+            result.iterations = i + 1
+            if self._record(result, attempt, started):
+                return result
+            messages += self._feedback_messages([attempt])
+        return result
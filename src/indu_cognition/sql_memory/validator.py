@@ -0,0 +1,269 @@
+"""执行前的静态 SQL 校验。
+
+`SchemaCatalog` 从 SQL 记忆库中 tag=ddl 的条目解析 `CREATE TABLE` 得到表与列；
+`SQLValidator` 在本地拒绝以下语句，拒绝原因作为执行错误反馈给下一次生成：
+
+- 多条语句、非 SELECT / WITH 查询（含 SELECT ... INTO）；
+- 缺少最外层 LIMIT（`require_limit`）；
+- 引用了目录中不存在的表；
+- `别名.列` 引用了所在表中不存在的列；不含子查询 / CTE 时，未限定的列名
+  必须属于引用表中的某一个（`check_columns`）。
+
+目录为空（记忆库中没有可解析的 DDL）时只做语句类型与 LIMIT 检查。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..config.models import SQLValidationConfig
+from .memory_store import SQLMemoryStore
+from .sql_lexer import WRITE_VERBS, is_identifier, table_refs, tokenize_sql
+
+logger = logging.getLogger(__name__)
+
+_CONSTRAINT_WORDS = frozenset(
+    {"primary", "key", "index", "unique", "constraint", "foreign", "fulltext", "spatial", "check", "period"}
+)
+# 不视为列名的单词：关键字、无括号函数、时间单位、类型名等
+_NON_COLUMN_WORDS = frozenset(
+    """
+    select distinct all from where group by having order asc desc limit offset as on using join inner left right
+    outer cross natural straight_join union intersect except with recursive and or not xor is null true false unknown
+    in exists between like rlike regexp escape case when then else end interval binary collate div mod any some
+    over partition rows range preceding following current row unbounded window filter
+    current_date current_time current_timestamp localtime localtimestamp utc_date utc_time utc_timestamp
+    microsecond second minute hour day week month quarter year second_microsecond minute_microsecond minute_second
+    hour_microsecond hour_second hour_minute day_microsecond day_second day_minute day_hour year_month
+    date time datetime timestamp char varchar signed unsigned integer int decimal double float json nchar
+    separator sql_calc_found_rows high_priority sql_no_cache sql_cache sql_small_result sql_big_result
+    for share lock mode nowait skip locked dual both leading trailing
+    """.split()
+)
+
+
+def _names(names: Iterable[str], limit: int = 30) -> str:
+    """拒绝原因中列出的候选名，过多时截断。"""
+    names = sorted(names)
+    return ", ".join(names[:limit]) + (f" 等 {len(names)} 个" if len(names) > limit else "")
+
+
+@dataclass
+class ValidationResult:
+    ok: bool
+    reason: Optional[str] = None
+
+
+@dataclass
+class SchemaCatalog:
+    """表名 -> 列名集合（均为小写）。"""
+
+    tables: Dict[str, Set[str]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.tables)
+
+    def columns(self, table: str) -> Optional[Set[str]]:
+        """查找表的列；带库名前缀时也按去掉前缀的表名查找。"""
+        cols = self.tables.get(table)
+        if cols is None and "." in table:
+            cols = self.tables.get(table.rsplit(".", 1)[-1])
+        return cols
+
+    @classmethod
+    def from_ddl(cls, statements: Iterable[str]) -> "SchemaCatalog":
+        catalog = cls()
+        for ddl in statements:
+            catalog._parse(tokenize_sql(ddl))
+        return catalog
+
+    @classmethod
+    def from_memory_store(cls, store: SQLMemoryStore) -> "SchemaCatalog":
+        catalog = cls.from_ddl(item["text"] for item in store.items_by_tag("ddl") if item.get("text"))
+        logger.info("SQL 校验目录：%d 张表", len(catalog.tables))
+        return catalog
+
+    def _parse(self, tokens: List[str]) -> None:
+        """解析 token 序列中的全部 CREATE TABLE 语句。"""
+        n = len(tokens)
+        i = 0
+        while i < n:
+            if tokens[i] != "create":
+                i += 1
+                continue
+            j = i + 1
+            while j < n and tokens[j] in {"temporary", "or", "replace"}:
+                j += 1
+            if j >= n or tokens[j] != "table":
+                i = j
+                continue
+            j += 1
+            if tokens[j : j + 3] == ["if", "not", "exists"]:
+                j += 3
+            if j >= n or not is_identifier(tokens[j]):
+                i = j
+                continue
+            name = tokens[j]
+            while j + 2 < n and tokens[j + 1] == "." and is_identifier(tokens[j + 2]):
+                name = tokens[j + 2]  # 目录按不带库名的表名登记
+                j += 2
+            j += 1
+            if j >= n or tokens[j] != "(":
+                i = j
+                continue
+            columns: Set[str] = set()
+            depth, expect_name = 0, True
+            j += 1
+            while j < n:
+                tok = tokens[j]
+                if tok == "(":
+                    depth += 1
+                elif tok == ")":
+                    if depth == 0:
+                        break
+                    depth -= 1
+                elif tok == "," and depth == 0:
+                    expect_name = True
+                elif expect_name:
+                    if tok not in _CONSTRAINT_WORDS and is_identifier(tok):
+                        columns.add(tok)
+                    expect_name = False
+                j += 1
+            self.tables[name] = columns
+            i = j + 1
+
+
+class SQLValidator:
+    """基于 `SchemaCatalog` 的静态校验；目录按需从记忆库加载，可调用 `refresh` 重新加载。"""
+
+    def __init__(
+        self,
+        cfg: SQLValidationConfig,
+        catalog: Optional[SchemaCatalog] = None,
+        memory_store: Optional[SQLMemoryStore] = None,
+    ) -> None:
+        self.cfg = cfg
+        self._catalog = catalog
+        self.memory_store = memory_store
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def catalog(self) -> SchemaCatalog:
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = (
+                        SchemaCatalog.from_memory_store(self.memory_store) if self.memory_store else SchemaCatalog()
+                    )
+        return self._catalog
+
+    def refresh(self) -> None:
+        """DDL 记忆更新后调用，下次校验时重新构建目录。"""
+        self._catalog = None
+
+    def validate(self, sql: str) -> ValidationResult:
+        reason = self._check(sql)
+        if reason is None:
+            return ValidationResult(ok=True)
+        self.rejected += 1
+        return ValidationResult(ok=False, reason=reason)
+
+    def _check(self, sql: str) -> Optional[str]:
+        tokens = tokenize_sql(sql)
+        if not tokens:
+            return "输出中没有 SQL 语句"
+        if ";" in tokens:
+            return "只允许单条语句"
+        if tokens[0] not in {"select", "with", "("}:
+            return f"只允许 SELECT 查询，不允许 {tokens[0].upper()}"
+        # REPLACE(...) 等同名函数不算写操作
+        writes = {
+            tok for i, tok in enumerate(tokens)
+            if tok in WRITE_VERBS | {"into"} and (i + 1 == len(tokens) or tokens[i + 1] != "(")
+        }
+        if writes:
+            return f"只允许只读查询，语句中包含 {', '.join(sorted(w.upper() for w in writes))}"
+
+        depth = 0
+        has_limit = False
+        for tok in tokens:
+            if tok == "(":
+                depth += 1
+            elif tok == ")":
+                depth -= 1
+            elif tok == "limit" and depth == 0:
+                has_limit = True
+        if depth != 0:
+            return "括号不匹配"
+        if self.cfg.require_limit and not has_limit:
+            return "最外层查询缺少 LIMIT"
+
+        catalog = self.catalog
+        if not catalog:
+            return None
+        # CTE 名与派生表不在目录中
+        ctes = {tokens[i - 1] for i, tok in enumerate(tokens) if tok == "as" and i + 1 < len(tokens) and tokens[i + 1] == "("}
+        refs = [(name, alias, pos) for name, alias, pos in table_refs(tokens) if name not in ctes]
+        unknown = sorted({name for name, _, _ in refs if catalog.columns(name) is None})
+        if unknown:
+            return f"表不存在: {', '.join(unknown)}；可用的表: {_names(catalog.tables)}"
+        if not self.cfg.check_columns:
+            return None
+        return self._check_columns(tokens, refs, ctes, catalog)
+
+    @staticmethod
+    def _check_columns(
+        tokens: List[str], refs: List[Tuple[str, Optional[str], int]], ctes: Set[str], catalog: SchemaCatalog
+    ) -> Optional[str]:
+        n = len(tokens)
+        by_alias: Dict[str, Set[str]] = {}
+        for name, alias, _ in refs:
+            cols = catalog.columns(name) or set()
+            by_alias[name] = cols
+            by_alias[name.rsplit(".", 1)[-1]] = cols
+            if alias:
+                by_alias[alias] = cols
+        table_positions = {pos for _, _, pos in refs}
+
+        # 限定列：别名.列
+        for i in range(n - 2):
+            if tokens[i + 1] == "." and is_identifier(tokens[i]) and i not in table_positions:
+                if tokens[i] in by_alias and tokens[i + 2] != "*" and tokens[i + 2] not in by_alias[tokens[i]]:
+                    return f"列不存在: {tokens[i]}.{tokens[i + 2]}；{tokens[i]} 的列: {_names(by_alias[tokens[i]])}"
+
+        # 未限定列：仅在没有子查询 / CTE 时检查，避免派生列误判
+        if ctes or tokens.count("select") > 1:
+            return None
+        known: Set[str] = set(by_alias) | ctes
+        for i, tok in enumerate(tokens):
+            if tok == "as" and i + 1 < n:
+                known.add(tokens[i + 1])
+            # 隐式别名：表达式（含 CASE ... END）后直接跟标识符，再跟逗号或 FROM
+            elif (
+                i + 1 < n
+                and tokens[i + 1] in {",", "from"}
+                and i > 0
+                and is_identifier(tok)
+                and (
+                    tokens[i - 1] in {")", "end"}
+                    or tokens[i - 1][0] in "'\"0123456789"
+                    or (is_identifier(tokens[i - 1]) and tokens[i - 1] not in _NON_COLUMN_WORDS | {"select", "distinct"})
+                )
+            ):
+                known.add(tok)
+        all_columns = set().union(*(catalog.columns(name) or set() for name, _, _ in refs)) if refs else set()
+        for i, tok in enumerate(tokens):
+            if not is_identifier(tok) or tok in _NON_COLUMN_WORDS or tok in known or tok in all_columns:
+                continue
+            if i in table_positions or (i + 1 < n and tokens[i + 1] in {"(", "."}) or (i > 0 and tokens[i - 1] in {".", "@"}):
+                # 表名、函数名、限定名的一部分、用户变量
+                continue
+            if i > 0 and tokens[i - 1] == "using":
+                # CONVERT(x USING utf8mb4) 的字符集名；JOIN ... USING 之后必为括号，不会走到这里
+                continue
+            return f"列不存在: {tok}；可用的列: {_names(all_columns)}"
+        return None
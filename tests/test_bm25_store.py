@@ -0,0 +1,151 @@
+"""BM25Store 与朴素 BM25 实现的一致性：追加、删除、保存 / 加载与增量段合并后分数与 Top-K 不变。"""
+
+import math
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from src.indu_cognition.config.models import BM25Config
+from src.indu_cognition.retrieval.bm25_store import BM25Store
+
+K = 5
+WORDS = [f"w{i}" for i in range(120)]
+
+
+def reference_top_k(
+    docs: Dict[str, str], query: str, cfg: BM25Config, tokenize, k: Optional[int] = K
+) -> List[Tuple[str, float]]:
+    """按定义逐篇计算（非负 idf 变体，查询词按出现次数累计），返回 (id, 分数)。"""
+    if not docs:
+        return []
+    counts = {doc_id: Counter(tokenize(text)) for doc_id, text in docs.items()}
+    lens = {doc_id: sum(c.values()) for doc_id, c in counts.items()}
+    n = len(docs)
+    avgdl = sum(lens.values()) / n
+    scores: Counter = Counter()
+    for term, qtf in Counter(tokenize(query)).items():
+        df = sum(1 for c in counts.values() if term in c)
+        if not df:
+            continue
+        idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        for doc_id, c in counts.items():
+            tf = c.get(term)
+            if tf:
+                norm = cfg.k1 * (1 - cfg.b + cfg.b * lens[doc_id] / avgdl)
+                scores[doc_id] += qtf * idf * tf * (cfg.k1 + 1) / (tf + norm)
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+    return ranked if k is None else ranked[:k]
+
+
+def assert_matches(store: BM25Store, docs: Dict[str, str], queries: List[str]) -> None:
+    assert len(store) == len(docs)
+    batch = store.search_batch(queries, K)
+    for query, batch_hits in zip(queries, batch):
+        hits = store.search(query, K)
+        expected = reference_top_k(docs, query, store.cfg, store.tokenizer.tokenize, k=None)
+        assert [score for _, score, _ in hits] == pytest.approx([score for _, score in expected[:K]], rel=1e-9)
+        # 同分文档在 Top-K 边界上的取舍不作要求，只要求每条结果的分数与参考实现中该文档的分数一致
+        reference = dict(expected)
+        assert len({meta["id"] for _, _, meta in hits}) == len(hits)
+        for text, score, meta in hits:
+            assert score == pytest.approx(reference[meta["id"]], rel=1e-9)
+            assert text == docs[meta["id"]]
+            assert meta["n"] == int(meta["id"][1:])
+        assert batch_hits == hits
+
+
+@pytest.fixture()
+def cfg(tmp_path) -> BM25Config:
+    return BM25Config(tokenizer="whitespace", persist_path=str(tmp_path / "bm25"))
+
+
+def _random_docs(rng: random.Random, start: int, count: int) -> Dict[str, str]:
+    return {
+        f"d{i}": " ".join(rng.choice(WORDS[: rng.randint(10, len(WORDS))]) for _ in range(rng.randint(3, 12)))
+        for i in range(start, start + count)
+    }
+
+
+def _add(store: BM25Store, docs: Dict[str, str]) -> None:
+    ids = list(docs)
+    store.add([docs[i] for i in ids], ids, [{"n": int(i[1:])} for i in ids])
+
+
+def test_matches_reference_after_add_and_delete(cfg):
+    rng = random.Random(0)
+    store = BM25Store(cfg)
+    docs = _random_docs(rng, 0, 80)
+    _add(store, docs)
+    queries = [" ".join(rng.choice(WORDS[:40]) for _ in range(3)) for _ in range(10)] + ["w1 w1 w2"]
+    assert_matches(store, docs, queries)
+
+    removed = rng.sample(sorted(docs), 20)
+    assert store.delete(removed + ["missing"]) == 20
+    for doc_id in removed:
+        del docs[doc_id]
+    assert_matches(store, docs, queries)
+
+
+def test_matches_reference_across_checkpoints_and_reload(cfg):
+    rng = random.Random(1)
+    store = BM25Store.load_or_create(cfg)
+    docs: Dict[str, str] = {}
+    queries = [" ".join(rng.choice(WORDS[:40]) for _ in range(3)) for _ in range(8)]
+    next_id = 0
+    saw_deltas = False
+    for step in range(12):
+        batch = _random_docs(rng, next_id, rng.randint(1, 25))
+        next_id += len(batch)
+        _add(store, batch)
+        docs.update(batch)
+        removed = rng.sample(sorted(docs), min(len(docs), rng.randint(0, 5)))
+        store.delete(removed)
+        for doc_id in removed:
+            del docs[doc_id]
+
+        store.save()
+        saw_deltas = saw_deltas or bool(store.deltas)
+        assert_matches(store, docs, queries)
+        # 从磁盘重新加载：主段、增量段与墓碑都应还原
+        assert_matches(BM25Store.load(cfg), docs, queries)
+    assert saw_deltas
+
+
+def test_reopen_discards_unsaved_changes(cfg):
+    rng = random.Random(2)
+    store = BM25Store(cfg)
+    docs = _random_docs(rng, 0, 30)
+    _add(store, docs)
+    store.save()
+    queries = ["w1 w2 w3", "w4", "w5 w5"]
+
+    _add(store, _random_docs(rng, 100, 5))
+    store.delete(["d0", "d1"])
+    store.reopen()
+    assert_matches(store, docs, queries)
+
+
+def test_save_to_other_path_exports_copy(cfg, tmp_path):
+    rng = random.Random(3)
+    store = BM25Store(cfg)
+    docs = _random_docs(rng, 0, 20)
+    _add(store, docs)
+    store.save()
+    store.delete(["d3"])
+    del docs["d3"]
+    store.save(tmp_path / "export")
+    assert_matches(BM25Store.load(cfg, path=tmp_path / "export"), docs, ["w1 w2", "w3"])
+    # 导出不改变当前挂载的目录：其中仍有 d3，删除要到下次 save 才写入
+    assert len(BM25Store.load(cfg)) == 20
+    store.save()
+    assert_matches(BM25Store.load(cfg), docs, ["w1 w2", "w3"])
+
+
+def test_load_rejects_different_tokenizer(cfg):
+    store = BM25Store(cfg)
+    _add(store, {"d0": "w1 w2"})
+    store.save()
+    with pytest.raises(ValueError, match="分词配置不一致"):
+        BM25Store.load(cfg.model_copy(update={"tokenizer": "char_ngram"}))
@@ -0,0 +1,125 @@
+"""sql_lexer 与 SQLValidator 的静态校验用例。"""
+
+import pytest
+
+from src.indu_cognition.config.models import SQLValidationConfig
+from src.indu_cognition.sql_memory.sql_lexer import referenced_tables
+from src.indu_cognition.sql_memory.validator import SchemaCatalog, SQLValidator
+
+DDL = """
+CREATE TABLE IF NOT EXISTS `prod`.`orders` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  user_id int,
+  amount decimal(10,2),
+  created_at datetime,
+  PRIMARY KEY (`id`),
+  KEY idx_user (user_id)
+) ENGINE=InnoDB;
+CREATE TABLE users (id int primary key, name varchar(64), city varchar(32));
+CREATE TABLE sensor_data (ts datetime, device_id varchar(32), value double, unit varchar(8));
+CREATE TABLE ladle_temp (id int, temp double, status varchar(16));
+"""
+
+
+@pytest.fixture()
+def validator() -> SQLValidator:
+    return SQLValidator(SQLValidationConfig(), catalog=SchemaCatalog.from_ddl([DDL]))
+
+
+def test_catalog_from_ddl():
+    catalog = SchemaCatalog.from_ddl([DDL])
+    assert catalog.tables["orders"] == {"id", "user_id", "amount", "created_at"}
+    assert catalog.tables["users"] == {"id", "name", "city"}
+    assert catalog.columns("prod.orders") == catalog.tables["orders"]
+    assert catalog.columns("missing") is None
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT o.id, u.name, SUM(o.amount) AS total FROM orders o JOIN users u ON o.user_id = u.id "
+        "WHERE o.created_at > NOW() - INTERVAL 1 DAY GROUP BY o.id, u.name ORDER BY total DESC LIMIT 10",
+        "SELECT * FROM prod.orders LIMIT 5",
+        "SELECT REPLACE(name, 'a', 'b') nm, COUNT(*) FROM users GROUP BY nm LIMIT 3",
+        "WITH t AS (SELECT user_id, SUM(amount) s FROM orders GROUP BY user_id) SELECT * FROM t LIMIT 5",
+        "SELECT id FROM users WHERE id IN (SELECT user_id FROM orders) LIMIT 5",
+        "SELECT EXTRACT(YEAR FROM ts) y, COUNT(*) FROM sensor_data GROUP BY y LIMIT 5",
+        "SELECT TRIM(BOTH ' ' FROM unit) u, AVG(value) FROM sensor_data GROUP BY u LIMIT 5",
+        "SELECT SUBSTRING(device_id FROM 1 FOR 4) p FROM sensor_data LIMIT 5",
+        "select id from users limit 1;",
+        "SELECT CASE WHEN temp > 1000 THEN 'hot' ELSE 'cold' END level FROM ladle_temp LIMIT 5",
+        "SELECT CONVERT(status USING utf8mb4) FROM ladle_temp LIMIT 1",
+        "SELECT id FROM users u JOIN orders o USING (id) LIMIT 1",
+    ],
+)
+def test_accepts_valid_queries(validator, sql):
+    result = validator.validate(sql)
+    assert result.ok, result.reason
+
+
+@pytest.mark.parametrize(
+    "sql, reason",
+    [
+        ("SELECT 1 FROM users LIMIT 1; DROP TABLE users", "单条语句"),
+        ("UPDATE orders SET amount = 1", "只允许 SELECT"),
+        ("DELETE FROM orders", "只允许 SELECT"),
+        ("SELECT * INTO backup FROM orders LIMIT 1", "INTO"),
+        ("SELECT amount FROM orders", "LIMIT"),
+        ("SELECT id FROM users WHERE (id > 1 LIMIT 1", "括号"),
+        ("SELECT * FROM orderz LIMIT 5", "表不存在: orderz"),
+        ("SELECT o.amt FROM orders o LIMIT 5", "列不存在: o.amt"),
+        ("SELECT foo FROM orders LIMIT 5", "列不存在: foo"),
+        ("SELECT CASE WHEN temp > 1 THEN 1 END lvl, bogus FROM ladle_temp LIMIT 5", "列不存在: bogus"),
+        ("", "没有 SQL"),
+    ],
+)
+def test_rejects_invalid_queries(validator, sql, reason):
+    result = validator.validate(sql)
+    assert not result.ok
+    assert reason in result.reason
+
+
+def test_rejected_counter(validator):
+    validator.validate("SELECT * FROM orderz LIMIT 1")
+    validator.validate("SELECT id FROM users LIMIT 1")
+    assert validator.rejected == 1
+
+
+def test_empty_catalog_checks_statement_only():
+    validator = SQLValidator(SQLValidationConfig(), catalog=SchemaCatalog())
+    assert validator.validate("SELECT anything FROM whatever LIMIT 1").ok
+    assert not validator.validate("SELECT anything FROM whatever").ok
+    assert not validator.validate("DROP TABLE whatever").ok
+
+
+def test_options_disable_limit_and_column_checks():
+    cfg = SQLValidationConfig(require_limit=False, check_columns=False)
+    validator = SQLValidator(cfg, catalog=SchemaCatalog.from_ddl([DDL]))
+    assert validator.validate("SELECT foo FROM orders").ok
+    assert not validator.validate("SELECT foo FROM orderz").ok
+
+
+def test_catalog_loaded_lazily_from_memory_store():
+    class Store:
+        calls = 0
+
+        def items_by_tag(self, tag):
+            Store.calls += 1
+            assert tag == "ddl"
+            return [{"text": DDL}, {"text": ""}]
+
+    validator = SQLValidator(SQLValidationConfig(), memory_store=Store())
+    assert Store.calls == 0
+    assert not validator.validate("SELECT * FROM orderz LIMIT 1").ok
+    assert validator.validate("SELECT * FROM orders LIMIT 1").ok
+    assert Store.calls == 1
+    validator.refresh()
+    validator.validate("SELECT * FROM orders LIMIT 1")
+    assert Store.calls == 2
+
+
+def test_referenced_tables_skips_function_from():
+    assert referenced_tables("SELECT EXTRACT(YEAR FROM ts) FROM sensor_data") == {"sensor_data"}
+    assert referenced_tables("SELECT * FROM a x, c JOIN db.b AS y ON x.id = y.id WHERE 1") == {"a", "db.b", "c"}
+    assert referenced_tables("SELECT * FROM (SELECT id FROM users) t") == {"users"}
+    assert referenced_tables("UPDATE orders SET amount = 1") == {"orders"}